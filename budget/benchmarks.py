@@ -0,0 +1,257 @@
+import asyncio
+import random
+import statistics
+import threading
+import time
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import OperationalError, connection
+from django.db.models import Count
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from . import services, sharding
+from .models import FamilyGroup, Category, Expense, Profile
+
+# (label, url name, method). Every request is made as the owner of the group.
+BENCHMARKED_VIEWS = [
+    ("DashboardView", "budget_dashboard", "get"),
+    ("GroupMembersView", "group_members", "get"),
+    ("AdminManageMembersView", "group_manage_members", "get"),
+    ("CategoryManageView", "category_manage", "get"),
+    ("GoalManageView", "goal_manage", "get"),
+    ("ProfileEditView", "profile_edit", "get"),
+    ("ProfileEditView", "profile_edit", "post"),
+]
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def pick_group():
+    """The group with the most members, so the benchmark sees the worst case."""
+    return (
+        FamilyGroup.objects.annotate(size=Count("profile"))
+        .select_related("owner")
+        .order_by("-size", "pk")
+        .first()
+    )
+
+
+def run_view_benchmarks(group=None, iterations=20, cold_cache=False):
+    """
+    Drive each view in BENCHMARKED_VIEWS through the test client and return
+    one result dict per view with p50/p95/mean latency (ms) and query counts.
+    """
+    group = group or pick_group()
+    if group is None:
+        raise ValueError("No family group to benchmark; run seed_budget first.")
+
+    client = Client()
+    client.force_login(group.owner)
+    post_data = _profile_post_data(group)
+
+    results = []
+    with override_settings(ALLOWED_HOSTS=["testserver"]):
+        for label, url_name, method in BENCHMARKED_VIEWS:
+            url = reverse(url_name)
+            timings = []
+            queries = []
+            for _ in range(iterations):
+                if cold_cache:
+                    cache.clear()
+                with CaptureQueriesContext(connection) as captured:
+                    start = time.perf_counter()
+                    if method == "post":
+                        response = client.post(url, post_data)
+                    else:
+                        response = client.get(url)
+                    timings.append((time.perf_counter() - start) * 1000)
+                queries.append(len(captured))
+
+            results.append({
+                "view": label,
+                "method": method.upper(),
+                "status": response.status_code,
+                "p50_ms": percentile(timings, 50),
+                "p95_ms": percentile(timings, 95),
+                "mean_ms": statistics.fmean(timings),
+                "queries": max(queries),
+            })
+    return results
+
+
+def _profile_post_data(group):
+    profile = group.owner.profile
+    data = {
+        "nickname": profile.nickname,
+        "income": str(profile.income),
+        "expenses": str(profile.expenses),
+    }
+    category = (
+        sharding.for_group(Category.objects.filter(group=group), group)
+        .order_by("pk")
+        .first()
+    )
+    if category is not None:
+        data[f"category_expense_{category.pk}"] = "1.00"
+    return data
+
+
+def run_mixed_load(threads=8, duration=5.0, write_ratio=0.2, seed=None):
+    """
+    Hammer the database from `threads` threads for `duration` seconds with a
+    mix of page reads (members list, month totals, categories) and expense
+    writes (save_expenses: insert, rollup upsert, version bump). Returns
+    throughput, latency percentiles per kind and the number of operations that
+    failed with a database error such as "database is locked".
+    """
+    households = []
+    for group in FamilyGroup.objects.order_by("pk"):
+        profile_ids = list(Profile.objects.filter(group=group).values_list("pk", flat=True))
+        category_ids = list(
+            sharding.for_group(Category.objects.filter(group=group), group)
+            .values_list("pk", flat=True)
+        )
+        if profile_ids and category_ids:
+            households.append((group, profile_ids, category_ids))
+    if not households:
+        raise ValueError("No family group with members and categories; run seed_budget first.")
+
+    timings = {"read": [], "write": []}
+    errors = []
+    lock = threading.Lock()
+    deadline = time.perf_counter() + duration
+
+    def worker(number):
+        rng = random.Random(None if seed is None else seed + number)
+        local = {"read": [], "write": []}
+        local_errors = []
+        try:
+            while time.perf_counter() < deadline:
+                group, profile_ids, category_ids = rng.choice(households)
+                kind = "write" if rng.random() < write_ratio else "read"
+                start = time.perf_counter()
+                try:
+                    if kind == "write":
+                        services.save_expenses(group, [
+                            Expense(
+                                profile_id=rng.choice(profile_ids),
+                                group_id=group.pk,
+                                category_id=rng.choice(category_ids),
+                                amount=Decimal(rng.randint(100, 20000)) / 100,
+                            )
+                            for _ in range(rng.randint(1, 3))
+                        ])
+                    else:
+                        services.build_members_list(group)
+                        list(services.monthly_category_totals(group, timezone.localdate()))
+                        with sharding.group_scope(group):
+                            list(Category.objects.filter(group=group).order_by("name"))
+                except OperationalError as exc:
+                    local_errors.append(str(exc))
+                    continue
+                local[kind].append((time.perf_counter() - start) * 1000)
+        finally:
+            connection.close()
+            with lock:
+                for key, values in local.items():
+                    timings[key].extend(values)
+                errors.extend(local_errors)
+
+    pool = [threading.Thread(target=worker, args=(n,)) for n in range(threads)]
+    started = time.perf_counter()
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    operations = len(timings["read"]) + len(timings["write"])
+    return {
+        "profile": getattr(settings, "DATABASE_PROFILE", "default"),
+        "threads": threads,
+        "seconds": round(elapsed, 2),
+        "reads": len(timings["read"]),
+        "writes": len(timings["write"]),
+        "errors": len(errors),
+        "ops_per_s": round(operations / elapsed, 1),
+        "read_p95_ms": round(percentile(timings["read"], 95), 2),
+        "write_p95_ms": round(percentile(timings["write"], 95), 2),
+        "first_error": errors[0] if errors else None,
+    }
+
+
+# Pages served as async views (the ASGI benchmark's workload).
+HTTP_BENCHMARK_PATHS = ("/dashboard/", "/group/members/")
+
+
+async def _http_get(host, port, path, headers):
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        lines = [f"GET {path} HTTP/1.1", f"Host: {host}:{port}", "Connection: close"]
+        lines += [f"{name}: {value}" for name, value in headers.items()]
+        writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1"))
+        await writer.drain()
+        response = await reader.read()
+    finally:
+        writer.close()
+        await writer.wait_closed()
+    return int(response.split(b" ", 2)[1])
+
+
+def run_http_load(host, port, headers, paths=HTTP_BENCHMARK_PATHS, concurrency=64, duration=5.0):
+    """
+    Keep `concurrency` clients requesting `paths` in turn from a running HTTP
+    server for `duration` seconds, each waiting for its response before the
+    next request. Returns requests/s, latency percentiles (ms) and errors
+    (failed connections or non-200 responses).
+    """
+
+    async def load():
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + duration
+        timings = []
+        errors = []
+
+        async def client(number):
+            turn = number
+            while loop.time() < deadline:
+                path = paths[turn % len(paths)]
+                turn += 1
+                start = time.perf_counter()
+                try:
+                    status = await _http_get(host, port, path, headers)
+                except (OSError, ValueError, IndexError) as exc:
+                    errors.append(f"{path}: {exc!r}")
+                    continue
+                if status != 200:
+                    errors.append(f"{path}: HTTP {status}")
+                    continue
+                timings.append((time.perf_counter() - start) * 1000)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(client(n) for n in range(concurrency)))
+        return timings, errors, time.perf_counter() - started
+
+    timings, errors, elapsed = asyncio.run(load())
+    return {
+        "concurrency": concurrency,
+        "seconds": round(elapsed, 2),
+        "requests": len(timings),
+        "errors": len(errors),
+        "requests_per_s": round(len(timings) / elapsed, 1),
+        "p50_ms": round(percentile(timings, 50), 2),
+        "p95_ms": round(percentile(timings, 95), 2),
+        "p99_ms": round(percentile(timings, 99), 2),
+        "first_error": errors[0] if errors else None,
+    }
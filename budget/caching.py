@@ -0,0 +1,55 @@
+import threading
+
+from django.conf import settings
+from django.core.cache import cache
+
+from . import metrics
+
+_lock = threading.Lock()
+_stats = {"hits": 0, "misses": 0}
+
+
+def group_cache_key(group, name):
+    return f"budget:group:{group.pk}:v{group.version}:{name}"
+
+
+def group_history_cache_key(group, name):
+    """For results about closed months only; valid until history_version moves."""
+    return f"budget:group:{group.pk}:h{group.history_version}:{name}"
+
+
+def get_or_build(key, builder, permanent=False):
+    value = cache.get(key)
+    if value is not None:
+        _record("hits", "hit")
+        return value
+
+    _record("misses", "miss")
+    value = builder()
+    timeout = None if permanent else getattr(settings, "BUDGET_GROUP_CACHE_TIMEOUT", 600)
+    cache.set(key, value, timeout)
+    return value
+
+
+def _record(outcome, result):
+    with _lock:
+        _stats[outcome] += 1
+    metrics.CACHE_LOOKUPS.inc(result=result)
+
+
+def cache_stats():
+    with _lock:
+        hits = _stats["hits"]
+        misses = _stats["misses"]
+    lookups = hits + misses
+    return {
+        "hits": hits,
+        "misses": misses,
+        "hit_ratio": hits / lookups if lookups else 0.0,
+    }
+
+
+def reset_cache_stats():
+    with _lock:
+        _stats["hits"] = 0
+        _stats["misses"] = 0
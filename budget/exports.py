@@ -0,0 +1,118 @@
+import csv
+import itertools
+
+from asgiref.sync import sync_to_async
+from django.core.serializers.json import DjangoJSONEncoder
+
+from . import services, sharding
+from .models import Category, Goal, Expense, Profile
+
+EXPORT_CHUNK_SIZE = 2000
+
+SECTIONS = {
+    "member": ["username", "display_name", "role", "income", "expenses"],
+    "category": ["category_id", "name", "budget_limit"],
+    "goal": ["name", "target_amount", "created_at"],
+    "expense": ["date", "category", "member", "amount", "note"],
+}
+
+
+class Echo:
+    """File-like object whose write() hands the line back to the caller."""
+
+    def write(self, value):
+        return value
+
+
+def export_sections(group, start=None, end=None, category_id=None):
+    """
+    Yield (record_type, values) for the whole group history. Every section is
+    read with a server-side iterator so memory stays flat for any export size.
+    """
+    # The response is streamed after the request's shard scope has ended, so
+    # household querysets name the group's shard themselves.
+    members = services.build_members_list(group)
+    for member in members:
+        yield "member", [member[field] for field in SECTIONS["member"]]
+
+    categories = sharding.for_group(
+        Category.objects.filter(group=group)
+        .order_by("name")
+        .values_list("pk", "name", "budget_limit"),
+        group,
+    )
+    for row in categories.iterator(chunk_size=EXPORT_CHUNK_SIZE):
+        yield "category", list(row)
+
+    goals = sharding.for_group(
+        Goal.objects.filter(group=group)
+        .order_by("created_at")
+        .values_list("name", "target_amount", "created_at"),
+        group,
+    )
+    for row in goals.iterator(chunk_size=EXPORT_CHUNK_SIZE):
+        yield "goal", list(row)
+
+    usernames = {member["profile_id"]: member["username"] for member in members}
+    for row in expense_rows(group, start, end, category_id, usernames):
+        yield "expense", list(row)
+
+
+def expense_rows(group, start=None, end=None, category_id=None, usernames=None):
+    """
+    (date, category, username, amount, note) rows in date order. Usernames
+    come from the directory database, not a join: `usernames` maps profile ids
+    to names up front and anyone missing (former members) is looked up once
+    per chunk.
+    """
+    usernames = dict(usernames or {})
+    expenses = sharding.for_group(Expense.objects.filter(group=group), group)
+    if start:
+        expenses = expenses.filter(date__gte=start)
+    if end:
+        expenses = expenses.filter(date__lte=end)
+    if category_id:
+        expenses = expenses.filter(category_id=category_id)
+
+    rows = (
+        expenses.order_by("date", "pk")
+        .values_list("date", "category__name", "profile_id", "amount", "note")
+        .iterator(chunk_size=EXPORT_CHUNK_SIZE)
+    )
+    while chunk := list(itertools.islice(rows, EXPORT_CHUNK_SIZE)):
+        missing = {row[2] for row in chunk} - usernames.keys()
+        if missing:
+            usernames.update(
+                Profile.objects.filter(pk__in=missing).values_list("pk", "user__username")
+            )
+        for date, category, profile_id, amount, note in chunk:
+            yield date, category, usernames.get(profile_id), amount, note
+
+
+def stream_csv(sections):
+    writer = csv.writer(Echo())
+    current = None
+    for record_type, values in sections:
+        if record_type != current:
+            current = record_type
+            yield writer.writerow(["type", *SECTIONS[record_type]])
+        yield writer.writerow([record_type, *values])
+
+
+def stream_jsonl(sections):
+    encoder = DjangoJSONEncoder()
+    for record_type, values in sections:
+        record = {"type": record_type, **dict(zip(SECTIONS[record_type], values))}
+        yield encoder.encode(record) + "\n"
+
+
+async def astream(lines):
+    """
+    Async iterator over stream_csv/stream_jsonl output for ASGI responses,
+    which would otherwise read a sync iterator to the end before sending
+    anything. Each chunk of lines is built in one sync_to_async call on the
+    request's sync thread, where the server-side cursors live.
+    """
+    next_chunk = sync_to_async(lambda: list(itertools.islice(lines, EXPORT_CHUNK_SIZE)))
+    while chunk := await next_chunk():
+        yield "".join(chunk)
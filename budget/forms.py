@@ -12,6 +12,21 @@ class ProfileForm(forms.ModelForm):
             "expenses": "Monthly Expenses",
         }
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # changed_data compares against the values the page was rendered with,
+        # not whatever another device has saved since.
+        for field in self.fields.values():
+            field.show_hidden_initial = True
+
 
 class JoinGroupForm(forms.Form):
-    code = forms.CharField(label="Family Code", max_length=10)
\ No newline at end of file
+    code = forms.CharField(label="Family Code", max_length=10)
+
+
+class ExpenseImportForm(forms.Form):
+    file = forms.FileField(label="CSV file")
+    dry_run = forms.BooleanField(
+        label="Only check the file, don't import anything",
+        required=False,
+    )
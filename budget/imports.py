@@ -0,0 +1,231 @@
+import csv
+import datetime
+from contextlib import nullcontext
+from decimal import Decimal, InvalidOperation
+
+from django.db import transaction
+from django.utils import timezone
+
+from . import metrics, sharding
+from .models import (
+    Profile,
+    Category,
+    Expense,
+    MonthlyCategoryTotal,
+    add_profile_expenses,
+    bump_group_version,
+    is_current_month,
+    month_start,
+)
+from .money import CENT
+
+MAX_AMOUNT = Decimal("9999999999.99")
+REQUIRED_COLUMNS = ("date", "category", "amount")
+
+
+def import_expenses(group, profile, lines, batch_size=1000, dry_run=False):
+    """
+    Import expenses for a group from CSV text lines with a header row of
+    date, category, amount and optional note / member columns. Only CSV is
+    read: bank formats such as OFX carry no category, so they have to be
+    exported or converted to CSV first.
+
+    Categories and members are resolved from maps loaded once up front, rows
+    are written with bulk_create in batches inside one transaction and the
+    monthly rollup and the members' monthly expenses (rows dated this month
+    only) are updated once at the end. Bad rows are skipped and reported as
+    {"line": n, "error": "..."}; with dry_run nothing is written.
+    """
+    reader = csv.DictReader(lines)
+    columns = [name.strip().lower() for name in reader.fieldnames or []]
+    missing = [name for name in REQUIRED_COLUMNS if name not in columns]
+    if missing:
+        return {
+            "imported": 0,
+            "errors": [{"line": 1, "error": f"Missing column(s): {', '.join(missing)}"}],
+            "dry_run": dry_run,
+        }
+    reader.fieldnames = columns
+
+    categories = sharding.for_group(Category.objects.filter(group=group), group)
+    category_ids = {
+        name.casefold(): pk for pk, name in categories.values_list("pk", "name")
+    }
+    member_ids = {
+        username.casefold(): pk
+        for pk, username in Profile.objects.filter(group=group).values_list(
+            "pk", "user__username"
+        )
+    }
+
+    imported = 0
+    errors = []
+    deltas = {}
+    spent = {}
+    batch = []
+
+    with sharding.group_scope(group) as db:
+        # A dry run only reads, so it mustn't hold the write lock while it parses.
+        writing = nullcontext() if dry_run else transaction.atomic(using=db)
+        with writing:
+            for line, row in enumerate(reader, start=2):
+                try:
+                    expense = _build_expense(row, group, profile, category_ids, member_ids)
+                except ValueError as exc:
+                    errors.append({"line": line, "error": str(exc)})
+                    continue
+
+                key = (group.pk, expense.category_id, month_start(expense.date))
+                amount, count = deltas.get(key, (0, 0))
+                deltas[key] = (amount + expense.amount, count + 1)
+                if is_current_month(expense.date):
+                    owner = expense.profile_id
+                    spent[owner] = spent.get(owner, 0) + expense.amount
+                imported += 1
+
+                if dry_run:
+                    continue
+                batch.append(expense)
+                if len(batch) >= batch_size:
+                    Expense.objects.bulk_create(batch, batch_size=batch_size)
+                    batch = []
+
+            if not dry_run:
+                if batch:
+                    Expense.objects.bulk_create(batch, batch_size=batch_size)
+                if deltas:
+                    MonthlyCategoryTotal.objects.apply_deltas(deltas)
+                    add_profile_expenses(group.pk, spent)
+                    bump_group_version(group.pk)
+                metrics.EXPENSE_WRITES.inc(imported)
+
+    return {"imported": imported, "errors": errors, "dry_run": dry_run}
+
+
+def _build_expense(row, group, profile, category_ids, member_ids):
+    date = parse_date(row.get("date"))
+
+    category_name = (row.get("category") or "").strip()
+    category_id = category_ids.get(category_name.casefold())
+    if category_id is None:
+        raise ValueError(f"Unknown category {category_name!r}.")
+
+    amount = parse_amount(row.get("amount"))
+
+    profile_id = profile.pk
+    username = (row.get("member") or "").strip()
+    if username:
+        profile_id = member_ids.get(username.casefold())
+        if profile_id is None:
+            raise ValueError(f"{username!r} is not a member of this group.")
+
+    return Expense(
+        profile_id=profile_id,
+        group_id=group.pk,
+        category_id=category_id,
+        amount=amount,
+        date=date,
+        note=(row.get("note") or "").strip()[:255],
+    )
+
+
+def parse_date(raw):
+    raw = str(raw or "").strip()
+    try:
+        return datetime.date.fromisoformat(raw)
+    except ValueError:
+        raise ValueError(f"Invalid date {raw!r}; expected YYYY-MM-DD.")
+
+
+def parse_amount(raw):
+    raw = str(raw or "").strip().replace(",", "").lstrip("$")
+    try:
+        amount = Decimal(raw).quantize(CENT)
+    except InvalidOperation:
+        raise ValueError(f"Invalid amount {raw!r}.")
+    if not amount.is_finite() or amount <= 0 or amount > MAX_AMOUNT:
+        raise ValueError(f"Amount {raw!r} is out of range.")
+    return amount
+
+
+def build_expense_batch(group, profile, items):
+    """
+    Validate a list of {"category_id", "amount", "date"?, "note"?} items for
+    the batch entry endpoint. Category ids are checked against the group with a
+    single IN query. Returns (expenses, errors); errors are
+    {"index": i, "error": "..."} and nothing should be saved when there are any.
+    """
+    if not isinstance(items, list):
+        return [], [{"index": None, "error": "Expected a list of items."}]
+
+    requested_ids = set()
+    for item in items:
+        if isinstance(item, dict):
+            try:
+                requested_ids.add(int(item.get("category_id")))
+            except (TypeError, ValueError):
+                pass
+    known_ids = set()
+    if requested_ids:
+        known_ids = set(
+            sharding.for_group(
+                Category.objects.filter(group=group, pk__in=requested_ids), group
+            ).values_list("pk", flat=True)
+        )
+
+    today = timezone.localdate()
+    expenses = []
+    errors = []
+    for index, item in enumerate(items):
+        try:
+            if not isinstance(item, dict):
+                raise ValueError("Each item must be an object.")
+            try:
+                category_id = int(item.get("category_id"))
+            except (TypeError, ValueError):
+                raise ValueError(f"Invalid category_id {item.get('category_id')!r}.")
+            if category_id not in known_ids:
+                raise ValueError(f"Category {category_id} is not part of this group.")
+            amount = parse_amount(item.get("amount"))
+            date = parse_date(item["date"]) if item.get("date") else today
+        except ValueError as exc:
+            errors.append({"index": index, "error": str(exc)})
+            continue
+
+        expenses.append(Expense(
+            profile_id=profile.pk,
+            group_id=group.pk,
+            category_id=category_id,
+            amount=amount,
+            date=date,
+            note=str(item.get("note") or "").strip()[:255],
+        ))
+    return expenses, errors
+
+
+def parse_category_lines(text):
+    """
+    Parse the bulk category editor: one "name, limit" per line, where an empty
+    limit means no limit. Returns ({name: limit}, errors); later lines for the
+    same name (compared case-insensitively) win.
+    """
+    rows = {}
+    errors = []
+    for line_number, line in enumerate(text.splitlines(), start=1):
+        if not line.strip():
+            continue
+        name, _sep, raw_limit = line.rpartition(",") if "," in line else (line, "", "")
+        name = name.strip()
+        if not name:
+            errors.append({"line": line_number, "error": "Missing category name."})
+            continue
+        if len(name) > Category._meta.get_field("name").max_length:
+            errors.append({"line": line_number, "error": f"Name {name!r} is too long."})
+            continue
+        try:
+            limit = parse_amount(raw_limit) if raw_limit.strip() else None
+        except ValueError as exc:
+            errors.append({"line": line_number, "error": str(exc)})
+            continue
+        rows[name.casefold()] = (name, limit)
+    return dict(rows.values()), errors
@@ -0,0 +1,24 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+
+from budget.models import Profile
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = "Create the missing Profile row for users that signed up before profiles were created eagerly."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=500)
+
+    def handle(self, *args, **options):
+        missing = User.objects.filter(profile__isnull=True).values_list("pk", flat=True)
+        profiles = [Profile(user_id=user_id) for user_id in missing.iterator()]
+
+        Profile.objects.bulk_create(
+            profiles,
+            batch_size=options["batch_size"],
+            ignore_conflicts=True,
+        )
+        self.stdout.write(self.style.SUCCESS(f"Created {len(profiles)} profile(s)."))
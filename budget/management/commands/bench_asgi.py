@@ -0,0 +1,123 @@
+import importlib.util
+import json
+import socket
+import subprocess
+import sys
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client
+
+from budget.benchmarks import pick_group, run_http_load
+
+HOST = "127.0.0.1"
+SERVERS = ("wsgi", "asgi")
+
+
+class Command(BaseCommand):
+    help = (
+        "Serve the app with Django's threaded WSGI server and with uvicorn "
+        "(ASGI), then load the async dashboard and members pages on both at "
+        "high concurrency and compare requests/s and tail latency. Uses the "
+        "configured database; run seed_budget first. Needs `pip install uvicorn`."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--concurrency", type=int, default=64)
+        parser.add_argument("--duration", type=float, default=10.0, help="Seconds per server.")
+        parser.add_argument(
+            "--server",
+            choices=SERVERS,
+            action="append",
+            help="Benchmark only this server (repeatable; default both).",
+        )
+        parser.add_argument("--json", action="store_true", help="Print results as JSON.")
+
+    def handle(self, *args, **options):
+        servers = options["server"] or list(SERVERS)
+        if "asgi" in servers and importlib.util.find_spec("uvicorn") is None:
+            raise CommandError("The ASGI benchmark needs uvicorn: pip install uvicorn")
+
+        group = pick_group()
+        if group is None:
+            raise CommandError("No family group to benchmark; run seed_budget first.")
+        client = Client()
+        client.force_login(group.owner)
+        cookie = client.cookies[settings.SESSION_COOKIE_NAME].value
+        headers = {"Cookie": f"{settings.SESSION_COOKIE_NAME}={cookie}"}
+
+        results = []
+        for server in servers:
+            port = _free_port()
+            process = subprocess.Popen(
+                _server_command(server, port),
+                cwd=settings.BASE_DIR,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+            )
+            try:
+                _wait_for_port(port, process)
+                # Warm up connections, caches and templates first.
+                run_http_load(HOST, port, headers, concurrency=4, duration=1.0)
+                result = run_http_load(
+                    HOST,
+                    port,
+                    headers,
+                    concurrency=options["concurrency"],
+                    duration=options["duration"],
+                )
+            finally:
+                process.terminate()
+                process.wait(timeout=10)
+            results.append({"server": server, **result})
+
+        if options["json"]:
+            self.stdout.write(json.dumps(results, indent=2))
+            return
+
+        self.stdout.write(
+            f"{'server':<6} {'clients':>7} {'req/s':>8} {'requests':>8} {'errors':>6} "
+            f"{'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}"
+        )
+        for row in results:
+            self.stdout.write(
+                f"{row['server']:<6} {row['concurrency']:>7} {row['requests_per_s']:>8.1f} "
+                f"{row['requests']:>8} {row['errors']:>6} {row['p50_ms']:>8.2f} "
+                f"{row['p95_ms']:>8.2f} {row['p99_ms']:>8.2f}"
+            )
+        for row in results:
+            if row["first_error"]:
+                self.stdout.write(f"{row['server']}: first error: {row['first_error']}")
+
+
+def _server_command(server, port):
+    if server == "asgi":
+        return [
+            sys.executable, "-m", "uvicorn", "mysite.asgi:application",
+            "--host", HOST, "--port", str(port),
+            "--no-access-log", "--log-level", "warning",
+        ]
+    return [
+        sys.executable, str(settings.BASE_DIR / "manage.py"), "runserver",
+        f"{HOST}:{port}", "--noreload", "--skip-checks",
+    ]
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind((HOST, 0))
+        return sock.getsockname()[1]
+
+
+def _wait_for_port(port, process, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise CommandError(f"Server exited with status {process.returncode}.")
+        try:
+            with socket.create_connection((HOST, port), timeout=0.5):
+                return
+        except OSError:
+            time.sleep(0.1)
+    raise CommandError(f"Server did not start listening on port {port}.")
@@ -0,0 +1,57 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from budget.benchmarks import run_view_benchmarks
+from budget.models import FamilyGroup
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark the budget views through the test client and report p50/p95 "
+        "latency and query counts. Run seed_budget first for realistic volume."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--iterations", type=int, default=20)
+        parser.add_argument("--group", help="Family group code (default: largest group).")
+        parser.add_argument(
+            "--cold-cache",
+            action="store_true",
+            help="Clear the cache before every request.",
+        )
+        parser.add_argument("--json", action="store_true", help="Print results as JSON.")
+
+    def handle(self, *args, **options):
+        group = None
+        if options["group"]:
+            try:
+                group = FamilyGroup.objects.select_related("owner").get(
+                    code=options["group"]
+                )
+            except FamilyGroup.DoesNotExist:
+                raise CommandError(f"No family group with code {options['group']!r}.")
+
+        try:
+            results = run_view_benchmarks(
+                group=group,
+                iterations=options["iterations"],
+                cold_cache=options["cold_cache"],
+            )
+        except ValueError as exc:
+            raise CommandError(str(exc))
+
+        if options["json"]:
+            self.stdout.write(json.dumps(results, indent=2))
+            return
+
+        self.stdout.write(
+            f"{'view':<24} {'method':<6} {'status':>6} {'p50 ms':>8} "
+            f"{'p95 ms':>8} {'mean ms':>8} {'queries':>8}"
+        )
+        for row in results:
+            self.stdout.write(
+                f"{row['view']:<24} {row['method']:<6} {row['status']:>6} "
+                f"{row['p50_ms']:>8.2f} {row['p95_ms']:>8.2f} "
+                f"{row['mean_ms']:>8.2f} {row['queries']:>8}"
+            )
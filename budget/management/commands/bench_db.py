@@ -0,0 +1,93 @@
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from budget.benchmarks import run_mixed_load
+
+PROFILES = ("default", "tuned")
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure mixed read/write throughput against the database from several "
+        "threads. --compare runs the same load on fresh seeded databases with "
+        "Django's stock SQLite settings and with the tuned profile."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--threads", type=int, default=8)
+        parser.add_argument("--duration", type=float, default=5.0, help="Seconds per run.")
+        parser.add_argument("--write-ratio", type=float, default=0.2)
+        parser.add_argument("--seed", type=int, default=None)
+        parser.add_argument(
+            "--compare",
+            action="store_true",
+            help="Benchmark both database profiles on throwaway databases.",
+        )
+        parser.add_argument("--json", action="store_true", help="Print results as JSON.")
+
+    def handle(self, *args, **options):
+        if options["compare"]:
+            results = [self._run_profile(profile, options) for profile in PROFILES]
+        else:
+            try:
+                results = [
+                    run_mixed_load(
+                        threads=options["threads"],
+                        duration=options["duration"],
+                        write_ratio=options["write_ratio"],
+                        seed=options["seed"],
+                    )
+                ]
+            except ValueError as exc:
+                raise CommandError(str(exc))
+
+        if options["json"]:
+            self.stdout.write(json.dumps(results, indent=2))
+            return
+
+        self.stdout.write(
+            f"{'profile':<8} {'threads':>7} {'ops/s':>8} {'reads':>7} {'writes':>7} "
+            f"{'errors':>7} {'read p95':>9} {'write p95':>10}"
+        )
+        for row in results:
+            self.stdout.write(
+                f"{row['profile']:<8} {row['threads']:>7} {row['ops_per_s']:>8.1f} "
+                f"{row['reads']:>7} {row['writes']:>7} {row['errors']:>7} "
+                f"{row['read_p95_ms']:>9.2f} {row['write_p95_ms']:>10.2f}"
+            )
+        for row in results:
+            if row["first_error"]:
+                self.stdout.write(f"{row['profile']}: first error: {row['first_error']}")
+
+    def _run_profile(self, profile, options):
+        with tempfile.TemporaryDirectory() as directory:
+            env = {
+                **os.environ,
+                "BUDGET_DB_PROFILE": profile,
+                "BUDGET_DB_NAME": os.path.join(directory, "bench.sqlite3"),
+            }
+            manage = [sys.executable, str(settings.BASE_DIR / "manage.py")]
+            steps = [
+                ["migrate", "--noinput", "-v", "0"],
+                ["seed_budget", "--users", "200", "--group-size", "4",
+                 "--expenses-per-member", "20", "--seed", "1"],
+            ]
+            for step in steps:
+                subprocess.run(manage + step, env=env, check=True, capture_output=True)
+
+            bench = manage + [
+                "bench_db", "--json",
+                "--threads", str(options["threads"]),
+                "--duration", str(options["duration"]),
+                "--write-ratio", str(options["write_ratio"]),
+            ]
+            if options["seed"] is not None:
+                bench += ["--seed", str(options["seed"])]
+            completed = subprocess.run(bench, env=env, check=True, capture_output=True, text=True)
+            return json.loads(completed.stdout)[0]
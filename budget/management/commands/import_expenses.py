@@ -0,0 +1,61 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from budget.imports import import_expenses
+from budget.models import FamilyGroup, Profile
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        "Import expenses for a family group from a CSV file with "
+        "date, category, amount and optional note / member columns. "
+        "OFX and other bank formats aren't read; convert them to CSV first."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="CSV file to import.")
+        parser.add_argument("--group", required=True, help="Family group code.")
+        parser.add_argument(
+            "--user",
+            required=True,
+            help="Username the expenses are recorded for when a row has no member column.",
+        )
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Validate every row and report errors without writing anything.",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            group = FamilyGroup.objects.get(code=options["group"])
+        except FamilyGroup.DoesNotExist:
+            raise CommandError(f"No family group with code {options['group']!r}.")
+
+        try:
+            profile = Profile.objects.get(user__username=options["user"], group=group)
+        except Profile.DoesNotExist:
+            raise CommandError(f"{options['user']!r} is not a member of {group}.")
+
+        with open(options["path"], newline="", encoding="utf-8-sig") as handle:
+            report = import_expenses(
+                group,
+                profile,
+                handle,
+                batch_size=options["batch_size"],
+                dry_run=options["dry_run"],
+            )
+
+        for error in report["errors"]:
+            self.stderr.write(f"line {error['line']}: {error['error']}")
+
+        verb = "Validated" if report["dry_run"] else "Imported"
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{verb} {report['imported']} expense(s); "
+                f"{len(report['errors'])} row(s) rejected."
+            )
+        )
@@ -0,0 +1,44 @@
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from budget.profiling import list_profiles, profile_dir, summarize
+
+
+class Command(BaseCommand):
+    help = (
+        "List captured request profiles and show the top functions across them "
+        "by cumulative (or own) time."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--view", help="Only profiles of this URL name, e.g. budget_dashboard.")
+        parser.add_argument("--limit", type=int, default=25)
+        parser.add_argument(
+            "--sort",
+            choices=("cumulative", "tottime"),
+            default="cumulative",
+        )
+        parser.add_argument(
+            "--list",
+            action="store_true",
+            help="Only list the matching profile files.",
+        )
+
+    def handle(self, *args, **options):
+        paths = list_profiles(view=options["view"])
+        if not paths:
+            raise CommandError(f"No profiles found in {profile_dir()}.")
+
+        if options["list"]:
+            for path in paths:
+                self.stdout.write(f"{path.name}  {os.path.getsize(path)} bytes")
+            return
+
+        self.stdout.write(f"{len(paths)} profile(s) from {profile_dir()}")
+        self.stdout.write(f"{'calls':>8} {'tottime':>9} {'cumtime':>9}  function")
+        for row in summarize(paths, limit=options["limit"], sort=options["sort"]):
+            self.stdout.write(
+                f"{row['calls']:>8} {row['tottime']:>9.4f} {row['cumtime']:>9.4f}  "
+                f"{row['function']}"
+            )
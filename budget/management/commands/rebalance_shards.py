@@ -0,0 +1,81 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from budget import sharding
+from budget.models import FamilyGroup
+
+
+class Command(BaseCommand):
+    help = (
+        "Move family groups between shards. With --group and --to, moves one "
+        "group; otherwise moves every group whose pinned shard differs from "
+        "its place on the hash ring. Run with --pin before changing "
+        "BUDGET_SHARDS so existing groups stay where they are until moved."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--group", help="Family group code to move.")
+        parser.add_argument("--to", help="Target shard alias for --group.")
+        parser.add_argument(
+            "--pin",
+            action="store_true",
+            help="Record every unpinned group's current shard and exit.",
+        )
+        parser.add_argument("--limit", type=int, help="Move at most this many groups.")
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="List the moves without copying anything.",
+        )
+
+    def handle(self, *args, **options):
+        if options["pin"]:
+            return self._pin()
+
+        if options["group"] or options["to"]:
+            if not (options["group"] and options["to"]):
+                raise CommandError("--group and --to go together.")
+            try:
+                group = FamilyGroup.objects.using(sharding.DIRECTORY).get(
+                    code=options["group"]
+                )
+            except FamilyGroup.DoesNotExist:
+                raise CommandError(f"No family group with code {options['group']!r}.")
+            moves = [(group, options["to"])]
+        else:
+            moves = [
+                (group, sharding.hashed_shard(group.pk))
+                for group in FamilyGroup.objects.using(sharding.DIRECTORY)
+                .exclude(shard="")
+                .order_by("pk")
+                if group.shard != sharding.hashed_shard(group.pk)
+            ]
+            if options["limit"] is not None:
+                moves = moves[:options["limit"]]
+
+        for group, target in moves:
+            source = sharding.shard_for_group(group)
+            if options["dry_run"]:
+                self.stdout.write(f"{group.code}: {source} -> {target}")
+                continue
+            try:
+                moved = sharding.move_group(group, target)
+            except ValueError as exc:
+                raise CommandError(str(exc))
+            self.stdout.write(
+                f"{group.code}: {source} -> {target} ("
+                + ", ".join(f"{count} {name}" for name, count in moved.items())
+                + ")"
+            )
+        verb = "Would move" if options["dry_run"] else "Moved"
+        self.stdout.write(self.style.SUCCESS(f"{verb} {len(moves)} group(s)."))
+
+    def _pin(self):
+        pinned = 0
+        groups = FamilyGroup.objects.using(sharding.DIRECTORY).filter(shard="")
+        for group in groups.only("pk"):
+            FamilyGroup.objects.using(sharding.DIRECTORY).filter(pk=group.pk).update(
+                shard=sharding.hashed_shard(group.pk)
+            )
+            sharding.forget_shard(group.pk)
+            pinned += 1
+        self.stdout.write(self.style.SUCCESS(f"Pinned {pinned} group(s)."))
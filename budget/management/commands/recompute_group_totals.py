@@ -0,0 +1,47 @@
+from django.core.management.base import BaseCommand
+
+from budget import services, sharding
+from budget.models import FamilyGroup
+
+
+class Command(BaseCommand):
+    help = (
+        "Check the denormalized income, expenses and member count on every "
+        "family group against its members' profiles and rewrite the ones that "
+        "drifted, e.g. after editing profiles in the admin or with raw SQL."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--group",
+            action="append",
+            help="Only this family group code (repeatable).",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Report the drifted groups without fixing them.",
+        )
+
+    def handle(self, *args, **options):
+        groups = FamilyGroup.objects.using(sharding.DIRECTORY).order_by("pk")
+        if options["group"]:
+            groups = groups.filter(code__in=options["group"])
+
+        drifted = []
+        for group in groups.annotate(**services.actual_group_totals()).iterator():
+            stored = (group.total_income, group.total_expenses, group.member_count)
+            actual = (group.actual_income, group.actual_expenses, group.actual_members)
+            if stored != actual:
+                drifted.append(group.pk)
+                self.stdout.write(
+                    f"{group.code}: income {stored[0]} -> {actual[0]}, "
+                    f"expenses {stored[1]} -> {actual[1]}, members {stored[2]} -> {actual[2]}"
+                )
+
+        if drifted and not options["dry_run"]:
+            services.recompute_group_totals(groups.filter(pk__in=drifted))
+        if options["dry_run"]:
+            self.stdout.write(f"{len(drifted)} group(s) out of date.")
+        else:
+            self.stdout.write(self.style.SUCCESS(f"Recomputed {len(drifted)} group(s)."))
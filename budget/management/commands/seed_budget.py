@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand
+
+from budget.seeding import SEED_PASSWORD, seed_budget
+
+
+class Command(BaseCommand):
+    help = "Generate synthetic users, family groups, categories, goals and expense history."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=100)
+        parser.add_argument("--group-size", type=int, default=4)
+        parser.add_argument("--categories", type=int, default=8)
+        parser.add_argument("--goals", type=int, default=2)
+        parser.add_argument("--expenses-per-member", type=int, default=50)
+        parser.add_argument("--months", type=int, default=12)
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument("--seed", type=int, default=None, help="Random seed.")
+
+    def handle(self, *args, **options):
+        summary = seed_budget(
+            users=options["users"],
+            group_size=options["group_size"],
+            categories=options["categories"],
+            goals=options["goals"],
+            expenses_per_member=options["expenses_per_member"],
+            months=options["months"],
+            batch_size=options["batch_size"],
+            seed=options["seed"],
+        )
+        self.stdout.write(
+            self.style.SUCCESS(
+                "Created {users} users in {groups} groups with {categories} "
+                "categories, {goals} goals and {expenses} expenses.".format(**summary)
+            )
+        )
+        self.stdout.write(
+            f"Log in as {summary['username_prefix']}0 / {SEED_PASSWORD}"
+        )
@@ -0,0 +1,40 @@
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db.models import Count, Sum
+
+from budget import sharding
+from budget.models import Category, Expense, Goal
+from budget.money import CENT
+
+
+def shard_stats(alias):
+    expenses = Expense.objects.using(alias).aggregate(
+        count=Count("pk"), total=Sum("amount")
+    )
+    return {
+        "groups": Category.objects.using(alias).values("group_id").distinct().count(),
+        "categories": Category.objects.using(alias).count(),
+        "goals": Goal.objects.using(alias).count(),
+        "expenses": expenses["count"],
+        "expense_total": (expenses["total"] or Decimal("0")).quantize(CENT),
+    }
+
+
+class Command(BaseCommand):
+    help = "Row counts and expense totals per shard, queried on all shards in parallel."
+
+    def handle(self, *args, **options):
+        report = sharding.fan_out(shard_stats)
+        for alias, stats in report.items():
+            self.stdout.write(
+                f"{alias}: {stats['groups']} group(s), {stats['categories']} "
+                f"categories, {stats['goals']} goals, {stats['expenses']} expenses "
+                f"totalling {stats['expense_total']}"
+            )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{sum(stats['expenses'] for stats in report.values())} expenses "
+                f"on {len(report)} shard(s)."
+            )
+        )
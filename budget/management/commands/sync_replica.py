@@ -0,0 +1,31 @@
+import sqlite3
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from budget.routers import PRIMARY, replica_alias
+
+
+class Command(BaseCommand):
+    help = (
+        "Copy the primary SQLite database into the read replica file "
+        "(BUDGET_REPLICA_DB) for local testing of read/write splitting."
+    )
+
+    def handle(self, *args, **options):
+        alias = replica_alias()
+        if not alias:
+            raise CommandError("No read replica configured; set BUDGET_REPLICA_DB.")
+        primary = connections[PRIMARY]
+        if primary.vendor != "sqlite" or connections[alias].vendor != "sqlite":
+            raise CommandError("sync_replica only copies SQLite databases.")
+
+        connections[alias].close()
+        primary.ensure_connection()
+        target = sqlite3.connect(settings.DATABASES[alias]["NAME"])
+        try:
+            primary.connection.backup(target)
+        finally:
+            target.close()
+        self.stdout.write(self.style.SUCCESS(f"Copied {PRIMARY} into {alias}."))
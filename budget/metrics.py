@@ -0,0 +1,263 @@
+"""
+In-process metrics registry (counters and fixed-bucket histograms) with
+Prometheus text exposition.
+
+By default every worker process serves its own numbers. With METRICS_DB set to
+a SQLite file path, each process periodically adds its pending deltas into that
+file and /metrics reports the sum over all workers.
+"""
+import atexit
+import json
+import sqlite3
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.contrib.auth.signals import user_logged_in
+from django.dispatch import receiver
+from django.db.models.signals import post_save
+from django.http import Http404, HttpResponse, HttpResponseForbidden
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128)
+
+
+class Registry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._metrics = {}
+        self._values = defaultdict(float)
+        self._last_flush = time.monotonic()
+
+    def register(self, metric):
+        self._metrics[metric.name] = metric
+        return metric
+
+    @property
+    def db_path(self):
+        return getattr(settings, "METRICS_DB", None)
+
+    def add(self, key, amount):
+        with self._lock:
+            self._values[key] += amount
+        interval = getattr(settings, "METRICS_FLUSH_INTERVAL", 5)
+        if self.db_path and time.monotonic() - self._last_flush >= interval:
+            self.flush()
+
+    def flush(self):
+        path = self.db_path
+        if not path:
+            return
+        with self._lock:
+            pending, self._values = self._values, defaultdict(float)
+            self._last_flush = time.monotonic()
+        if not pending:
+            return
+        with self._connect(path) as db:
+            db.executemany(
+                "INSERT INTO samples (key, value) VALUES (?, ?) "
+                "ON CONFLICT (key) DO UPDATE SET value = value + excluded.value",
+                [(json.dumps(key), value) for key, value in pending.items()],
+            )
+
+    def samples(self):
+        path = self.db_path
+        if not path:
+            with self._lock:
+                return dict(self._values)
+        self.flush()
+        with self._connect(path) as db:
+            rows = db.execute("SELECT key, value FROM samples").fetchall()
+        return {_key_from_json(key): value for key, value in rows}
+
+    def reset(self):
+        with self._lock:
+            self._values.clear()
+        if self.db_path:
+            with self._connect(self.db_path) as db:
+                db.execute("DELETE FROM samples")
+
+    @staticmethod
+    def _connect(path):
+        db = sqlite3.connect(path, timeout=10)
+        db.execute(
+            "CREATE TABLE IF NOT EXISTS samples (key TEXT PRIMARY KEY, value REAL NOT NULL)"
+        )
+        return db
+
+    def render(self):
+        samples = self.samples()
+        series = defaultdict(lambda: defaultdict(dict))
+        for (name, labels, suffix), value in samples.items():
+            series[name][tuple(labels)][suffix] = value
+
+        lines = []
+        for name in sorted(self._metrics):
+            metric = self._metrics[name]
+            lines.append(f"# HELP {name} {metric.help}")
+            lines.append(f"# TYPE {name} {metric.kind}")
+            for labels in sorted(series.get(name, {})):
+                lines.extend(metric.format_series(labels, series[name][labels]))
+        lines.extend(_cache_ratio_lines(samples))
+        return "\n".join(lines) + "\n"
+
+
+def _key_from_json(raw):
+    name, labels, suffix = json.loads(raw)
+    if not isinstance(suffix, str):
+        suffix = tuple(suffix)
+    return name, tuple(tuple(pair) for pair in labels), suffix
+
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    escaped = ",".join(
+        '{}="{}"'.format(
+            name,
+            str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"'),
+        )
+        for name, value in labels
+    )
+    return "{" + escaped + "}"
+
+
+def _format_value(value):
+    return repr(int(value)) if float(value).is_integer() else repr(value)
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name, help, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+
+    def inc(self, amount=1, **labels):
+        key_labels = tuple((label, str(labels[label])) for label in self.labelnames)
+        registry.add((self.name, key_labels, ""), amount)
+
+    def format_series(self, labels, values):
+        return [f"{self.name}{_format_labels(labels)} {_format_value(values[''])}"]
+
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(self, name, help, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, **labels):
+        key_labels = tuple((label, str(labels[label])) for label in self.labelnames)
+        for bound in self.buckets:
+            if value <= bound:
+                registry.add((self.name, key_labels, ("le", bound)), 1)
+        registry.add((self.name, key_labels, ("le", float("inf"))), 1)
+        registry.add((self.name, key_labels, "sum"), value)
+        registry.add((self.name, key_labels, "count"), 1)
+
+    def format_series(self, labels, values):
+        lines = []
+        for bound in (*self.buckets, float("inf")):
+            le = "+Inf" if bound == float("inf") else _format_value(bound)
+            count = values.get(("le", bound), 0)
+            lines.append(
+                f"{self.name}_bucket{_format_labels(labels + (('le', le),))} "
+                f"{_format_value(count)}"
+            )
+        for suffix in ("sum", "count"):
+            lines.append(
+                f"{self.name}_{suffix}{_format_labels(labels)} "
+                f"{_format_value(values.get(suffix, 0))}"
+            )
+        return lines
+
+
+def _cache_ratio_lines(samples):
+    hits = samples.get((CACHE_LOOKUPS.name, (("result", "hit"),), ""), 0)
+    misses = samples.get((CACHE_LOOKUPS.name, (("result", "miss"),), ""), 0)
+    ratio = hits / (hits + misses) if hits + misses else 0
+    return [
+        "# HELP budget_group_cache_hit_ratio Share of group cache lookups served from cache.",
+        "# TYPE budget_group_cache_hit_ratio gauge",
+        f"budget_group_cache_hit_ratio {ratio!r}",
+    ]
+
+
+registry = Registry()
+atexit.register(registry.flush)
+
+REQUEST_LATENCY = registry.register(Histogram(
+    "budget_request_duration_seconds",
+    "Request wall time by URL name.",
+    labelnames=("view",),
+))
+REQUESTS = registry.register(Counter(
+    "budget_requests_total",
+    "Requests by URL name, method and status code.",
+    labelnames=("view", "method", "status"),
+))
+REQUEST_QUERIES = registry.register(Histogram(
+    "budget_request_db_queries",
+    "Database queries per request by URL name.",
+    labelnames=("view",),
+    buckets=QUERY_BUCKETS,
+))
+CACHE_LOOKUPS = registry.register(Counter(
+    "budget_group_cache_lookups_total",
+    "Group cache lookups by result (hit or miss).",
+    labelnames=("result",),
+))
+SIGNUPS = registry.register(Counter("budget_signups_total", "User accounts created."))
+LOGINS = registry.register(Counter("budget_logins_total", "Successful logins."))
+GROUP_JOINS = registry.register(Counter(
+    "budget_group_joins_total",
+    "Profiles attached to a family group (join, create or added by the owner).",
+))
+EXPENSE_WRITES = registry.register(Counter(
+    "budget_expense_writes_total",
+    "Expense ledger rows written.",
+))
+
+
+def observe_request(record):
+    view = record["view"] or "unresolved"
+    REQUEST_LATENCY.observe(record["wall_ms"] / 1000, view=view)
+    REQUEST_QUERIES.observe(record["db_queries"], view=view)
+    REQUESTS.inc(view=view, method=record["method"], status=record["status"])
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def count_signup(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        SIGNUPS.inc()
+
+
+@receiver(post_save, sender="budget.Expense")
+def count_expense_save(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        EXPENSE_WRITES.inc()
+
+
+@receiver(user_logged_in)
+def count_login(sender, request, user, **kwargs):
+    LOGINS.inc()
+
+
+def metrics_view(request):
+    token = getattr(settings, "METRICS_TOKEN", None)
+    if not token and not settings.DEBUG:
+        # Per-route latencies aren't for the public; without a token only a
+        # development server shows them.
+        raise Http404("Metrics are disabled.")
+    if token and request.headers.get("Authorization") != f"Bearer {token}":
+        return HttpResponseForbidden("Invalid metrics token.")
+    return HttpResponse(
+        registry.render(),
+        content_type="text/plain; version=0.0.4; charset=utf-8",
+    )
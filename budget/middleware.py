@@ -0,0 +1,55 @@
+from functools import partial
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.utils.functional import SimpleLazyObject
+
+from . import services
+
+
+def get_budget_profile(request):
+    if not hasattr(request, "_cached_budget_profile"):
+        user = request.user
+        request._cached_budget_profile = (
+            services.get_profile(user) if user.is_authenticated else None
+        )
+    return request._cached_budget_profile
+
+
+async def aget_budget_profile(request):
+    if not hasattr(request, "_cached_budget_profile"):
+        user = await request.auser()
+        request._cached_budget_profile = (
+            await services.aget_profile(user) if user.is_authenticated else None
+        )
+    return request._cached_budget_profile
+
+
+class BudgetProfileMiddleware:
+    """
+    Exposes the current user's profile (with its group and the group's owner)
+    as request.budget_profile, loaded with a single query the first time a
+    view (or template) touches it. Async views await request.abudget_profile()
+    instead; both share the same per-request cache.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        self._attach(request)
+        return self.get_response(request)
+
+    async def __acall__(self, request):
+        self._attach(request)
+        return await self.get_response(request)
+
+    def _attach(self, request):
+        request.budget_profile = SimpleLazyObject(partial(get_budget_profile, request))
+        request.abudget_profile = partial(aget_budget_profile, request)
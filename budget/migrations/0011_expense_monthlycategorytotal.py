@@ -0,0 +1,46 @@
+# Generated by Django 5.2.8 on 2026-10-17 22:58
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('budget', '0010_profile_is_admin'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Expense',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('date', models.DateField(default=django.utils.timezone.localdate)),
+                ('note', models.CharField(blank=True, default='', max_length=255)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('category', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='expenses', to='budget.category')),
+                ('group', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='expenses', to='budget.familygroup')),
+                ('profile', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ledger_entries', to='budget.profile')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['group', 'date'], name='expense_group_date_idx'), models.Index(fields=['group', 'category', 'date'], name='expense_group_cat_date_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='MonthlyCategoryTotal',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField()),
+                ('total', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('entry_count', models.PositiveIntegerField(default=0)),
+                ('category', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='monthly_totals', to='budget.category')),
+                ('group', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='monthly_totals', to='budget.familygroup')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['group', 'month'], name='monthly_total_group_month_idx')],
+                'constraints': [models.UniqueConstraint(fields=('group', 'category', 'month'), name='unique_monthly_category_total')],
+            },
+        ),
+    ]
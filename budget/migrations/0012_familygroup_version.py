@@ -0,0 +1,18 @@
+# Generated by Django 5.2.8 on 2026-10-17 23:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('budget', '0011_expense_monthlycategorytotal'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='familygroup',
+            name='version',
+            field=models.PositiveIntegerField(default=1),
+        ),
+    ]
@@ -0,0 +1,77 @@
+# Generated by Django 5.2.8 on 2026-10-17 23:35
+
+from django.db import migrations, models
+from django.db.models import Count, Min, Sum
+from django.db.models.functions import TruncMonth
+
+
+def merge_duplicate_categories(apps, schema_editor):
+    """
+    Fold categories sharing a (group, name) into the oldest one before the
+    unique constraint is added: expenses move over, the monthly rollup rows are
+    rebuilt from the ledger and the first limit that was set is kept.
+    """
+    db = schema_editor.connection.alias
+    Category = apps.get_model("budget", "Category")
+    Expense = apps.get_model("budget", "Expense")
+    MonthlyCategoryTotal = apps.get_model("budget", "MonthlyCategoryTotal")
+
+    duplicates = (
+        Category.objects.using(db)
+        .values("group_id", "name")
+        .annotate(copies=Count("id"), keep_id=Min("id"))
+        .filter(copies__gt=1)
+    )
+    for row in duplicates:
+        keeper = Category.objects.using(db).get(pk=row["keep_id"])
+        extras = Category.objects.using(db).filter(
+            group_id=row["group_id"], name=row["name"]
+        ).exclude(pk=keeper.pk)
+
+        if keeper.budget_limit is None:
+            keeper.budget_limit = (
+                extras.exclude(budget_limit=None)
+                .order_by("pk")
+                .values_list("budget_limit", flat=True)
+                .first()
+            )
+            keeper.save(update_fields=["budget_limit"])
+
+        Expense.objects.using(db).filter(category__in=extras).update(category=keeper)
+        MonthlyCategoryTotal.objects.using(db).filter(
+            category__in=[keeper, *extras]
+        ).delete()
+        MonthlyCategoryTotal.objects.using(db).bulk_create(
+            MonthlyCategoryTotal(
+                group_id=total["group_id"],
+                category=keeper,
+                month=total["month"],
+                total=total["total"],
+                entry_count=total["entry_count"],
+            )
+            for total in Expense.objects.using(db)
+            .filter(category=keeper)
+            .annotate(month=TruncMonth("date"))
+            .values("group_id", "month")
+            .annotate(total=Sum("amount"), entry_count=Count("id"))
+        )
+        extras.delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('budget', '0013_updated_at'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicate_categories, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='goal',
+            index=models.Index(fields=['group', 'created_at'], name='goal_group_created_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='category',
+            constraint=models.UniqueConstraint(fields=('group', 'name'), name='unique_category_name_per_group'),
+        ),
+    ]
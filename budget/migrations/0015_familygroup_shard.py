@@ -0,0 +1,44 @@
+# Generated by Django 5.2.8 on 2026-10-17 23:48
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('budget', '0014_category_goal_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='familygroup',
+            name='shard',
+            field=models.CharField(blank=True, default='', max_length=64),
+        ),
+        migrations.AlterField(
+            model_name='category',
+            name='group',
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.CASCADE, related_name='categories', to='budget.familygroup'),
+        ),
+        migrations.AlterField(
+            model_name='expense',
+            name='group',
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.CASCADE, related_name='expenses', to='budget.familygroup'),
+        ),
+        migrations.AlterField(
+            model_name='expense',
+            name='profile',
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.CASCADE, related_name='ledger_entries', to='budget.profile'),
+        ),
+        migrations.AlterField(
+            model_name='goal',
+            name='group',
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.CASCADE, related_name='goals', to='budget.familygroup'),
+        ),
+        migrations.AlterField(
+            model_name='monthlycategorytotal',
+            name='group',
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.CASCADE, related_name='monthly_totals', to='budget.familygroup'),
+        ),
+    ]
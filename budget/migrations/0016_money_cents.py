@@ -0,0 +1,82 @@
+from decimal import ROUND_HALF_UP, Decimal
+
+import budget.money
+from django.db import migrations, models
+
+# (model, field, max_digits, extra field options)
+MONEY_FIELDS = [
+    ("profile", "income", 12, {"default": 0}),
+    ("profile", "expenses", 12, {"default": 0}),
+    ("category", "budget_limit", 10, {"null": True, "blank": True}),
+    ("goal", "target_amount", 10, {}),
+    ("expense", "amount", 12, {}),
+    ("monthlycategorytotal", "total", 14, {"default": 0}),
+]
+
+CENT = Decimal("0.01")
+
+
+def _copy(apps, schema_editor, convert, source, target):
+    db = schema_editor.connection.alias
+    for model_name, name, _digits, _options in MONEY_FIELDS:
+        model = apps.get_model("budget", model_name)
+        src, dst = source.format(name), target.format(name)
+        batch = []
+        for row in model.objects.using(db).only("pk", src).iterator(chunk_size=2000):
+            value = getattr(row, src)
+            setattr(row, dst, None if value is None else convert(value))
+            batch.append(row)
+            if len(batch) == 2000:
+                model.objects.using(db).bulk_update(batch, [dst])
+                batch = []
+        model.objects.using(db).bulk_update(batch, [dst])
+
+
+def decimals_to_cents(apps, schema_editor):
+    _copy(
+        apps, schema_editor,
+        lambda value: int(Decimal(value).quantize(CENT, rounding=ROUND_HALF_UP).scaleb(2)),
+        "{}", "{}_cents",
+    )
+
+
+def cents_to_decimals(apps, schema_editor):
+    _copy(apps, schema_editor, lambda cents: Decimal(cents).scaleb(-2), "{}_cents", "{}")
+
+
+def _decimal(digits, options, **overrides):
+    return models.DecimalField(decimal_places=2, max_digits=digits, **{**options, **overrides})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('budget', '0015_familygroup_shard'),
+    ]
+
+    operations = [
+        # Free the old columns so either direction can leave them empty for a moment.
+        *(
+            migrations.AlterField(model, name, _decimal(digits, options, null=True))
+            for model, name, digits, options in MONEY_FIELDS
+        ),
+        *(
+            migrations.AddField(model, f"{name}_cents", models.BigIntegerField(null=True))
+            for model, name, _digits, _options in MONEY_FIELDS
+        ),
+        migrations.RunPython(decimals_to_cents, cents_to_decimals),
+        *(
+            migrations.RemoveField(model, name)
+            for model, name, _digits, _options in MONEY_FIELDS
+        ),
+        *(
+            migrations.RenameField(model, f"{name}_cents", name)
+            for model, name, _digits, _options in MONEY_FIELDS
+        ),
+        *(
+            migrations.AlterField(
+                model, name, budget.money.MoneyField(max_digits=digits, **options)
+            )
+            for model, name, digits, options in MONEY_FIELDS
+        ),
+    ]
@@ -0,0 +1,50 @@
+# Generated by Django 5.2.8 on 2026-10-18 00:08
+
+import budget.money
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+
+def fill_group_totals(apps, schema_editor):
+    FamilyGroup = apps.get_model("budget", "FamilyGroup")
+    Profile = apps.get_model("budget", "Profile")
+    db = schema_editor.connection.alias
+    members = Profile.objects.filter(group=OuterRef("pk")).order_by().values("group")
+
+    def summed(aggregate):
+        subquery = Subquery(members.annotate(value=aggregate).values("value"))
+        # Money columns hold cents, so plain integer arithmetic is exact here.
+        return Coalesce(subquery, Value(0), output_field=models.BigIntegerField())
+
+    FamilyGroup.objects.using(db).update(
+        total_income=summed(Sum("income")),
+        total_expenses=summed(Sum("expenses")),
+        member_count=summed(Count("pk")),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('budget', '0016_money_cents'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='familygroup',
+            name='member_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='familygroup',
+            name='total_expenses',
+            field=budget.money.MoneyField(default=0, max_digits=14),
+        ),
+        migrations.AddField(
+            model_name='familygroup',
+            name='total_income',
+            field=budget.money.MoneyField(default=0, max_digits=14),
+        ),
+        migrations.RunPython(fill_group_totals, migrations.RunPython.noop),
+    ]
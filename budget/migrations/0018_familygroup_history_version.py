@@ -0,0 +1,18 @@
+# Generated by Django 5.2.8 on 2026-10-18 00:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('budget', '0017_group_totals'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='familygroup',
+            name='history_version',
+            field=models.PositiveIntegerField(default=1),
+        ),
+    ]
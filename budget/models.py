@@ -1,12 +1,46 @@
-from django.db import models
+from contextlib import contextmanager
+
+from django.db import connections, models, router, transaction
 from django.contrib.auth.models import User
-from django.db.models.signals import post_save
+from django.db.models.deletion import Collector
+from django.db.models.functions import TruncMonth
+from django.db.models.signals import post_delete, post_save, pre_delete
 from django.dispatch import receiver
+from django.utils import timezone
+
+from . import sharding
+from .money import MoneyField, money_value
+
+
+def month_start(day):
+    return day.replace(day=1)
+
 
 class FamilyGroup(models.Model):
     name = models.CharField(max_length=255)
     code = models.CharField(max_length=12, unique=True)
     owner = models.ForeignKey(User, on_delete=models.CASCADE, related_name="owned_groups")
+    # Bumped whenever anything shown on the group pages changes; cache keys
+    # for group data include it so stale entries are simply never read again.
+    version = models.PositiveIntegerField(default=1)
+    # Bumped only when data for months that are already over changes (backdated
+    # expenses, renamed or deleted categories), so results about closed months
+    # can be cached for good under it.
+    history_version = models.PositiveIntegerField(default=1)
+    # Database alias holding this group's household data when it was moved off
+    # its hashed shard; empty means "wherever the hash ring puts it".
+    shard = models.CharField(max_length=64, blank=True, default="")
+    # Sums over the members' profiles, kept up to date on every membership or
+    # income/expenses change (see shift_group_totals) so household summaries
+    # are read from this row. recompute_group_totals repairs them.
+    total_income = MoneyField(max_digits=14, default=0)
+    total_expenses = MoneyField(max_digits=14, default=0)
+    member_count = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    @property
+    def net_savings(self):
+        return self.total_income - self.total_expenses
 
     def members_qs(self):
         return Profile.objects.filter(group=self)
@@ -17,45 +51,210 @@ class FamilyGroup(models.Model):
     def __str__(self):
         return self.name
 
-class ProfileManager(models.Manager):
-    def get(self, *args, **kwargs):
 
-        try:
-            return super().get(*args, **kwargs)
-        except self.model.DoesNotExist:
-            user = kwargs.get("user")
-            if isinstance(user, User):
-                return self.create(user=user)
-            raise
+def bump_group_version(*group_ids):
+    group_ids = {group_id for group_id in group_ids if group_id}
+    if group_ids:
+        FamilyGroup.objects.filter(pk__in=group_ids).update(
+            version=models.F("version") + 1,
+            updated_at=timezone.now(),
+        )
+
+
+def bump_history_version(*group_ids):
+    group_ids = {group_id for group_id in group_ids if group_id}
+    if group_ids:
+        FamilyGroup.objects.filter(pk__in=group_ids).update(
+            history_version=models.F("history_version") + 1,
+        )
+
+
+def shift_group_totals(profiles, sign):
+    """
+    Adds (sign=1) or takes away (sign=-1) the stored income, expenses and head
+    count of `profiles`, a Profile queryset, to or from the totals of the groups
+    they are in, with one UPDATE. The amounts come from the rows themselves,
+    never from possibly stale instances.
+    """
+    members = profiles.filter(group=models.OuterRef("pk")).order_by().values("group")
+
+    def summed(aggregate):
+        return models.Subquery(members.annotate(value=aggregate).values("value"))
+
+    FamilyGroup.objects.filter(pk__in=profiles.values("group")).update(
+        total_income=models.F("total_income") + sign * summed(models.Sum("income")),
+        total_expenses=models.F("total_expenses") + sign * summed(models.Sum("expenses")),
+        member_count=models.F("member_count") + sign * summed(models.Count("pk")),
+    )
+
+
+@contextmanager
+def tracking_group_totals(profiles):
+    """
+    Takes `profiles` (filter them by pk) out of their groups' totals, runs the
+    block and adds them back to whatever groups they are in afterwards.
+    """
+    with transaction.atomic():
+        shift_group_totals(profiles, -1)
+        yield
+        shift_group_totals(profiles, 1)
+
+
+def adjust_group_totals(group_id, income=0, expenses=0, members=0, bump_version=False):
+    """
+    Applies known changes to one group's totals with a single UPDATE, bumping
+    its cache version in the same statement if asked to.
+    """
+    values = {}
+    if income:
+        values["total_income"] = models.F("total_income") + money_value(income)
+    if expenses:
+        values["total_expenses"] = models.F("total_expenses") + money_value(expenses)
+    if members:
+        values["member_count"] = models.F("member_count") + members
+    if bump_version:
+        values.update(version=models.F("version") + 1, updated_at=timezone.now())
+    if group_id and values:
+        FamilyGroup.objects.filter(pk=group_id).update(**values)
+
+
+def move_group_totals(old, new):
+    """
+    Moves a member from `old` to `new`, both (group_id, income, expenses), in
+    the group totals: a delta when the group is the same, otherwise out of the
+    old group and into the new one.
+    """
+    old_group, old_income, old_expenses = old
+    new_group, new_income, new_expenses = new
+    if old_group == new_group:
+        adjust_group_totals(
+            new_group, income=new_income - old_income, expenses=new_expenses - old_expenses
+        )
+    else:
+        adjust_group_totals(old_group, -old_income, -old_expenses, -1)
+        adjust_group_totals(new_group, new_income, new_expenses, 1)
+
+
+def is_current_month(day):
+    return month_start(day) == month_start(timezone.localdate())
+
+
+def add_profile_expenses(group_id, amounts):
+    """
+    Adds `amounts`, a {profile pk: amount} dict of this month's spending, to
+    the monthly expenses of those profiles that are still in the group, with
+    F(), and the sum of it to the group's total in one more UPDATE.
+    """
+    now = timezone.now()
+    added = 0
+    with transaction.atomic():
+        for pk, amount in amounts.items():
+            if amount and Profile.objects.filter(pk=pk, group_id=group_id).update(
+                expenses=models.F("expenses") + money_value(amount), updated_at=now
+            ):
+                added += amount
+        adjust_group_totals(group_id, expenses=added)
+
+
+TOTAL_FIELDS = frozenset({"group", "income", "expenses"})
 
 
 class Profile(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE)
-    income = models.DecimalField(max_digits=12, decimal_places=2, default=0)
-    expenses = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    income = MoneyField(max_digits=12, default=0)
+    expenses = MoneyField(max_digits=12, default=0)
     group = models.ForeignKey(FamilyGroup, on_delete=models.SET_NULL, null=True, blank=True)
     nickname = models.CharField(max_length=50, blank=True, default="") 
     is_admin = models.BooleanField(default=False)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_group_id = instance.__dict__.get("group_id")
+        if {"group_id", "income", "expenses"}.issubset(instance.__dict__):
+            instance._loaded_totals = instance._totals()
+        return instance
 
-    objects = ProfileManager()
+    def _totals(self):
+        return (self.group_id, self.income, self.expenses)
+
+    def stored_totals(self):
+        """(group_id, income, expenses) as last loaded from or saved to the database."""
+        loaded = getattr(self, "_loaded_totals", None)
+        if loaded is None:
+            loaded = Profile.objects.filter(pk=self.pk).values_list(
+                "group_id", "income", "expenses"
+            ).get()
+        return loaded
+
+    def set_stored_totals(self, income, expenses):
+        """Records income and expenses written with update() on this instance."""
+        self.income, self.expenses = income, expenses
+        self._loaded_totals = (self.stored_totals()[0], income, expenses)
+
+    def save(self, *args, update_fields=None, **kwargs):
+        fields = TOTAL_FIELDS.intersection(
+            TOTAL_FIELDS if update_fields is None else update_fields
+        )
+        if not fields:
+            return super().save(*args, update_fields=update_fields, **kwargs)
+
+        loaded = (None, 0, 0) if self._state.adding else getattr(self, "_loaded_totals", None)
+        if loaded is None:
+            # Not loaded from the database: take the stored values from the row.
+            with tracking_group_totals(Profile.objects.filter(pk=self.pk)):
+                super().save(*args, update_fields=update_fields, **kwargs)
+            if update_fields is None:
+                self._loaded_totals = self._totals()
+            return
+
+        current = self._totals()
+        saved = tuple(
+            value if name in fields else stored
+            for name, value, stored in zip(("group", "income", "expenses"), current, loaded)
+        )
+        if saved == loaded:
+            super().save(*args, update_fields=update_fields, **kwargs)
+        else:
+            with transaction.atomic():
+                super().save(*args, update_fields=update_fields, **kwargs)
+                move_group_totals(loaded, saved)
+        self._loaded_totals = saved
 
     def __str__(self):
         return self.nickname or self.user.username
 
+
+@receiver(post_save, sender=User)
+def create_profile_for_new_user(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        Profile.objects.create(user=instance)
+
 class Category(models.Model):
     group = models.ForeignKey(
         FamilyGroup,
         on_delete=models.CASCADE,
         related_name="categories",
+        db_constraint=False,
     )
     name = models.CharField(max_length=100)
  
-    budget_limit = models.DecimalField(
+    budget_limit = MoneyField(
         max_digits=10,
-        decimal_places=2,
         null=True,
         blank=True,
     )
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            # Also serves filter(group=...).order_by("name").
+            models.UniqueConstraint(
+                fields=["group", "name"],
+                name="unique_category_name_per_group",
+            ),
+        ]
 
     def __str__(self):
         return f"{self.name} ({self.group.name})"
@@ -64,12 +263,296 @@ class Goal(models.Model):
         FamilyGroup,
         on_delete=models.CASCADE,
         related_name="goals",
+        db_constraint=False,
     )
     name = models.CharField(max_length=100)
-    target_amount = models.DecimalField(max_digits=10, decimal_places=2)
+    target_amount = MoneyField(max_digits=10)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["group", "created_at"], name="goal_group_created_idx"),
+        ]
 
     def __str__(self):
         return f"{self.name} ({self.group.name})"
 
 
+ROLLUP_FIELDS = frozenset({"group_id", "category_id", "date", "amount"})
+
+
+class Expense(models.Model):
+    profile = models.ForeignKey(
+        Profile,
+        on_delete=models.CASCADE,
+        related_name="ledger_entries",
+        db_constraint=False,
+    )
+    group = models.ForeignKey(
+        FamilyGroup,
+        on_delete=models.CASCADE,
+        related_name="expenses",
+        db_constraint=False,
+    )
+    category = models.ForeignKey(
+        Category,
+        on_delete=models.CASCADE,
+        related_name="expenses",
+    )
+    amount = MoneyField(max_digits=12)
+    date = models.DateField(default=timezone.localdate)
+    note = models.CharField(max_length=255, blank=True, default="")
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["group", "date"], name="expense_group_date_idx"),
+            models.Index(
+                fields=["group", "category", "date"],
+                name="expense_group_cat_date_idx",
+            ),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember which monthly bucket currently holds this row so an update
+        # or delete takes the amount out of the right (category, month) total.
+        if ROLLUP_FIELDS.issubset(field_names):
+            instance._stored_rollup = (instance.rollup_key(), instance.amount)
+        return instance
+
+    def rollup_key(self):
+        return (self.group_id, self.category_id, month_start(self.date))
+
+    def stored_rollup(self):
+        return getattr(self, "_stored_rollup", None)
+
+    def __str__(self):
+        return f"{self.amount} on {self.date}"
+
+
+class MonthlyCategoryTotalManager(models.Manager):
+    # Five parameters per row keeps each statement well under SQLite's
+    # host-parameter limit.
+    UPSERT_BATCH_SIZE = 500
+
+    def apply_deltas(self, deltas, using=None):
+        """
+        deltas maps (group_id, category_id, month) -> (amount, entry_count).
+
+        Positive buckets are upserted with multi-row INSERT ... ON CONFLICT
+        statements; negative ones only ever shrink an existing row (a missing
+        row means the category itself is being deleted, so there is nothing
+        left to adjust).
+        """
+        using = using or router.db_for_write(self.model)
+        inserts = []
+        for (group_id, category_id, month), (amount, count) in deltas.items():
+            if not amount and not count:
+                continue
+            if amount >= 0 and count >= 0:
+                inserts.append((group_id, category_id, month, amount, count))
+            else:
+                self.using(using).filter(
+                    group_id=group_id, category_id=category_id, month=month
+                ).update(
+                    total=models.F("total") + money_value(amount),
+                    entry_count=models.F("entry_count") + count,
+                )
+
+        connection = connections[using]
+        for start in range(0, len(inserts), self.UPSERT_BATCH_SIZE):
+            self._upsert(inserts[start:start + self.UPSERT_BATCH_SIZE], connection)
+
+        this_month = month_start(timezone.localdate())
+        bump_history_version(*{key[0] for key in deltas if key[2] < this_month})
+
+    def _upsert(self, rows, connection):
+        opts = self.model._meta
+        table = connection.ops.quote_name(opts.db_table)
+        total_field = opts.get_field("total")
+        month_field = opts.get_field("month")
+
+        placeholders = ", ".join(["(%s, %s, %s, %s, %s)"] * len(rows))
+        params = []
+        for group_id, category_id, month, amount, count in rows:
+            params.extend([
+                group_id,
+                category_id,
+                month_field.get_db_prep_save(month, connection),
+                total_field.get_db_prep_save(amount, connection),
+                count,
+            ])
+
+        sql = (
+            f"INSERT INTO {table} (group_id, category_id, month, total, entry_count) "
+            f"VALUES {placeholders} "
+            f"ON CONFLICT (group_id, category_id, month) DO UPDATE SET "
+            f"total = {table}.total + excluded.total, "
+            f"entry_count = {table}.entry_count + excluded.entry_count"
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+
+
+class MonthlyCategoryTotal(models.Model):
+    group = models.ForeignKey(
+        FamilyGroup,
+        on_delete=models.CASCADE,
+        related_name="monthly_totals",
+        db_constraint=False,
+    )
+    category = models.ForeignKey(
+        Category,
+        on_delete=models.CASCADE,
+        related_name="monthly_totals",
+    )
+    month = models.DateField()
+    total = MoneyField(max_digits=14, default=0)
+    entry_count = models.PositiveIntegerField(default=0)
+
+    objects = MonthlyCategoryTotalManager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["group", "category", "month"],
+                name="unique_monthly_category_total",
+            ),
+        ]
+        indexes = [
+            models.Index(fields=["group", "month"], name="monthly_total_group_month_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.category.name} {self.month:%Y-%m}: {self.total}"
+
+
+def _add_delta(deltas, key, amount, count):
+    current_amount, current_count = deltas.get(key, (0, 0))
+    deltas[key] = (current_amount + amount, current_count + count)
+
+
+def expense_rollup_deltas(expenses):
+    deltas = {}
+    for expense in expenses:
+        _add_delta(deltas, expense.rollup_key(), expense.amount, 1)
+    return deltas
+
+
+@receiver(post_save, sender=Expense)
+def update_rollup_on_expense_save(sender, instance, created, using, **kwargs):
+    deltas = {}
+    _add_delta(deltas, instance.rollup_key(), instance.amount, 1)
+
+    stored = instance.stored_rollup()
+    if not created and stored is not None:
+        key, amount = stored
+        _add_delta(deltas, key, -amount, -1)
+
+    MonthlyCategoryTotal.objects.apply_deltas(deltas, using=using)
+    instance._stored_rollup = (instance.rollup_key(), instance.amount)
+    bump_group_version(*{key[0] for key in deltas})
+
+
+@receiver(post_delete, sender=Expense)
+def update_rollup_on_expense_delete(sender, instance, using, origin=None, **kwargs):
+    # Deleting a category or group cascades to its rollup rows as well, and a
+    # deleted member's expenses come off the rollup in one go beforehand.
+    if getattr(origin, "model", type(origin)) in (Category, FamilyGroup, Profile, User):
+        return
+    key, amount = instance.stored_rollup() or (instance.rollup_key(), instance.amount)
+    deltas = {}
+    _add_delta(deltas, key, -amount, -1)
+    MonthlyCategoryTotal.objects.apply_deltas(deltas, using=using)
+    bump_group_version(key[0])
+
+
+MEMBER_FIELDS = frozenset({"group", "nickname", "income", "expenses", "is_admin"})
+
+
+@receiver(post_save, sender=Profile)
+def bump_version_on_profile_save(sender, instance, update_fields=None, **kwargs):
+    if update_fields is not None and not MEMBER_FIELDS.intersection(update_fields):
+        return
+    bump_group_version(instance.group_id, getattr(instance, "_loaded_group_id", None))
+    instance._loaded_group_id = instance.group_id
+
+
+@receiver(pre_delete, sender=Profile)
+def remove_profile_from_group_totals(sender, instance, using, **kwargs):
+    adjust_group_totals(instance.group_id, -instance.income, -instance.expenses, -1)
+
+
+@receiver(post_delete, sender=Profile)
+def bump_version_on_profile_delete(sender, instance, **kwargs):
+    bump_group_version(instance.group_id)
+
+
+@receiver(post_save, sender=FamilyGroup)
+def bump_version_on_group_save(sender, instance, created, **kwargs):
+    if not created:
+        bump_group_version(instance.pk)
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+@receiver(post_save, sender=Goal)
+@receiver(post_delete, sender=Goal)
+def bump_version_on_group_item_change(sender, instance, **kwargs):
+    bump_group_version(instance.group_id)
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def bump_history_on_category_change(sender, instance, created=False, **kwargs):
+    # Past-month results name the categories and drop deleted ones.
+    if not created:
+        bump_history_version(instance.group_id)
+
+
+# With household data on separate shards the ORM cascade only sees the
+# directory database, so shard rows are removed here first.
+@receiver(pre_delete, sender=FamilyGroup)
+def delete_group_data_on_shard(sender, instance, using, **kwargs):
+    if not sharding.is_sharded() or using != sharding.DIRECTORY:
+        return
+    shard = sharding.shard_for_group(instance)
+    # Categories cascade to their expenses and monthly totals.
+    Category.objects.using(shard).filter(group=instance).delete()
+    Goal.objects.using(shard).filter(group=instance).delete()
+
+
+@receiver(pre_delete, sender=Profile)
+def delete_profile_expenses(sender, instance, using, **kwargs):
+    """
+    Takes a deleted member's expenses off the monthly rollup with one grouped
+    query per database instead of once per row, then (when sharded) deletes
+    them on the shards, which the ORM cascade doesn't reach.
+    """
+    if sharding.is_sharded() and using == sharding.DIRECTORY:
+        aliases = sharding.shard_aliases()
+    else:
+        aliases = (using,)
+    for alias in aliases:
+        expenses = Expense.objects.using(alias).filter(profile_id=instance.pk)
+        buckets = (
+            expenses.order_by()
+            .values("group_id", "category_id", month=TruncMonth("date"))
+            .annotate(amount=models.Sum("amount"), count=models.Count("pk"))
+        )
+        deltas = {
+            (row["group_id"], row["category_id"], row["month"]): (-row["amount"], -row["count"])
+            for row in buckets
+        }
+        if not deltas:
+            continue
+        MonthlyCategoryTotal.objects.apply_deltas(deltas, using=alias)
+        bump_group_version(*{key[0] for key in deltas})
+        if alias != using:
+            # A member's expenses stay with the groups they were recorded for.
+            collector = Collector(using=alias, origin=instance)
+            collector.collect(expenses)
+            collector.delete()
@@ -0,0 +1,110 @@
+"""
+Money stored as integer cents.
+
+MoneyField is a BigIntegerField in the database, so SUMs and F() arithmetic
+are exact integer math, while Python code keeps working with Money, a Decimal
+with two places: templates, forms, JSON and comparisons with Decimal behave as
+they did when these columns were DecimalFields.
+"""
+from decimal import ROUND_HALF_UP, Decimal, InvalidOperation
+
+from django import forms
+from django.core import validators
+from django.core.exceptions import ValidationError
+from django.db import models
+from django.utils.functional import cached_property
+from django.utils.translation import gettext_lazy as _
+
+CENT = Decimal("0.01")
+
+
+class Money(Decimal):
+    """A Decimal rounded to cents. Arithmetic results are plain Decimals."""
+
+    def __new__(cls, value="0", context=None):
+        if isinstance(value, float):
+            value = repr(value)
+        return super().__new__(
+            cls, Decimal(value).quantize(CENT, rounding=ROUND_HALF_UP), context
+        )
+
+    @classmethod
+    def from_cents(cls, cents):
+        return cls(Decimal(cents).scaleb(-2))
+
+    @property
+    def cents(self):
+        return int(self.scaleb(2))
+
+    def __repr__(self):
+        return f"Money('{self}')"
+
+
+def to_cents(value):
+    return value.cents if isinstance(value, Money) else Money(value).cents
+
+
+def money_value(amount):
+    """An expression for `amount` to combine with MoneyField columns in F() math."""
+    return models.Value(Money(amount), output_field=MoneyField())
+
+
+class MoneyFormField(forms.DecimalField):
+    """DecimalField with two places that cleans to Money."""
+
+    def __init__(self, *, max_digits=None, decimal_places=2, **kwargs):
+        super().__init__(max_digits=max_digits, decimal_places=decimal_places, **kwargs)
+
+    def clean(self, value):
+        # Validate the typed value first so "10.555" is rejected, not rounded.
+        value = super().clean(value)
+        return None if value is None else Money(value)
+
+
+class MoneyField(models.BigIntegerField):
+    description = _("Amount of money stored as integer cents")
+    default_error_messages = {
+        "invalid": _("“%(value)s” value must be a decimal number."),
+    }
+
+    def __init__(self, *args, max_digits=None, **kwargs):
+        self.max_digits = max_digits
+        super().__init__(*args, **kwargs)
+
+    def deconstruct(self):
+        name, path, args, kwargs = super().deconstruct()
+        if self.max_digits is not None:
+            kwargs["max_digits"] = self.max_digits
+        return name, path, args, kwargs
+
+    @cached_property
+    def validators(self):
+        # The same digit limits the DecimalField columns had, in currency units.
+        extra = [validators.DecimalValidator(self.max_digits, 2)] if self.max_digits else []
+        return [*super().validators, *extra]
+
+    def from_db_value(self, value, expression, connection):
+        return None if value is None else Money.from_cents(value)
+
+    def to_python(self, value):
+        if value is None or isinstance(value, Money):
+            return value
+        try:
+            return Money(value)
+        except (InvalidOperation, TypeError, ValueError):
+            raise ValidationError(
+                self.error_messages["invalid"],
+                code="invalid",
+                params={"value": value},
+            )
+
+    def get_prep_value(self, value):
+        value = models.Field.get_prep_value(self, value)
+        return None if value is None else to_cents(value)
+
+    def formfield(self, **kwargs):
+        return models.Field.formfield(self, **{
+            "form_class": MoneyFormField,
+            "max_digits": self.max_digits,
+            **kwargs,
+        })
@@ -0,0 +1,212 @@
+"""
+Storage and summaries for request profiles captured by
+mysite.middleware.ProfilingMiddleware.
+
+Each profiled request leaves two files in PROFILING["DIR"]:
+<stamp>-<view>.prof (a pstats dump) and <stamp>-<view>.collapsed.txt
+(sampled stacks, one "frame;frame;frame count" line per stack, the input
+format of flamegraph.pl and speedscope).
+"""
+import asyncio
+import contextvars
+import cProfile
+import os
+import pstats
+import re
+import sys
+import threading
+import time
+import uuid
+from pathlib import Path
+
+from django.conf import settings
+
+DEFAULTS = {
+    "ENABLED": True,
+    "SAMPLE_RATE": 0.0,
+    "HEADER": "X-Budget-Profile",
+    "QUERY_PARAM": "_profile",
+    "DIR": None,
+    "STACK_INTERVAL": 0.001,
+}
+
+
+_following = contextvars.ContextVar("budget_thread_profiler", default=None)
+
+
+def profiling_settings():
+    config = {**DEFAULTS, **getattr(settings, "PROFILING", {})}
+    if not config["DIR"]:
+        config["DIR"] = Path(settings.BASE_DIR) / "profiles"
+    return config
+
+
+def profile_dir():
+    return Path(profiling_settings()["DIR"])
+
+
+def _slug(view_name):
+    return re.sub(r"[^A-Za-z0-9_.-]+", "_", view_name or "unresolved")
+
+
+def save_profile(profiler, sampler, view_name):
+    """Write the pstats dump and collapsed stacks; returns the .prof path."""
+    directory = profile_dir()
+    directory.mkdir(parents=True, exist_ok=True)
+    stem = "{}-{}-{}".format(
+        time.strftime("%Y%m%dT%H%M%S"), _slug(view_name), uuid.uuid4().hex[:8]
+    )
+    prof_path = directory / f"{stem}.prof"
+    profiler.dump_stats(prof_path)
+    (directory / f"{stem}.collapsed.txt").write_text(sampler.collapsed())
+    return prof_path
+
+
+def _frame(func):
+    filename, line, name = func
+    if filename == "~":
+        return name
+    return f"{os.path.basename(filename)}:{name}:{line}"
+
+
+class ThreadProfiler:
+    """
+    cProfile for the calling thread and for the event loop that async_to_sync
+    starts in a new thread to run an async view, where a profile of only the
+    request thread would stop.
+
+    While enabled, new threads get a cheap hook that waits for code running in
+    this profiler's context (asgiref copies the request's contextvars into its
+    loop) and then profiles that asyncio task until it is done. In any other
+    thread the hook removes itself at its first event after disable(), so
+    pooled threads are never left profiled.
+    """
+
+    def __init__(self):
+        self._profiles = []
+        self._lock = threading.Lock()
+        self._main = None
+        self._enabled = False
+        self._token = None
+
+    def _new_profile(self):
+        profile = cProfile.Profile()
+        with self._lock:
+            self._profiles.append(profile)
+        return profile
+
+    def _follow(self, frame, event, arg):
+        if not self._enabled:
+            sys.setprofile(None)
+        elif _following.get() is self:
+            sys.setprofile(None)
+            self._profile_task()
+
+    def _profile_task(self):
+        try:
+            task = asyncio.current_task()
+        except RuntimeError:
+            task = None
+        if task is None:
+            # A worker thread running sync code for the request; that code
+            # shows up under the request thread's profile as the wait.
+            return
+        profile = self._new_profile()
+        profile.enable()
+        # Done callbacks run on the loop's thread, the one thread that may
+        # turn this profile off again.
+        task.add_done_callback(lambda task: profile.disable())
+
+    def enable(self):
+        self._main = self._new_profile()
+        self._enabled = True
+        self._token = _following.set(self)
+        threading.setprofile(self._follow)
+        self._main.enable()
+
+    def disable(self):
+        self._main.disable()
+        threading.setprofile(None)
+        self._enabled = False
+        _following.reset(self._token)
+
+    def dump_stats(self, path):
+        with self._lock:
+            profiles = list(self._profiles)
+        for profile in profiles:
+            profile.create_stats()
+        # pstats refuses profiles without data (a thread that recorded nothing).
+        stats = pstats.Stats(self._main)
+        for profile in profiles:
+            if profile is not self._main and profile.stats:
+                stats.add(profile)
+        stats.dump_stats(path)
+
+
+class StackSampler:
+    """
+    Samples the calling thread's Python stack every `interval` seconds from a
+    background thread, counting identical stacks. cProfile only records one
+    level of callers; these samples keep whole stacks for flame graphs.
+    Stacks are cut at `base`, by default the frame that started the sampler.
+    """
+
+    def __init__(self, interval=0.001):
+        self.interval = interval
+        self.counts = {}
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self, base=None):
+        self._thread_id = threading.get_ident()
+        self._base = base or sys._getframe(1)
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self._sample()
+
+    def _sample(self):
+        frame = sys._current_frames().get(self._thread_id)
+        frames = []
+        while frame is not None and frame is not self._base:
+            code = frame.f_code
+            frames.append(
+                f"{os.path.basename(code.co_filename)}:{code.co_name}:{code.co_firstlineno}"
+            )
+            frame = frame.f_back
+        if frames:
+            stack = ";".join(reversed(frames))
+            self.counts[stack] = self.counts.get(stack, 0) + 1
+
+    def collapsed(self):
+        return "".join(f"{stack} {count}\n" for stack, count in sorted(self.counts.items()))
+
+
+def list_profiles(view=None):
+    directory = profile_dir()
+    if not directory.is_dir():
+        return []
+    pattern = f"*-{_slug(view)}-*.prof" if view else "*.prof"
+    return sorted(directory.glob(pattern))
+
+
+def summarize(paths, limit=25, sort="cumulative"):
+    """Top functions across the given profiles as a list of dicts."""
+    stats = pstats.Stats(*(str(path) for path in paths))
+    rows = []
+    for func, (cc, nc, tottime, cumtime, _callers) in stats.stats.items():
+        rows.append({
+            "function": _frame(func),
+            "calls": nc,
+            "tottime": tottime,
+            "cumtime": cumtime,
+        })
+    key = "cumtime" if sort == "cumulative" else "tottime"
+    rows.sort(key=lambda row: row[key], reverse=True)
+    return rows[:limit]
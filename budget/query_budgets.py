@@ -0,0 +1,29 @@
+"""
+Maximum number of SQL queries each budget page may run for a logged-in group
+owner on a cold cache, counting the session and auth lookups. The counts must
+not depend on how many members, categories, goals or expenses a group has;
+budget/tests/test_query_budgets.py enforces both rules at 1x, 10x and 100x
+data sizes.
+"""
+
+# url name -> query budget
+QUERY_BUDGETS = {
+    # session, user, profile + group + owner, this month's totals
+    "budget_dashboard": 4,
+    # ... members, categories, goals
+    "group_members": 6,
+    # ... member list
+    "group_manage_members": 4,
+    # ... categories
+    "category_manage": 4,
+    # ... goals
+    "goal_manage": 4,
+    # ... categories for the per-category expense inputs
+    "profile_edit": 4,
+    # ... months with data, totals for the selected month
+    "expense_history": 5,
+    # ... one grouped budget-vs-actual query
+    "budget_overview": 4,
+    # ... members, categories, goals, expenses (streamed)
+    "group_export": 7,
+}
@@ -0,0 +1,142 @@
+"""
+Read/write splitting for the budget app.
+
+With settings.BUDGET_READ_REPLICA naming a database alias, reads of budget
+models go to that replica and every write goes to the primary ("default").
+Once something has been written, and inside transactions, reads stay on the
+primary for the rest of that request (read-your-own-writes);
+ReplicaPinningMiddleware carries this over to the same browser's next requests
+for REPLICA_PIN_SECONDS via a cookie, which covers the redirect-after-POST page
+and replication lag.
+"""
+import contextvars
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+PRIMARY = "default"
+PIN_COOKIE = "budget_primary"
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+WRITE_STATEMENTS = ("INSERT", "UPDATE", "DELETE", "REPLACE")
+
+_pinned = contextvars.ContextVar("budget_pinned_to_primary", default=False)
+_wrote = contextvars.ContextVar("budget_wrote_to_primary", default=False)
+
+
+def replica_alias():
+    return getattr(settings, "BUDGET_READ_REPLICA", None)
+
+
+def pin_to_primary():
+    _pinned.set(True)
+    _wrote.set(True)
+
+
+def is_pinned():
+    return _pinned.get()
+
+
+class ReplicaRouter:
+    app_labels = {"budget"}
+
+    def db_for_read(self, model, **hints):
+        if model._meta.app_label not in self.app_labels:
+            return None
+        replica = replica_alias()
+        if not replica or is_pinned() or connections[PRIMARY].in_atomic_block:
+            return PRIMARY
+        return replica
+
+    def db_for_write(self, model, **hints):
+        # Django also asks this when it merely builds or relates instances, so
+        # the pin is set by pin_on_write once a statement actually writes.
+        if model._meta.app_label not in self.app_labels:
+            return None
+        return PRIMARY
+
+    def allow_relation(self, obj1, obj2, **hints):
+        aliases = {PRIMARY, replica_alias()}
+        if obj1._state.db in aliases and obj2._state.db in aliases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # The replica is a copy of the primary, schema included.
+        if replica_alias() and db == replica_alias():
+            return False
+        return None
+
+
+def pin_on_write(execute, sql, params, many, context):
+    """execute_wrapper on the primary that pins once budget tables are written."""
+    if sql.lstrip()[:7].upper().startswith(WRITE_STATEMENTS) and any(
+        f'"{label}_' in sql for label in ReplicaRouter.app_labels
+    ):
+        pin_to_primary()
+    return execute(sql, params, many, context)
+
+
+@receiver(connection_created)
+def watch_primary_writes(sender, connection, **kwargs):
+    # First in the list, so execute_wrapper() blocks opened before the
+    # connection was still pop their own wrapper on the way out.
+    if connection.alias == PRIMARY and pin_on_write not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, pin_on_write)
+
+
+class ReplicaPinningMiddleware:
+    """
+    Scopes the primary pin to one request. Requests that may write (anything
+    but GET/HEAD/OPTIONS) read from the primary throughout, as do requests from
+    a browser that wrote something within the last REPLICA_PIN_SECONDS. The
+    cookie is renewed whenever a request writes.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        tokens = self._start(request)
+        try:
+            return self._finish(self.get_response(request))
+        finally:
+            self._reset(tokens)
+
+    async def __acall__(self, request):
+        tokens = self._start(request)
+        try:
+            return self._finish(await self.get_response(request))
+        finally:
+            self._reset(tokens)
+
+    def _start(self, request):
+        return (
+            _pinned.set(PIN_COOKIE in request.COOKIES or request.method not in SAFE_METHODS),
+            _wrote.set(False),
+        )
+
+    def _finish(self, response):
+        if _wrote.get() and replica_alias():
+            response.set_cookie(
+                PIN_COOKIE,
+                "1",
+                max_age=getattr(settings, "REPLICA_PIN_SECONDS", 5),
+                httponly=True,
+                samesite="Lax",
+            )
+        return response
+
+    def _reset(self, tokens):
+        pinned, wrote = tokens
+        _pinned.reset(pinned)
+        _wrote.reset(wrote)
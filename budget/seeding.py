@@ -0,0 +1,185 @@
+import datetime
+import random
+import secrets
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from django.utils import timezone
+
+from . import sharding
+from .models import (
+    FamilyGroup,
+    Profile,
+    Category,
+    Goal,
+    Expense,
+    MonthlyCategoryTotal,
+    expense_rollup_deltas,
+)
+from .services import recompute_group_totals
+
+User = get_user_model()
+
+SEED_PASSWORD = "seed-password"
+
+CATEGORY_NAMES = [
+    "Groceries", "Rent", "Utilities", "Gas", "Dining Out", "Insurance",
+    "Phone", "Internet", "Clothing", "Medical", "Childcare", "Pets",
+    "Gifts", "Travel", "Entertainment", "Subscriptions", "Household",
+    "Car Repair", "Education", "Savings",
+]
+GOAL_NAMES = ["Vacation", "Emergency Fund", "New Car", "College", "Home Repair"]
+
+
+def seed_budget(
+    users=100,
+    group_size=4,
+    categories=8,
+    goals=2,
+    expenses_per_member=50,
+    months=12,
+    batch_size=1000,
+    seed=None,
+):
+    """
+    Generate users, family groups of group_size members, categories, goals
+    and an expense history spread over the last `months` months. Everything is
+    written with bulk_create, household data one transaction per shard; every
+    seeded user can log in with SEED_PASSWORD.
+    """
+    rng = random.Random(seed)
+    run = secrets.token_hex(2)
+    password = make_password(SEED_PASSWORD)
+    today = timezone.localdate()
+
+    with transaction.atomic():
+        User.objects.bulk_create(
+            [User(username=f"seed-{run}-{i}", password=password) for i in range(users)],
+            batch_size=batch_size,
+        )
+        seeded_users = list(
+            User.objects.filter(username__startswith=f"seed-{run}-").order_by("pk")
+        )
+
+        owners = seeded_users[::group_size]
+        FamilyGroup.objects.bulk_create(
+            [
+                FamilyGroup(name=f"Family {i}", code=f"S{run}{i}", owner=owner)
+                for i, owner in enumerate(owners)
+            ],
+            batch_size=batch_size,
+        )
+        groups = list(
+            FamilyGroup.objects.filter(code__startswith=f"S{run}").order_by("pk")
+        )
+
+        Profile.objects.bulk_create(
+            [
+                Profile(
+                    user=user,
+                    group=groups[i // group_size],
+                    nickname=f"Member {i}",
+                    income=Decimal(rng.randrange(2000, 9000)),
+                    expenses=Decimal(rng.randrange(500, 4000)),
+                )
+                for i, user in enumerate(seeded_users)
+            ],
+            batch_size=batch_size,
+        )
+        # bulk_create skips Profile.save, which keeps the group totals.
+        recompute_group_totals(FamilyGroup.objects.filter(code__startswith=f"S{run}"))
+
+    names = [
+        CATEGORY_NAMES[i] if i < len(CATEGORY_NAMES) else f"Category {i + 1}"
+        for i in range(categories)
+    ]
+    by_shard = {}
+    for group in groups:
+        by_shard.setdefault(sharding.shard_for_group(group), []).append(group)
+
+    written = 0
+    for db, shard_groups in by_shard.items():
+        with transaction.atomic(using=db):
+            written += _seed_household_data(
+                db, shard_groups, names, goals, expenses_per_member, months,
+                batch_size, rng, today,
+            )
+
+    return {
+        "users": len(seeded_users),
+        "groups": len(groups),
+        "categories": len(groups) * len(names),
+        "goals": len(groups) * goals,
+        "expenses": written,
+        "username_prefix": f"seed-{run}-",
+    }
+
+
+def _seed_household_data(
+    db, groups, names, goals, expenses_per_member, months, batch_size, rng, today
+):
+    """Categories, goals and expense history for groups that share shard `db`."""
+    Category.objects.using(db).bulk_create(
+        [
+            Category(
+                group=group,
+                name=name,
+                budget_limit=Decimal(rng.randrange(50, 1500)),
+            )
+            for group in groups
+            for name in names
+        ],
+        batch_size=batch_size,
+    )
+    Goal.objects.using(db).bulk_create(
+        [
+            Goal(
+                group=group,
+                name=GOAL_NAMES[i % len(GOAL_NAMES)],
+                target_amount=Decimal(rng.randrange(500, 20000)),
+            )
+            for group in groups
+            for i in range(goals)
+        ],
+        batch_size=batch_size,
+    )
+
+    category_ids = {}
+    for group_id, category_id in Category.objects.using(db).filter(
+        group__in=groups
+    ).values_list("group_id", "pk"):
+        category_ids.setdefault(group_id, []).append(category_id)
+
+    profiles = Profile.objects.filter(group__in=groups).values_list("pk", "group_id")
+    written = 0
+    batch = []
+    deltas = {}
+    for profile_id, group_id in profiles.iterator():
+        for _ in range(expenses_per_member if category_ids.get(group_id) else 0):
+            batch.append(
+                Expense(
+                    profile_id=profile_id,
+                    group_id=group_id,
+                    category_id=rng.choice(category_ids[group_id]),
+                    amount=Decimal(rng.randrange(100, 20000)) / 100,
+                    date=today - datetime.timedelta(days=rng.randrange(months * 30)),
+                )
+            )
+            if len(batch) >= batch_size:
+                written += _flush_expenses(db, batch, deltas, batch_size)
+                batch = []
+    written += _flush_expenses(db, batch, deltas, batch_size)
+    MonthlyCategoryTotal.objects.apply_deltas(deltas, using=db)
+    return written
+
+
+def _flush_expenses(db, batch, deltas, batch_size):
+    if not batch:
+        return 0
+    Expense.objects.using(db).bulk_create(batch, batch_size=batch_size)
+    for key, (amount, count) in expense_rollup_deltas(batch).items():
+        current_amount, current_count = deltas.get(key, (0, 0))
+        deltas[key] = (current_amount + amount, current_count + count)
+    return len(batch)
@@ -1,13 +1,58 @@
+import datetime
 from decimal import Decimal
+from asgiref.sync import sync_to_async
 from django.contrib.auth import get_user_model
-from .models import Profile, FamilyGroup
+from django.db import transaction
+from django.db.models import (
+    Count,
+    ExpressionWrapper,
+    F,
+    FilteredRelation,
+    OuterRef,
+    Q,
+    Subquery,
+    Sum,
+    Value,
+)
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from . import caching, metrics, sharding
+from .money import CENT, MoneyField, money_value
+from .models import (
+    Profile,
+    FamilyGroup,
+    Category,
+    Goal,
+    Expense,
+    MonthlyCategoryTotal,
+    add_profile_expenses,
+    adjust_group_totals,
+    bump_group_version,
+    expense_rollup_deltas,
+    is_current_month,
+    month_start,
+    tracking_group_totals,
+)
 
 User = get_user_model()
 
 
+PROFILE_RELATED = ("group", "group__owner")
+
+
 def get_profile(user):
-    profile, _ = Profile.objects.get_or_create(user=user)
-    return profile
+    # Profiles are created together with their User, so this is a plain read.
+    # Accounts older than that are fixed up by `manage.py backfill_profiles`.
+    return Profile.objects.select_related(*PROFILE_RELATED).get(user=user)
+
+
+async def aget_profile(user):
+    return await Profile.objects.select_related(*PROFILE_RELATED).aget(user=user)
+
+
+def is_group_owner(group, user):
+    return bool(group and group.owner_id == user.pk)
 
 
 def can_join_or_create_group(profile):
@@ -16,12 +61,15 @@ def can_join_or_create_group(profile):
 
 def attach_profile_to_group(profile, group):
     profile.group = group
-    profile.save(update_fields=["group"])
+    profile.is_admin = False
+    profile.save(update_fields=["group", "is_admin", "updated_at"])
+    metrics.GROUP_JOINS.inc()
 
 
 def remove_profile_from_group(profile):
     profile.group = None
-    profile.save(update_fields=["group"])
+    profile.is_admin = False
+    profile.save(update_fields=["group", "is_admin", "updated_at"])
 
 
 def add_user_to_group_by_username(username, group):
@@ -36,6 +84,169 @@ def add_user_to_group_by_username(username, group):
     return profile
 
 
+MEMBER_ACTIONS = ("add", "remove", "promote", "demote")
+
+
+def bulk_manage_members(group, acting_user, action, usernames=(), profile_ids=()):
+    """
+    Applies one member action to many people at once. Usernames and profile
+    ids are resolved with a single query, the changed profiles are written with
+    one bulk_update and the group cache version is bumped once. Returns one
+    {"member": ..., "ok": bool, "message": ...} result per requested item.
+    """
+    if action not in MEMBER_ACTIONS:
+        raise ValueError(f"Unknown member action {action!r}.")
+
+    usernames = list(dict.fromkeys(name for name in usernames if name))
+    profile_ids = list(dict.fromkeys(int(pk) for pk in profile_ids))
+    profiles = Profile.objects.select_related("user").filter(
+        Q(user__username__in=usernames) | Q(pk__in=profile_ids)
+    )
+    by_username = {}
+    by_id = {}
+    for profile in profiles:
+        by_username[profile.user.username] = profile
+        by_id[profile.pk] = profile
+
+    requested = [(name, by_username.get(name)) for name in usernames]
+    requested += [(pk, by_id.get(pk)) for pk in profile_ids]
+
+    results = []
+    changed = {}
+    old_groups = set()
+    for member, profile in requested:
+        if profile is None:
+            results.append({"member": member, "ok": False, "message": "User not found."})
+            continue
+        if profile.pk in changed:
+            results.append({"member": member, "ok": False, "message": "Listed twice."})
+            continue
+        ok, message = _apply_member_action(group, acting_user, action, profile)
+        results.append({"member": member, "ok": ok, "message": message})
+        if ok:
+            if profile.group_id != group.pk:
+                old_groups.add(profile.group_id)
+            changed[profile.pk] = profile
+
+    if changed:
+        now = timezone.now()
+        for profile in changed.values():
+            profile.updated_at = now
+            if action == "add":
+                profile.group = group
+                profile.is_admin = False
+            elif action == "remove":
+                profile.group = None
+                profile.is_admin = False
+            else:
+                profile.is_admin = action == "promote"
+        fields = ["is_admin", "updated_at"]
+        if action in ("add", "remove"):
+            fields.append("group")
+        with tracking_group_totals(Profile.objects.filter(pk__in=changed)):
+            Profile.objects.bulk_update(changed.values(), fields=fields)
+            bump_group_version(group.pk, *old_groups)
+        if action == "add":
+            metrics.GROUP_JOINS.inc(len(changed))
+    return results
+
+
+def _apply_member_action(group, acting_user, action, profile):
+    if action == "add":
+        if profile.group_id == group.pk:
+            return False, "Already a member."
+        return True, "Added."
+    if profile.group_id != group.pk:
+        return False, "Not a member of this group."
+    if profile.user_id == acting_user.pk:
+        return False, "You can't change your own membership here."
+    if action == "remove":
+        return True, "Removed."
+    if profile.user_id == group.owner_id:
+        return False, "The owner's role can't be changed."
+    if profile.is_admin == (action == "promote"):
+        return False, "Already an admin." if profile.is_admin else "Already a member."
+    return True, "Promoted to admin." if action == "promote" else "Made a regular member."
+
+
+def actual_group_totals():
+    """
+    Annotations with each group's totals computed from its members' profiles,
+    for checking and repairing the denormalized columns on FamilyGroup.
+    """
+    members = Profile.objects.filter(group=OuterRef("pk")).order_by().values("group")
+
+    def summed(aggregate, **kwargs):
+        subquery = Subquery(members.annotate(value=aggregate).values("value"))
+        return Coalesce(subquery, Value(0), **kwargs)
+
+    return {
+        "actual_income": summed(Sum("income"), output_field=MoneyField()),
+        "actual_expenses": summed(Sum("expenses"), output_field=MoneyField()),
+        "actual_members": summed(Count("pk")),
+    }
+
+
+def recompute_group_totals(groups):
+    """Rewrites total_income, total_expenses and member_count of `groups` from the profiles."""
+    actual = actual_group_totals()
+    with transaction.atomic():
+        updated = groups.update(
+            total_income=actual["actual_income"],
+            total_expenses=actual["actual_expenses"],
+            member_count=actual["actual_members"],
+        )
+        bump_group_version(*groups.values_list("pk", flat=True))
+    return updated
+
+
+def sync_categories(group, limits, remove_missing=False):
+    """
+    Makes the group's categories match `limits` ({name: budget_limit or None}).
+    The existing categories are loaded with one query and matched by name
+    case-insensitively; new ones are added with bulk_create, changed limits
+    written with bulk_update and, with remove_missing, categories that are not
+    listed are removed with one filtered delete.
+    """
+    categories = list(
+        sharding.for_group(Category.objects.filter(group=group), group).order_by("pk")
+    )
+    existing = {}
+    for category in categories:
+        existing.setdefault(category.name.casefold(), category)
+
+    now = timezone.now()
+    to_create = []
+    to_update = []
+    seen = set()
+    for name, limit in limits.items():
+        category = existing.get(name.casefold())
+        if category is None:
+            to_create.append(
+                Category(group=group, name=name, budget_limit=limit, updated_at=now)
+            )
+            continue
+        seen.add(category.pk)
+        if category.budget_limit != limit:
+            category.budget_limit = limit
+            category.updated_at = now
+            to_update.append(category)
+
+    removed = []
+    if remove_missing:
+        removed = [category.pk for category in categories if category.pk not in seen]
+
+    with sharding.group_scope(group) as db, transaction.atomic(using=db):
+        Category.objects.bulk_create(to_create)
+        Category.objects.bulk_update(to_update, ["budget_limit", "updated_at"])
+        if removed:
+            Category.objects.filter(group=group, pk__in=removed).delete()
+        if to_create or to_update:
+            bump_group_version(group.pk)
+
+    return {"created": len(to_create), "updated": len(to_update), "deleted": len(removed)}
+
+
 def member_dto(profile, group):
     user = profile.user
     income = profile.income or Decimal("0")
@@ -59,3 +270,294 @@ def build_members_list(group):
         .order_by("user__username")
     )
     return [member_dto(p, group) for p in profiles]
+
+
+def cached_members_list(group):
+    return caching.get_or_build(
+        caching.group_cache_key(group, "members"),
+        lambda: build_members_list(group),
+    )
+
+
+def group_overview(group):
+    """
+    Members, categories and goals for the group pages, served from cache until
+    the group's version is bumped by a change to any of them.
+    """
+    def build():
+        with sharding.group_scope(group):
+            return {
+                "members": cached_members_list(group),
+                "categories": list(Category.objects.filter(group=group).order_by("name")),
+                "goals": list(Goal.objects.filter(group=group).order_by("created_at")),
+            }
+
+    return caching.get_or_build(caching.group_cache_key(group, "overview"), build)
+
+
+async def agroup_overview(group):
+    """
+    group_overview for async views. Its queries run back to back on one
+    connection either way, so the whole build is a single sync_to_async hop.
+    """
+    return await sync_to_async(group_overview)(group)
+
+
+def record_expenses(profile, group, entries, date=None, **kwargs):
+    """
+    entries is an iterable of (category, amount) pairs, all dated `date`
+    (default today).
+    """
+    date = date or timezone.localdate()
+    with sharding.group_scope(group):
+        expenses = [
+            Expense(
+                profile=profile,
+                group=group,
+                category=category,
+                amount=amount,
+                date=date,
+            )
+            for category, amount in entries
+        ]
+    return save_expenses(group, expenses, **kwargs)
+
+
+def save_expenses(group, expenses, update_totals=True):
+    """
+    Writes unsaved Expense rows with one bulk insert, updates the monthly
+    rollup once for the whole batch and adds the ones dated this month to each
+    spender's monthly expenses (and so to the group's totals); older entries
+    only count towards their month in the rollup. Pass update_totals=False
+    when the caller writes the profile and group rows itself.
+    """
+    if not expenses:
+        return []
+
+    spent = {}
+    for expense in expenses:
+        if is_current_month(expense.date):
+            spent[expense.profile_id] = spent.get(expense.profile_id, 0) + expense.amount
+
+    with sharding.group_scope(group) as db, transaction.atomic(using=db):
+        Expense.objects.bulk_create(expenses)
+        MonthlyCategoryTotal.objects.apply_deltas(expense_rollup_deltas(expenses))
+        if update_totals:
+            add_profile_expenses(group.pk, spent)
+            bump_group_version(group.pk)
+    metrics.EXPENSE_WRITES.inc(len(expenses))
+    return expenses
+
+
+def apply_profile_edit(profile, changes, entries):
+    """
+    Saves a profile edit and its per-category expenses with one UPDATE of the
+    profile row and one of its group. `changes` holds only the fields the user
+    actually edited. Unless the expenses total itself was edited, the new
+    amounts are added with F() so concurrent submissions from several devices
+    never overwrite each other's money. The group totals move by the same
+    amounts, worked out from the values the profile was loaded with.
+    """
+    extra = sum((amount for _category, amount in entries), Decimal("0"))
+    values = dict(changes)
+    if not values and not entries:
+        return
+
+    group_id, income, expenses = profile.stored_totals()
+    income_delta = expenses_delta = Decimal("0")
+    if "income" in values:
+        values["income"] = values["income"] or Decimal("0")
+        income_delta = values["income"] - income
+    if "expenses" in values:
+        values["expenses"] = (values["expenses"] or Decimal("0")) + extra
+        expenses_delta = values["expenses"] - expenses
+    elif extra:
+        values["expenses"] = F("expenses") + money_value(extra)
+        expenses_delta = extra
+
+    with transaction.atomic():
+        if values:
+            Profile.objects.filter(pk=profile.pk).update(
+                updated_at=timezone.now(), **values
+            )
+        if entries:
+            record_expenses(profile, profile.group, entries, update_totals=False)
+        adjust_group_totals(group_id, income_delta, expenses_delta, bump_version=True)
+    profile.set_stored_totals(income + income_delta, expenses + expenses_delta)
+
+
+def monthly_category_totals(group, month):
+    return sharding.for_group(
+        MonthlyCategoryTotal.objects.filter(group=group, month=month_start(month))
+        .select_related("category")
+        .order_by("category__name"),
+        group,
+    )
+
+
+def expense_months(group):
+    return sharding.for_group(
+        MonthlyCategoryTotal.objects.filter(group=group)
+        .values_list("month", flat=True)
+        .distinct()
+        .order_by("-month"),
+        group,
+    )
+
+
+def budget_vs_actual(group, start_month, end_month=None):
+    """
+    Limit, actual spend, remaining and percent used for every category of the
+    group over [start_month, end_month]. Actuals come from the monthly rollup
+    in one grouped query; categories with no spending show an actual of 0.
+    """
+    start_month = month_start(start_month)
+    end_month = month_start(end_month or start_month)
+    key = caching.group_cache_key(
+        group, f"budget:{start_month:%Y%m}-{end_month:%Y%m}"
+    )
+    return caching.get_or_build(
+        key, lambda: _build_budget_vs_actual(group, start_month, end_month)
+    )
+
+
+def _build_budget_vs_actual(group, start_month, end_month):
+    rows = sharding.for_group(
+        Category.objects.filter(group=group)
+        .annotate(
+            period_totals=FilteredRelation(
+                "monthly_totals",
+                condition=Q(monthly_totals__month__range=(start_month, end_month)),
+            ),
+            actual=Coalesce(
+                Sum("period_totals__total"),
+                Value(0),
+                output_field=MoneyField(),
+            ),
+        )
+        .order_by("name")
+        .values_list("pk", "name", "budget_limit", "actual"),
+        group,
+    )
+    return [budget_line(*row) for row in rows]
+
+
+def budget_line(category_id, name, limit, actual):
+    actual = actual.quantize(CENT)
+    if limit is None:
+        remaining = None
+        percent_used = None
+    else:
+        remaining = limit - actual
+        percent_used = round(actual * 100 / limit, 1) if limit else None
+
+    return {
+        "category_id": category_id,
+        "name": name,
+        "limit": limit,
+        "actual": actual,
+        "remaining": remaining,
+        "percent_used": percent_used,
+        "over_budget": limit is not None and actual > limit,
+    }
+
+
+def compare_periods(group, current, previous):
+    """
+    Per-category spending in two periods side by side, with the change and the
+    percent change from `previous` to `current`. Each period is a month or a
+    (start_month, end_month) pair. Both totals and the change come from one
+    conditional-aggregation query over the monthly rollup, however many
+    categories and months there are. Categories with no spending in either
+    period are left out.
+
+    Comparisons of months that are over are cached until something backdated
+    changes them (FamilyGroup.history_version); ones touching the current
+    month follow the group version like the other group caches.
+    """
+    current = _month_range(current)
+    previous = _month_range(previous)
+    name = "compare:{:%Y%m}-{:%Y%m}:{:%Y%m}-{:%Y%m}".format(*current, *previous)
+    this_month = month_start(timezone.localdate())
+    if max(current[1], previous[1]) < this_month:
+        key = caching.group_history_cache_key(group, name)
+        permanent = True
+    else:
+        key = caching.group_cache_key(group, name)
+        permanent = False
+    return caching.get_or_build(
+        key, lambda: _build_comparison(group, current, previous), permanent=permanent
+    )
+
+
+def month_over_month(group, month):
+    """compare_periods for `month` against the month before it."""
+    month = month_start(month)
+    return compare_periods(group, month, month_start(month - datetime.timedelta(days=1)))
+
+
+def _month_range(period):
+    start, end = period if isinstance(period, (tuple, list)) else (period, period)
+    return month_start(start), month_start(end)
+
+
+def _build_comparison(group, current, previous):
+    def period_total(period):
+        return Coalesce(
+            Sum("period_totals__total", filter=Q(period_totals__month__range=period)),
+            Value(0),
+            output_field=MoneyField(),
+        )
+
+    rows = sharding.for_group(
+        Category.objects.filter(group=group)
+        .annotate(
+            # Naming the group lets the join seek the (group, category, month)
+            # unique index to just the two periods instead of all history.
+            period_totals=FilteredRelation(
+                "monthly_totals",
+                condition=Q(monthly_totals__group=group)
+                & (
+                    Q(monthly_totals__month__range=current)
+                    | Q(monthly_totals__month__range=previous)
+                ),
+            ),
+            current=period_total(current),
+            previous=period_total(previous),
+        )
+        .annotate(
+            change=ExpressionWrapper(F("current") - F("previous"), output_field=MoneyField())
+        )
+        .exclude(current=0, previous=0)
+        .order_by("name")
+        .values_list("pk", "name", "current", "previous", "change"),
+        group,
+    )
+    lines = [comparison_line(*row) for row in rows]
+    current_total = sum((line["current"] for line in lines), Decimal("0"))
+    previous_total = sum((line["previous"] for line in lines), Decimal("0"))
+    return {
+        "current_period": current,
+        "previous_period": previous,
+        "lines": lines,
+        "current_total": current_total,
+        "previous_total": previous_total,
+        "change": current_total - previous_total,
+        "percent_change": _percent_change(current_total - previous_total, previous_total),
+    }
+
+
+def comparison_line(category_id, name, current, previous, change):
+    return {
+        "category_id": category_id,
+        "name": name,
+        "current": current,
+        "previous": previous,
+        "change": change,
+        "percent_change": _percent_change(change, previous),
+        "direction": "up" if change > 0 else "down" if change < 0 else "same",
+    }
+
+
+def _percent_change(change, previous):
+    return round(change * 100 / previous, 1) if previous else None
@@ -0,0 +1,351 @@
+"""
+Horizontal sharding of household data by FamilyGroup.
+
+Categories, goals, expenses and monthly totals of a group live on one of the
+databases in settings.BUDGET_SHARDS; users, profiles and the groups themselves
+stay on the "default" directory database. A group is placed by consistent
+hashing of its id unless FamilyGroup.shard pins it somewhere else (which is
+what move_group does), so adding a shard only moves about 1/N of the groups.
+
+With the default single shard ["default"] everything lives in one database and
+none of this changes any query.
+
+ShardRouter picks the database for a sharded model from, in order: the
+instance it was asked about (or its group), the group of the current
+group_scope(), and for requests the group of the signed-in user's profile
+(set up by ShardMiddleware). Code outside a request that touches household
+data of a specific group wraps it in `with group_scope(group):`.
+"""
+import bisect
+import contextlib
+import contextvars
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections, models, transaction
+
+DIRECTORY = "default"
+SHARDED_MODELS = {"category", "goal", "expense", "monthlycategorytotal"}
+VIRTUAL_NODES = 128
+SHARD_CACHE_TIMEOUT = 60
+MOVE_CHUNK_SIZE = 2000
+
+_scope = contextvars.ContextVar("budget_shard_scope", default=None)
+
+
+class ShardNotSelected(RuntimeError):
+    pass
+
+
+def shard_aliases():
+    return tuple(getattr(settings, "BUDGET_SHARDS", None) or (DIRECTORY,))
+
+
+def is_sharded():
+    return len(shard_aliases()) > 1
+
+
+class HashRing:
+    """Consistent hash ring with VIRTUAL_NODES points per shard."""
+
+    def __init__(self, aliases, virtual_nodes=VIRTUAL_NODES):
+        points = []
+        for alias in aliases:
+            for replica in range(virtual_nodes):
+                points.append((_hash(f"{alias}#{replica}"), alias))
+        points.sort()
+        self._keys = [key for key, _alias in points]
+        self._aliases = [alias for _key, alias in points]
+
+    def node_for(self, key):
+        index = bisect.bisect(self._keys, _hash(str(key))) % len(self._keys)
+        return self._aliases[index]
+
+
+def _hash(value):
+    return int.from_bytes(hashlib.md5(value.encode()).digest()[:8], "big")
+
+
+@lru_cache(maxsize=8)
+def _ring(aliases):
+    return HashRing(aliases)
+
+
+def hashed_shard(group_id):
+    aliases = shard_aliases()
+    if len(aliases) == 1:
+        return aliases[0]
+    return _ring(aliases).node_for(group_id)
+
+
+def shard_for_group(group):
+    """Database holding the household data of a FamilyGroup instance."""
+    if not is_sharded():
+        return shard_aliases()[0]
+    return group.shard or hashed_shard(group.pk)
+
+
+def _shard_cache_key(group_id):
+    return f"budget:shard:{group_id}"
+
+
+def shard_for_group_id(group_id):
+    """Like shard_for_group, reading the group's pin from the directory."""
+    if not is_sharded():
+        return shard_aliases()[0]
+    key = _shard_cache_key(group_id)
+    pinned = cache.get(key)
+    if pinned is None:
+        from .models import FamilyGroup
+
+        pinned = (
+            FamilyGroup.objects.using(DIRECTORY)
+            .filter(pk=group_id)
+            .values_list("shard", flat=True)
+            .first()
+        ) or ""
+        cache.set(key, pinned, SHARD_CACHE_TIMEOUT)
+    return pinned or hashed_shard(group_id)
+
+
+def forget_shard(group_id):
+    cache.delete(_shard_cache_key(group_id))
+
+
+@contextlib.contextmanager
+def group_scope(group):
+    """Route household queries without a more specific hint to `group`'s shard."""
+    token = _scope.set(lambda: shard_for_group(group))
+    try:
+        yield shard_for_group(group)
+    finally:
+        _scope.reset(token)
+
+
+@contextlib.contextmanager
+def request_scope(resolve_group):
+    """Like group_scope, resolving the group only when a query first needs it."""
+    resolved = []
+
+    def resolve():
+        if not resolved:
+            group = resolve_group()
+            # Without a group there is no household data to find; any shard
+            # answers those (empty) queries.
+            resolved.append(
+                shard_for_group(group) if group is not None else shard_aliases()[0]
+            )
+        return resolved[0]
+
+    token = _scope.set(resolve)
+    try:
+        yield
+    finally:
+        _scope.reset(token)
+
+
+def for_group(queryset, group):
+    """Pin a lazily evaluated household queryset to `group`'s shard."""
+    if not is_sharded():
+        return queryset
+    return queryset.using(shard_for_group(group))
+
+
+def scoped_shard():
+    resolve = _scope.get()
+    return resolve() if resolve is not None else None
+
+
+def fan_out(function, aliases=None, max_workers=None):
+    """
+    Run function(alias) for every shard in parallel threads and return
+    {alias: result}. Each thread closes its own connections when done.
+    """
+    aliases = tuple(aliases or shard_aliases())
+
+    def run(alias):
+        try:
+            return function(alias)
+        finally:
+            connections.close_all()
+
+    with ThreadPoolExecutor(max_workers=max_workers or len(aliases)) as pool:
+        return dict(zip(aliases, pool.map(run, aliases)))
+
+
+def move_group(group, target):
+    """
+    Copy a group's household data to shard `target`, pin the group there and
+    delete it from its old shard. Returns the number of rows moved per model.
+
+    The copy runs inside a transaction on the source shard, which (with the
+    tuned BEGIN IMMEDIATE profile) holds off writers there until the move is
+    done; requests that already routed to the old shard may still write there
+    afterwards, so run moves while the household is quiet.
+    """
+    from .models import Category, Expense, FamilyGroup, Goal, MonthlyCategoryTotal
+
+    if target not in shard_aliases():
+        raise ValueError(f"Unknown shard {target!r}.")
+    source = shard_for_group(group)
+    moved = {"category": 0, "goal": 0, "expense": 0, "monthlycategorytotal": 0}
+    if source == target:
+        return moved
+
+    with transaction.atomic(using=source):
+        with transaction.atomic(using=target), connections[target].cursor() as cursor:
+            category_ids = {}
+            insert, params = _insert_statement(Category, cursor.db)
+            for category in Category.objects.using(source).filter(group=group).order_by("pk"):
+                cursor.execute(insert, params(category))
+                category_ids[category.pk] = cursor.lastrowid
+            moved["category"] = len(category_ids)
+
+            insert, params = _insert_statement(Goal, cursor.db)
+            goals = Goal.objects.using(source).filter(group=group)
+            moved["goal"] = len(goals)
+            if goals:
+                cursor.executemany(insert, [params(goal) for goal in goals])
+
+            insert, params = _insert_statement(Expense, cursor.db)
+            expenses = Expense.objects.using(source).filter(group=group).order_by("pk")
+            batch = []
+            for expense in expenses.iterator(chunk_size=MOVE_CHUNK_SIZE):
+                expense.category_id = category_ids[expense.category_id]
+                batch.append(params(expense))
+                if len(batch) >= MOVE_CHUNK_SIZE:
+                    cursor.executemany(insert, batch)
+                    moved["expense"] += len(batch)
+                    batch = []
+            if batch:
+                cursor.executemany(insert, batch)
+                moved["expense"] += len(batch)
+
+            deltas = {}
+            totals = MonthlyCategoryTotal.objects.using(source).filter(group=group)
+            for total in totals:
+                key = (group.pk, category_ids[total.category_id], total.month)
+                deltas[key] = (total.total, total.entry_count)
+            MonthlyCategoryTotal.objects.apply_deltas(deltas, using=target)
+            moved["monthlycategorytotal"] = len(deltas)
+
+        FamilyGroup.objects.using(DIRECTORY).filter(pk=group.pk).update(
+            shard=target, version=models.F("version") + 1
+        )
+        group.shard = target
+        forget_shard(group.pk)
+
+        # Categories cascade to the old expenses and totals.
+        Category.objects.using(source).filter(group=group).delete()
+        Goal.objects.using(source).filter(group=group).delete()
+    return moved
+
+
+def _insert_statement(model, connection):
+    """
+    INSERT for copying rows of `model` as stored, without the primary key (the
+    target shard assigns new ids), auto_now timestamps or signals. Returns the
+    SQL and a function building the parameters for one instance.
+    """
+    fields = [field for field in model._meta.concrete_fields if not field.primary_key]
+    table = connection.ops.quote_name(model._meta.db_table)
+    columns = ", ".join(connection.ops.quote_name(field.column) for field in fields)
+    placeholders = ", ".join(["%s"] * len(fields))
+
+    def params(instance):
+        return [
+            field.get_db_prep_save(getattr(instance, field.attname), connection)
+            for field in fields
+        ]
+
+    return f"INSERT INTO {table} ({columns}) VALUES ({placeholders})", params
+
+
+def _is_sharded_model(model):
+    return model._meta.app_label == "budget" and model._meta.model_name in SHARDED_MODELS
+
+
+def _shard_from_instance(instance):
+    if instance is None:
+        return None
+    model_name = instance._meta.model_name
+    if model_name == "familygroup":
+        return shard_for_group(instance)
+    if model_name in SHARDED_MODELS:
+        if instance._state.db in shard_aliases():
+            return instance._state.db
+        group = instance._state.fields_cache.get("group")
+        if group is not None:
+            return shard_for_group(group)
+        if instance.group_id is not None:
+            return shard_for_group_id(instance.group_id)
+    return None
+
+
+class ShardRouter:
+    def _db_for(self, model, hints):
+        if not is_sharded() or not _is_sharded_model(model):
+            return None
+        alias = _shard_from_instance(hints.get("instance")) or scoped_shard()
+        if alias is None:
+            raise ShardNotSelected(
+                f"No shard selected for {model._meta.label}; wrap the code in "
+                "sharding.group_scope(group)."
+            )
+        return alias
+
+    def db_for_read(self, model, **hints):
+        return self._db_for(model, hints)
+
+    def db_for_write(self, model, **hints):
+        return self._db_for(model, hints)
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Household rows point at groups and profiles in the directory.
+        if not is_sharded():
+            return None
+        databases = {obj1._state.db, obj2._state.db}
+        if databases <= {DIRECTORY, *shard_aliases()}:
+            return True
+        return None
+
+
+class ShardMiddleware:
+    """Routes household queries in a request to the signed-in user's group."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not is_sharded():
+            return self.get_response(request)
+        with request_scope(self._group_resolver(request)):
+            return self.get_response(request)
+
+    async def __acall__(self, request):
+        if not is_sharded():
+            return await self.get_response(request)
+        # The resolver runs where the first household query does, which for
+        # the async ORM is a worker thread, so it may query synchronously.
+        with request_scope(self._group_resolver(request)):
+            return await self.get_response(request)
+
+    @staticmethod
+    def _group_resolver(request):
+        def resolve_group():
+            if not request.user.is_authenticated:
+                return None
+            return request.budget_profile.group
+
+        return resolve_group
@@ -1,4 +1,7 @@
+from django.core.cache import cache
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from django.contrib.auth.models import User
 from budget.models import FamilyGroup, Profile
@@ -6,11 +9,12 @@ from budget.models import FamilyGroup, Profile
 
 class TestAdminManageMembers(TestCase):
     def setUp(self):
+        cache.clear()
         self.owner = User.objects.create_user(username="owner", password="pw12345")
         self.other = User.objects.create_user(username="other", password="pw12345")
 
-        self.owner_profile = Profile.objects.create(user=self.owner)
-        self.other_profile = Profile.objects.create(user=self.other)
+        self.owner_profile = Profile.objects.get(user=self.owner)
+        self.other_profile = Profile.objects.get(user=self.other)
 
         self.group = FamilyGroup.objects.create(
             name="Fam",
@@ -44,3 +48,66 @@ class TestAdminManageMembers(TestCase):
         self.other_profile.refresh_from_db()
         self.assertIsNone(self.other_profile.group)
         self.assertEqual(resp.status_code, 200)
+
+    def test_bulk_add_resolves_usernames_in_one_query(self):
+        for name in ("ann", "ben", "cat"):
+            User.objects.create_user(username=name, password="pw12345")
+        self.client.login(username="owner", password="pw12345")
+        self.client.get(self.manage_url)
+
+        with CaptureQueriesContext(connection) as captured:
+            resp = self.client.post(
+                self.manage_url,
+                {"action": "add", "usernames": "ann, ben\ncat\nnobody\nowner"},
+            )
+
+        self.assertEqual(resp.status_code, 200)
+        results = {r["member"]: (r["ok"], r["message"]) for r in resp.context["results"]}
+        self.assertEqual(results["nobody"], (False, "User not found."))
+        self.assertEqual(results["owner"], (False, "Already a member."))
+        self.assertTrue(all(results[name][0] for name in ("ann", "ben", "cat")))
+        self.assertEqual(
+            [m["username"] for m in resp.context["members"]], ["ann", "ben", "cat", "owner"]
+        )
+        self.assertEqual(
+            set(Profile.objects.filter(group=self.group).values_list("user__username", flat=True)),
+            {"owner", "ann", "ben", "cat"},
+        )
+        profile_selects = [
+            q["sql"] for q in captured.captured_queries
+            if q["sql"].startswith("SELECT") and 'FROM "budget_profile"' in q["sql"]
+            and "IN (" in q["sql"]
+        ]
+        self.assertEqual(len(profile_selects), 1)
+        self.assertEqual(
+            len([q for q in captured.captured_queries if q["sql"].startswith('UPDATE "budget_profile"')]),
+            1,
+        )
+
+    def test_bulk_promote_and_remove_selected_members(self):
+        members = []
+        for name in ("ann", "ben"):
+            user = User.objects.create_user(username=name, password="pw12345")
+            profile = Profile.objects.get(user=user)
+            profile.group = self.group
+            profile.save()
+            members.append(profile)
+        self.client.login(username="owner", password="pw12345")
+
+        self.client.post(
+            self.manage_url,
+            {"action": "promote", "member_profile_ids": [p.pk for p in members] + [self.owner_profile.pk]},
+        )
+        self.assertEqual(
+            Profile.objects.filter(group=self.group, is_admin=True).count(), 2
+        )
+
+        resp = self.client.post(
+            self.manage_url,
+            {"action": "remove", "member_profile_ids": [members[0].pk, self.other_profile.pk]},
+        )
+        results = [r["ok"] for r in resp.context["results"]]
+        self.assertEqual(results, [True, False])
+        members[0].refresh_from_db()
+        self.assertIsNone(members[0].group)
+        self.assertFalse(members[0].is_admin)
@@ -0,0 +1,59 @@
+from decimal import Decimal
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.urls import reverse
+
+from budget import services
+from budget.models import Category, FamilyGroup, Goal, Profile
+from budget.tests.utils import HouseholdTestCase
+
+User = get_user_model()
+
+
+class TestAsyncViews(HouseholdTestCase):
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        self.owner = User.objects.create_user(username="owner", password="pw12345")
+        self.member = User.objects.create_user(username="member", password="pw12345")
+        self.group = FamilyGroup.objects.create(name="Fam", code="A123", owner=self.owner)
+        for user in (self.owner, self.member):
+            Profile.objects.filter(user=user).update(group=self.group)
+        Category.objects.create(group=self.group, name="Food", budget_limit=Decimal("100"))
+        Goal.objects.create(group=self.group, name="Trip", target_amount=Decimal("500"))
+
+    async def test_members_page_under_async_client(self):
+        await self.async_client.aforce_login(self.owner)
+        url = reverse("group_members")
+
+        first = await self.async_client.get(url)
+        self.assertEqual(first.status_code, 200)
+        self.assertContains(first, "member")
+        self.assertContains(first, "Food")
+        self.assertContains(first, "Trip")
+
+        second = await self.async_client.get(url, headers={"if-none-match": first["ETag"]})
+        self.assertEqual(second.status_code, 304)
+
+    async def test_dashboard_under_async_client(self):
+        await self.async_client.aforce_login(self.owner)
+        response = await self.async_client.get(reverse("budget_dashboard"))
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("ETag", response)
+
+    async def test_anonymous_users_are_sent_to_login(self):
+        response = await self.async_client.get(reverse("budget_dashboard"))
+        self.assertEqual(response.status_code, 302)
+        self.assertIn(reverse("login"), response["Location"])
+
+    async def test_async_services_match_the_sync_ones(self):
+        profile = await services.aget_profile(self.owner)
+        self.assertEqual(profile.group.owner, self.owner)
+
+        members = await sync_to_async(services.build_members_list)(self.group)
+        overview = await services.agroup_overview(self.group)
+        self.assertEqual([c.name for c in overview["categories"]], ["Food"])
+        self.assertEqual([g.name for g in overview["goals"]], ["Trip"])
+        self.assertEqual(overview["members"], members)
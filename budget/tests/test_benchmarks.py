@@ -0,0 +1,81 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.db.models import Sum
+from django.test import TestCase
+
+from budget import sharding
+from budget.benchmarks import (
+    BENCHMARKED_VIEWS,
+    percentile,
+    run_mixed_load,
+    run_view_benchmarks,
+)
+from budget.models import Profile, Expense, MonthlyCategoryTotal
+from budget.seeding import seed_budget
+from budget.tests.utils import ALL_DATABASES, FileDatabaseTestCase, count_on_shards
+
+
+def rollup_entries():
+    return sum(
+        MonthlyCategoryTotal.objects.using(alias).aggregate(n=Sum("entry_count"))["n"] or 0
+        for alias in sharding.shard_aliases()
+    )
+
+
+class TestSeedAndBenchmarks(TestCase):
+    databases = ALL_DATABASES
+
+    def test_seed_budget_builds_consistent_data(self):
+        summary = seed_budget(
+            users=6, group_size=3, categories=4, goals=1,
+            expenses_per_member=5, months=3, seed=1,
+        )
+
+        self.assertEqual(summary["groups"], 2)
+        self.assertEqual(Profile.objects.filter(group__isnull=False).count(), 6)
+        self.assertEqual(count_on_shards(Expense.objects), 30)
+        self.assertEqual(rollup_entries(), 30)
+
+    def test_benchmarks_cover_every_view(self):
+        seed_budget(users=3, group_size=3, expenses_per_member=2, seed=2)
+
+        results = run_view_benchmarks(iterations=2)
+
+        self.assertEqual(len(results), len(BENCHMARKED_VIEWS))
+        for row in results:
+            self.assertIn(row["status"], (200, 302), row)
+            self.assertGreater(row["queries"], 0)
+            self.assertLessEqual(row["p50_ms"], row["p95_ms"])
+
+    def test_commands(self):
+        out = StringIO()
+        call_command("seed_budget", users=2, group_size=2, expenses_per_member=1, stdout=out)
+        self.assertIn("Created 2 users in 1 groups", out.getvalue())
+
+        out = StringIO()
+        call_command("bench_budget", iterations=1, stdout=out)
+        self.assertIn("GroupMembersView", out.getvalue())
+
+    def test_percentile(self):
+        values = list(range(1, 101))
+        self.assertEqual(percentile(values, 50), 50)
+        self.assertEqual(percentile(values, 95), 95)
+        self.assertEqual(percentile([], 95), 0.0)
+
+
+class TestMixedLoad(FileDatabaseTestCase):
+    databases = ALL_DATABASES
+
+    def test_mixed_load_reads_and_writes_from_threads(self):
+        seed_budget(users=4, group_size=2, categories=3, expenses_per_member=1, seed=3)
+        expenses_before = count_on_shards(Expense.objects)
+
+        result = run_mixed_load(threads=3, duration=0.5, write_ratio=0.5, seed=1)
+
+        self.assertEqual(result["errors"], 0, result["first_error"])
+        self.assertGreater(result["reads"], 0)
+        self.assertGreater(result["writes"], 0)
+        expenses = count_on_shards(Expense.objects)
+        self.assertGreaterEqual(expenses - expenses_before, result["writes"])
+        self.assertEqual(rollup_entries(), expenses)
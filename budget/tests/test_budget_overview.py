@@ -0,0 +1,84 @@
+import datetime
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.urls import reverse
+
+from budget import services
+from budget.models import FamilyGroup, Profile, Category, Expense
+from budget.tests.utils import HouseholdTestCase
+
+User = get_user_model()
+
+
+class TestBudgetVsActual(HouseholdTestCase):
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        self.owner = User.objects.create_user(username="owner", password="pw12345")
+        self.group = FamilyGroup.objects.create(
+            name="Fam",
+            code="B123",
+            owner=self.owner,
+        )
+        self.profile = Profile.objects.get(user=self.owner)
+        self.profile.group = self.group
+        self.profile.save()
+
+        self.groceries = Category.objects.create(
+            group=self.group, name="Groceries", budget_limit=Decimal("100.00")
+        )
+        self.gas = Category.objects.create(
+            group=self.group, name="Gas", budget_limit=Decimal("50.00")
+        )
+        self.fun = Category.objects.create(group=self.group, name="Fun")
+
+        self.march = datetime.date(2025, 3, 1)
+        for category, amount in ((self.groceries, "40.00"), (self.gas, "70.00")):
+            Expense.objects.create(
+                profile=self.profile,
+                group=self.group,
+                category=category,
+                amount=Decimal(amount),
+                date=datetime.date(2025, 3, 10),
+            )
+        # Outside the period; must not be counted.
+        Expense.objects.create(
+            profile=self.profile,
+            group=self.group,
+            category=self.groceries,
+            amount=Decimal("999.00"),
+            date=datetime.date(2025, 4, 1),
+        )
+        self.group.refresh_from_db()
+
+    def test_one_query_with_zero_spend_categories(self):
+        with self.assertNumQueries(1, using=self.household_db):
+            lines = services.budget_vs_actual(self.group, self.march)
+
+        by_name = {line["name"]: line for line in lines}
+        self.assertEqual(list(by_name), ["Fun", "Gas", "Groceries"])
+
+        self.assertEqual(by_name["Groceries"]["actual"], Decimal("40.00"))
+        self.assertEqual(by_name["Groceries"]["remaining"], Decimal("60.00"))
+        self.assertEqual(by_name["Groceries"]["percent_used"], Decimal("40.0"))
+        self.assertFalse(by_name["Groceries"]["over_budget"])
+
+        self.assertTrue(by_name["Gas"]["over_budget"])
+        self.assertEqual(by_name["Fun"]["actual"], Decimal("0"))
+        self.assertIsNone(by_name["Fun"]["percent_used"])
+
+    def test_result_is_cached_per_period(self):
+        services.budget_vs_actual(self.group, self.march)
+
+        with self.assertNumQueries(0, using=self.household_db):
+            services.budget_vs_actual(self.group, self.march)
+
+    def test_overview_page_renders(self):
+        self.client.force_login(self.owner)
+        resp = self.client.get(reverse("budget_overview"), {"month": "2025-03"})
+
+        self.assertEqual(resp.status_code, 200)
+        self.assertContains(resp, "$40.00 of $100.00")
+        self.assertContains(resp, "over-budget")
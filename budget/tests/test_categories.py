@@ -1,15 +1,20 @@
-from django.test import TestCase
+from decimal import Decimal
+
+from django.db import connections
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from django.contrib.auth import get_user_model
 
-from budget.models import Profile, FamilyGroup, Category
+from budget.models import Profile, FamilyGroup, Category, Expense, MonthlyCategoryTotal
 from budget import services
+from budget.tests.utils import HouseholdTestCase
 
 User = get_user_model()
 
 
-class TestCategories(TestCase):
+class TestCategories(HouseholdTestCase):
     def setUp(self):
+        super().setUp()
         self.owner_user = User.objects.create_user(
             username="owner", password="pass123"
         )
@@ -17,18 +22,22 @@ class TestCategories(TestCase):
             username="other", password="pass123"
         )
 
-        self.owner_profile = Profile.objects.create(
+        self.owner_profile = Profile.objects.update_or_create(
             user=self.owner_user,
-            nickname="Owner",
-            income=0,
-            expenses=0,
-        )
-        self.other_profile = Profile.objects.create(
+            defaults={
+                "nickname": "Owner",
+                "income": 0,
+                "expenses": 0,
+            },
+        )[0]
+        self.other_profile = Profile.objects.update_or_create(
             user=self.other_user,
-            nickname="Member",
-            income=0,
-            expenses=0,
-        )
+            defaults={
+                "nickname": "Member",
+                "income": 0,
+                "expenses": 0,
+            },
+        )[0]
 
         self.group = FamilyGroup.objects.create(
             name="Fam",
@@ -60,3 +69,56 @@ class TestCategories(TestCase):
         self.client.force_login(self.other_user)
         resp = self.client.get(self.url)
         self.assertNotEqual(resp.status_code, 200)
+
+    def test_bulk_edit_diffs_against_existing_categories(self):
+        rent = Category.objects.create(group=self.group, name="Rent", budget_limit=Decimal("900"))
+        gas = Category.objects.create(group=self.group, name="Gas", budget_limit=Decimal("80"))
+        fun = Category.objects.create(group=self.group, name="Fun")
+        Expense.objects.create(
+            profile=self.owner_profile, group=self.group, category=fun, amount=Decimal("5")
+        )
+        self.client.force_login(self.owner_user)
+        self.client.get(self.url)
+
+        with CaptureQueriesContext(connections[self.household_db]) as captured:
+            resp = self.client.post(
+                self.url,
+                {
+                    "bulk_categories": "rent, 950\nGas, 80.00\nGroceries, 400\nKids, clubs,\n",
+                    "remove_missing": "on",
+                },
+            )
+
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.context["bulk_summary"], {"created": 2, "updated": 1, "deleted": 1})
+        limits = dict(
+            Category.objects.filter(group=self.group).values_list("name", "budget_limit")
+        )
+        self.assertEqual(
+            limits,
+            {
+                "Rent": Decimal("950.00"),
+                "Gas": Decimal("80.00"),
+                "Groceries": Decimal("400.00"),
+                "Kids, clubs": None,
+            },
+        )
+        self.assertEqual(rent.pk, Category.objects.get(name="Rent").pk)
+        self.assertEqual(gas.pk, Category.objects.get(name="Gas").pk)
+        self.assertFalse(MonthlyCategoryTotal.objects.filter(category_id=fun.pk).exists())
+
+        writes = [
+            q["sql"].split(" ", 1)[0] for q in captured.captured_queries
+            if '"budget_category"' in q["sql"].split(" WHERE ")[0]
+            and not q["sql"].startswith("SELECT")
+        ]
+        self.assertEqual(writes, ["INSERT", "UPDATE", "DELETE"])
+
+    def test_bulk_edit_reports_bad_lines_without_saving(self):
+        self.client.force_login(self.owner_user)
+
+        resp = self.client.post(self.url, {"bulk_categories": "Rent, 900\nGas, lots"})
+
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual([e["line"] for e in resp.context["bulk_errors"]], [2])
+        self.assertFalse(Category.objects.filter(group=self.group).exists())
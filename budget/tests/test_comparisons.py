@@ -0,0 +1,97 @@
+import datetime
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.utils import timezone
+
+from budget import services
+from budget.models import Category, FamilyGroup, Profile
+from budget.tests.utils import HouseholdTestCase
+
+User = get_user_model()
+
+
+class TestPeriodComparison(HouseholdTestCase):
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        self.owner = User.objects.create_user(username="owner", password="pw12345")
+        self.group = FamilyGroup.objects.create(name="Fam", code="C123", owner=self.owner)
+        self.profile = Profile.objects.get(user=self.owner)
+        services.attach_profile_to_group(self.profile, self.group)
+
+        self.food = Category.objects.create(group=self.group, name="Food")
+        self.gas = Category.objects.create(group=self.group, name="Gas")
+        self.fun = Category.objects.create(group=self.group, name="Fun")
+        Category.objects.create(group=self.group, name="Unused")
+        self.feb = datetime.date(2025, 2, 1)
+        self.march = datetime.date(2025, 3, 1)
+        self.spend(self.feb, (self.food, "100"), (self.gas, "50"))
+        self.spend(self.march, (self.food, "80"), (self.food, "45.50"), (self.fun, "20"))
+
+    def spend(self, month, *entries):
+        services.record_expenses(
+            self.profile,
+            self.group,
+            [(category, Decimal(amount)) for category, amount in entries],
+            date=month.replace(day=10),
+        )
+        self.group.refresh_from_db()
+
+    def test_month_over_month_in_one_query(self):
+        with self.assertNumQueries(1, using=self.household_db):
+            result = services.month_over_month(self.group, self.march)
+
+        lines = {line["name"]: line for line in result["lines"]}
+        self.assertEqual(list(lines), ["Food", "Fun", "Gas"])
+        self.assertEqual(
+            (lines["Food"]["current"], lines["Food"]["previous"], lines["Food"]["change"]),
+            (Decimal("125.50"), Decimal("100.00"), Decimal("25.50")),
+        )
+        self.assertEqual(lines["Food"]["percent_change"], Decimal("25.5"))
+        self.assertEqual(lines["Gas"]["direction"], "down")
+        self.assertEqual(lines["Gas"]["percent_change"], Decimal("-100.0"))
+        self.assertIsNone(lines["Fun"]["percent_change"])
+        self.assertEqual(
+            (result["current_total"], result["previous_total"], result["percent_change"]),
+            (Decimal("145.50"), Decimal("150.00"), Decimal("-3.0")),
+        )
+
+    def test_query_count_does_not_grow_with_categories_or_history(self):
+        for i in range(30):
+            category = Category.objects.create(group=self.group, name=f"Extra {i}")
+            self.spend(datetime.date(2000 + i, 1, 1), (category, "1"))
+
+        with self.assertNumQueries(1, using=self.household_db):
+            result = services.compare_periods(
+                self.group, (datetime.date(2000, 1, 1), self.feb), self.march
+            )
+        # Jan 2000 through Jan 2025 plus February.
+        self.assertEqual(result["current_total"], Decimal("176.00"))
+
+    def test_closed_months_stay_cached_until_backdated_changes(self):
+        services.month_over_month(self.group, self.march)
+        # New spending today bumps the group version but not the history.
+        self.spend(timezone.localdate().replace(day=1), (self.food, "5"))
+        with self.assertNumQueries(0, using=self.household_db):
+            services.month_over_month(self.group, self.march)
+
+        self.spend(self.march, (self.gas, "10"))
+        result = services.month_over_month(self.group, self.march)
+        self.assertEqual(result["current_total"], Decimal("155.50"))
+
+        self.gas.name = "Fuel"
+        self.gas.save()
+        self.group.refresh_from_db()
+        result = services.month_over_month(self.group, self.march)
+        self.assertIn("Fuel", [line["name"] for line in result["lines"]])
+
+    def test_current_month_follows_the_group_version(self):
+        this_month = timezone.localdate().replace(day=1)
+        self.spend(this_month, (self.food, "5"))
+        services.month_over_month(self.group, this_month)
+
+        self.spend(this_month, (self.food, "7"))
+        result = services.month_over_month(self.group, this_month)
+        self.assertEqual(result["current_total"], Decimal("12.00"))
@@ -0,0 +1,58 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.urls import reverse
+
+from budget.models import FamilyGroup, Profile, Goal
+from budget.tests.utils import HouseholdTestCase
+
+User = get_user_model()
+
+
+class TestConditionalGet(HouseholdTestCase):
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        self.owner = User.objects.create_user(username="owner", password="pw12345")
+        self.group = FamilyGroup.objects.create(
+            name="Fam",
+            code="E123",
+            owner=self.owner,
+        )
+        self.profile = Profile.objects.get(user=self.owner)
+        self.profile.group = self.group
+        self.profile.save()
+
+        self.client.force_login(self.owner)
+
+    def test_members_page_returns_304_when_unchanged(self):
+        url = reverse("group_members")
+        first = self.client.get(url)
+        self.assertEqual(first.status_code, 200)
+        self.assertIn("ETag", first)
+
+        # session, user, profile + group + owner
+        with self.assertNumQueries(3):
+            second = self.client.get(url, HTTP_IF_NONE_MATCH=first["ETag"])
+
+        self.assertEqual(second.status_code, 304)
+
+    def test_members_page_changes_etag_after_group_change(self):
+        url = reverse("group_members")
+        first = self.client.get(url)
+
+        Goal.objects.create(group=self.group, name="Trip", target_amount=100)
+
+        second = self.client.get(url, HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(second.status_code, 200)
+        self.assertContains(second, "Trip")
+
+    def test_dashboard_changes_etag_after_profile_edit(self):
+        url = reverse("budget_dashboard")
+        first = self.client.get(url)
+
+        self.profile.nickname = "Boss"
+        self.profile.save()
+
+        second = self.client.get(url, HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(second.status_code, 200)
+        self.assertContains(second, "Boss")
@@ -0,0 +1,368 @@
+import datetime
+import json
+import threading
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection, connections
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from budget.models import (
+    Profile,
+    FamilyGroup,
+    Category,
+    Expense,
+    MonthlyCategoryTotal,
+)
+from budget.tests.utils import FileDatabaseTestCase, HouseholdTestCase, HouseholdTestMixin
+
+User = get_user_model()
+
+
+class TestExpenseLedger(HouseholdTestCase):
+    def setUp(self):
+        super().setUp()
+        self.owner = User.objects.create_user(
+            username="owner", password="testpass123"
+        )
+        self.group = FamilyGroup.objects.create(
+            name="Fam",
+            code="L123",
+            owner=self.owner,
+        )
+        self.profile = Profile.objects.get(user=self.owner)
+        self.profile.group = self.group
+        self.profile.save()
+
+        self.groceries = Category.objects.create(group=self.group, name="Groceries")
+        self.gas = Category.objects.create(group=self.group, name="Gas")
+
+        self.client.force_login(self.owner)
+
+    def _total(self, category, month):
+        return MonthlyCategoryTotal.objects.get(
+            group=self.group, category=category, month=month
+        )
+
+    def test_profile_edit_records_ledger_rows_and_rollup(self):
+        self.client.post(
+            reverse("profile_edit"),
+            {
+                "income": "0",
+                "expenses": "0",
+                f"category_expense_{self.groceries.id}": "40.00",
+                f"category_expense_{self.gas.id}": "",
+            },
+        )
+
+        self.assertEqual(Expense.objects.filter(group=self.group).count(), 1)
+        expense = Expense.objects.get(group=self.group)
+        self.assertEqual(expense.category, self.groceries)
+        self.assertEqual(expense.amount, Decimal("40.00"))
+
+        row = self._total(self.groceries, expense.date.replace(day=1))
+        self.assertEqual(row.total, Decimal("40.00"))
+        self.assertEqual(row.entry_count, 1)
+
+    def test_profile_edit_rejects_out_of_range_amounts(self):
+        for raw in ("1e20", "0.001", "-5", "abc"):
+            resp = self.client.post(
+                reverse("profile_edit"),
+                {
+                    "income": "0",
+                    "expenses": "0",
+                    f"category_expense_{self.groceries.id}": raw,
+                },
+            )
+            self.assertEqual(resp.status_code, 200, raw)
+            self.assertTrue(resp.context["form"].non_field_errors(), raw)
+
+        self.assertFalse(Expense.objects.exists())
+
+    def test_update_and_delete_adjust_rollup(self):
+        march = datetime.date(2025, 3, 1)
+        april = datetime.date(2025, 4, 1)
+        expense = Expense.objects.create(
+            profile=self.profile,
+            group=self.group,
+            category=self.groceries,
+            amount=Decimal("25.00"),
+            date=datetime.date(2025, 3, 14),
+        )
+        Expense.objects.create(
+            profile=self.profile,
+            group=self.group,
+            category=self.groceries,
+            amount=Decimal("10.00"),
+            date=datetime.date(2025, 3, 20),
+        )
+        self.assertEqual(self._total(self.groceries, march).total, Decimal("35.00"))
+
+        expense = Expense.objects.get(pk=expense.pk)
+        expense.category = self.gas
+        expense.date = datetime.date(2025, 4, 2)
+        expense.save()
+
+        self.assertEqual(self._total(self.groceries, march).total, Decimal("10.00"))
+        self.assertEqual(self._total(self.groceries, march).entry_count, 1)
+        self.assertEqual(self._total(self.gas, april).total, Decimal("25.00"))
+
+        expense.delete()
+        gas_april = self._total(self.gas, april)
+        self.assertEqual(gas_april.total, Decimal("0"))
+        self.assertEqual(gas_april.entry_count, 0)
+
+    def test_deleting_a_member_takes_their_expenses_off_in_one_go(self):
+        march = datetime.date(2025, 3, 1)
+        member = User.objects.create_user(username="member", password="testpass123")
+        member_profile = Profile.objects.get(user=member)
+        member_profile.group = self.group
+        member_profile.save()
+        days = {2: self.groceries, 3: self.groceries, 4: self.gas, 5: self.gas, 6: self.gas}
+        for day, category in days.items():
+            Expense.objects.create(
+                profile=member_profile, group=self.group, category=category,
+                amount=Decimal("10.00"), date=march.replace(day=day),
+            )
+        Expense.objects.create(
+            profile=self.profile, group=self.group, category=self.gas,
+            amount=Decimal("1.00"), date=march,
+        )
+
+        with CaptureQueriesContext(connections[self.household_db]) as captured:
+            member.delete()
+
+        rollup_updates = [
+            q for q in captured.captured_queries
+            if q["sql"].startswith('UPDATE "budget_monthlycategorytotal"')
+        ]
+        self.assertEqual(len(rollup_updates), 2)
+        self.assertFalse(Expense.objects.filter(profile=member_profile).exists())
+        groceries = self._total(self.groceries, march)
+        gas = self._total(self.gas, march)
+        self.assertEqual((groceries.total, groceries.entry_count), (Decimal("0"), 0))
+        self.assertEqual((gas.total, gas.entry_count), (Decimal("1.00"), 1))
+
+    def test_history_page_shows_month_totals(self):
+        Expense.objects.create(
+            profile=self.profile,
+            group=self.group,
+            category=self.groceries,
+            amount=Decimal("12.50"),
+            date=datetime.date(2025, 3, 3),
+        )
+
+        resp = self.client.get(reverse("expense_history"), {"month": "2025-03"})
+
+        self.assertEqual(resp.status_code, 200)
+        self.assertContains(resp, "Groceries")
+        self.assertContains(resp, "$12.50")
+
+    def test_deleting_category_removes_its_history(self):
+        Expense.objects.create(
+            profile=self.profile,
+            group=self.group,
+            category=self.groceries,
+            amount=Decimal("5.00"),
+        )
+
+        self.groceries.delete()
+
+        self.assertFalse(Expense.objects.filter(group=self.group).exists())
+        self.assertFalse(
+            MonthlyCategoryTotal.objects.filter(group=self.group).exists()
+        )
+
+
+class TestConcurrentExpenseEdits(HouseholdTestMixin, FileDatabaseTestCase):
+    """Runs against a file-backed database so each thread has its own connection."""
+
+    THREADS = 8
+    SUBMISSIONS = 10
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        self.owner = User.objects.create_user(username="owner", password="testpass123")
+        self.group = FamilyGroup.objects.create(name="Fam", code="C123", owner=self.owner)
+        self.profile = Profile.objects.get(user=self.owner)
+        self.profile.group = self.group
+        self.profile.expenses = Decimal("100.00")
+        self.profile.save()
+        self.groceries = Category.objects.create(group=self.group, name="Groceries")
+
+    def _submit_from_device(self, errors):
+        try:
+            client = Client()
+            client.force_login(self.owner)
+            for _ in range(self.SUBMISSIONS):
+                # Every device still shows the expenses total it loaded first.
+                resp = client.post(
+                    reverse("profile_edit"),
+                    {
+                        "nickname": "",
+                        "initial-nickname": "",
+                        "income": "0.00",
+                        "initial-income": "0.00",
+                        "expenses": "100.00",
+                        "initial-expenses": "100.00",
+                        f"category_expense_{self.groceries.id}": "1.25",
+                    },
+                )
+                if resp.status_code != 302:
+                    errors.append(resp.status_code)
+        except Exception as exc:
+            errors.append(exc)
+        finally:
+            connection.close()
+
+    def test_simultaneous_submissions_lose_no_money(self):
+        errors = []
+        threads = [
+            threading.Thread(target=self._submit_from_device, args=(errors,))
+            for _ in range(self.THREADS)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        submissions = self.THREADS * self.SUBMISSIONS
+        added = Decimal("1.25") * submissions
+        self.profile.refresh_from_db()
+        self.assertEqual(self.profile.expenses, Decimal("100.00") + added)
+        self.assertEqual(Expense.objects.filter(group=self.group).count(), submissions)
+        row = MonthlyCategoryTotal.objects.get(group=self.group, category=self.groceries)
+        self.assertEqual(row.total, added)
+        self.assertEqual(row.entry_count, submissions)
+
+    def test_edited_total_replaces_the_stored_value(self):
+        self.client.force_login(self.owner)
+
+        self.client.post(
+            reverse("profile_edit"),
+            {
+                "income": "0.00",
+                "initial-income": "0.00",
+                "expenses": "50.00",
+                "initial-expenses": "100.00",
+                f"category_expense_{self.groceries.id}": "5.00",
+            },
+        )
+
+        self.profile.refresh_from_db()
+        self.assertEqual(self.profile.expenses, Decimal("55.00"))
+
+    def test_submission_writes_the_profile_and_group_once(self):
+        self.client.force_login(self.owner)
+
+        with CaptureQueriesContext(connection) as captured:
+            self.client.post(
+                reverse("profile_edit"),
+                {
+                    "income": "3000.00",
+                    "initial-income": "0.00",
+                    "expenses": "100.00",
+                    "initial-expenses": "100.00",
+                    f"category_expense_{self.groceries.id}": "5.00",
+                },
+            )
+
+        sql = [query["sql"] for query in captured.captured_queries]
+        self.assertEqual(len([q for q in sql if q.startswith('UPDATE "budget_profile"')]), 1)
+        self.assertEqual(len([q for q in sql if q.startswith('UPDATE "budget_familygroup"')]), 1)
+        self.group.refresh_from_db()
+        self.assertEqual(
+            (self.group.total_income, self.group.total_expenses),
+            (Decimal("3000.00"), Decimal("105.00")),
+        )
+
+
+class TestExpenseBatch(HouseholdTestCase):
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        self.owner = User.objects.create_user(username="owner", password="testpass123")
+        self.group = FamilyGroup.objects.create(name="Fam", code="B123", owner=self.owner)
+        self.profile = Profile.objects.get(user=self.owner)
+        self.profile.group = self.group
+        self.profile.save()
+        self.groceries = Category.objects.create(group=self.group, name="Groceries")
+        self.gas = Category.objects.create(group=self.group, name="Gas")
+        self.client.force_login(self.owner)
+
+    def _post(self, payload):
+        return self.client.post(
+            reverse("expense_batch"), json.dumps(payload), content_type="application/json"
+        )
+
+    def test_items_are_saved_with_one_insert_and_one_category_lookup(self):
+        items = [
+            {"category_id": self.groceries.id, "amount": "12.50", "date": "2025-03-02", "note": "milk"},
+            {"category_id": self.gas.id, "amount": "40", "date": "2025-03-09"},
+            {"category_id": self.groceries.id, "amount": "7.50", "date": "2025-04-01"},
+        ]
+
+        with CaptureQueriesContext(connections[self.household_db]) as captured:
+            resp = self._post({"items": items})
+
+        self.assertEqual(resp.status_code, 201)
+        self.assertEqual(resp.json(), {"created": 3, "total": "60.00"})
+        sql = [query["sql"] for query in captured.captured_queries]
+        self.assertEqual(len([q for q in sql if 'FROM "budget_category"' in q]), 1)
+        self.assertEqual(len([q for q in sql if q.startswith('INSERT INTO "budget_expense"')]), 1)
+
+        self.assertEqual(
+            Expense.objects.get(note="milk").date, datetime.date(2025, 3, 2)
+        )
+        march = MonthlyCategoryTotal.objects.get(
+            group=self.group, category=self.groceries, month=datetime.date(2025, 3, 1)
+        )
+        self.assertEqual(march.total, Decimal("12.50"))
+        self.assertEqual(
+            MonthlyCategoryTotal.objects.get(category=self.gas).total, Decimal("40.00")
+        )
+
+        # Backdated entries don't count towards this month's expenses.
+        self.profile.refresh_from_db()
+        self.assertEqual(self.profile.expenses, Decimal("0"))
+
+    def test_items_dated_this_month_add_to_monthly_expenses(self):
+        resp = self._post([
+            {"category_id": self.groceries.id, "amount": "12.50"},
+            {"category_id": self.gas.id, "amount": "40", "date": "2025-03-09"},
+        ])
+
+        self.assertEqual(resp.status_code, 201)
+        self.profile.refresh_from_db()
+        self.group.refresh_from_db()
+        self.assertEqual(self.profile.expenses, Decimal("12.50"))
+        self.assertEqual(self.group.total_expenses, Decimal("12.50"))
+
+    def test_invalid_items_reject_the_whole_batch(self):
+        other_owner = User.objects.create_user(username="other", password="testpass123")
+        other_group = FamilyGroup.objects.create(name="Other", code="O123", owner=other_owner)
+        foreign = Category.objects.create(group=other_group, name="Theirs")
+
+        resp = self._post([
+            {"category_id": self.groceries.id, "amount": "5.00"},
+            {"category_id": foreign.id, "amount": "5.00"},
+            {"category_id": self.gas.id, "amount": "-3"},
+            {"category_id": self.gas.id, "amount": "3", "date": "03/01/2025"},
+        ])
+
+        self.assertEqual(resp.status_code, 400)
+        self.assertEqual([error["index"] for error in resp.json()["errors"]], [1, 2, 3])
+        self.assertFalse(Expense.objects.exists())
+
+    def test_requires_a_group(self):
+        self.profile.group = None
+        self.profile.save()
+
+        resp = self._post([{"category_id": self.groceries.id, "amount": "5.00"}])
+
+        self.assertEqual(resp.status_code, 403)
@@ -0,0 +1,91 @@
+import datetime
+import json
+from decimal import Decimal
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+
+from budget.models import FamilyGroup, Profile, Category, Expense
+from budget.tests.utils import HouseholdTestCase
+
+User = get_user_model()
+
+
+class TestGroupExport(HouseholdTestCase):
+    def setUp(self):
+        super().setUp()
+        self.owner = User.objects.create_user(username="owner", password="pw12345")
+        self.group = FamilyGroup.objects.create(
+            name="Fam",
+            code="X123",
+            owner=self.owner,
+        )
+        self.profile = Profile.objects.get(user=self.owner)
+        self.profile.group = self.group
+        self.profile.save()
+
+        self.groceries = Category.objects.create(group=self.group, name="Groceries")
+        self.gas = Category.objects.create(group=self.group, name="Gas")
+        for day, category, amount in (
+            (datetime.date(2025, 1, 5), self.groceries, "10.00"),
+            (datetime.date(2025, 2, 5), self.groceries, "20.00"),
+            (datetime.date(2025, 2, 6), self.gas, "30.00"),
+        ):
+            Expense.objects.create(
+                profile=self.profile,
+                group=self.group,
+                category=category,
+                amount=Decimal(amount),
+                date=day,
+            )
+
+        self.client.force_login(self.owner)
+        self.url = reverse("group_export")
+
+    def _body(self, resp):
+        self.assertTrue(resp.streaming)
+        return b"".join(resp.streaming_content).decode()
+
+    def test_csv_export_streams_every_section(self):
+        resp = self.client.get(self.url, {"format": "csv"})
+
+        self.assertEqual(resp["Content-Type"], "text/csv")
+        body = self._body(resp)
+        self.assertIn("type,username,display_name,role,income,expenses", body)
+        self.assertIn("category,", body)
+        self.assertIn("expense,2025-01-05,Groceries,owner,10.00,", body)
+
+    def test_jsonl_export_applies_filters(self):
+        resp = self.client.get(
+            self.url,
+            {
+                "format": "jsonl",
+                "start": "2025-02-01",
+                "category": str(self.groceries.pk),
+            },
+        )
+
+        records = [json.loads(line) for line in self._body(resp).splitlines()]
+        expenses = [r for r in records if r["type"] == "expense"]
+        self.assertEqual(len(expenses), 1)
+        self.assertEqual(expenses[0]["date"], "2025-02-05")
+        self.assertEqual(expenses[0]["amount"], "20.00")
+
+    async def test_asgi_export_streams_in_chunks(self):
+        await self.async_client.aforce_login(self.owner)
+        with patch("budget.exports.EXPORT_CHUNK_SIZE", 2):
+            resp = await self.async_client.get(self.url, {"format": "csv"})
+            self.assertTrue(resp.is_async)
+            chunks = [chunk async for chunk in resp.streaming_content]
+
+        self.assertGreater(len(chunks), 1)
+        body = b"".join(chunks).decode()
+        self.assertIn("expense,2025-02-06,Gas,owner,30.00,", body)
+
+    def test_export_requires_group(self):
+        self.profile.group = None
+        self.profile.save()
+
+        resp = self.client.get(self.url)
+        self.assertEqual(resp.status_code, 302)
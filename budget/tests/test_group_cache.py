@@ -0,0 +1,71 @@
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.urls import reverse
+
+from budget import caching
+from budget.models import FamilyGroup, Profile, Category
+from budget.tests.utils import HouseholdTestCase
+
+User = get_user_model()
+
+
+class TestGroupCache(HouseholdTestCase):
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        caching.reset_cache_stats()
+
+        self.owner = User.objects.create_user(username="owner", password="pw12345")
+        self.member = User.objects.create_user(username="member", password="pw12345")
+        self.group = FamilyGroup.objects.create(
+            name="Fam",
+            code="C123",
+            owner=self.owner,
+        )
+        self.owner_profile = Profile.objects.get(user=self.owner)
+        self.owner_profile.group = self.group
+        self.owner_profile.save()
+        self.member_profile = Profile.objects.get(user=self.member)
+        self.member_profile.group = self.group
+        self.member_profile.save()
+
+        self.client.force_login(self.owner)
+        self.url = reverse("group_members")
+
+    def test_second_request_is_served_from_cache(self):
+        self.client.get(self.url)
+        misses = caching.cache_stats()["misses"]
+
+        resp = self.client.get(self.url)
+
+        self.assertContains(resp, "member")
+        self.assertEqual(caching.cache_stats()["misses"], misses)
+        self.assertGreater(caching.cache_stats()["hits"], 0)
+
+    def test_profile_change_invalidates_members(self):
+        self.client.get(self.url)
+
+        self.member_profile.income = Decimal("4321.00")
+        self.member_profile.save()
+
+        resp = self.client.get(self.url)
+        self.assertContains(resp, "4321.00")
+
+    def test_leaving_group_bumps_old_group_version(self):
+        version = FamilyGroup.objects.get(pk=self.group.pk).version
+
+        self.member_profile.group = None
+        self.member_profile.save()
+
+        self.group.refresh_from_db()
+        self.assertGreater(self.group.version, version)
+
+    def test_new_category_invalidates_overview(self):
+        self.client.get(self.url)
+
+        Category.objects.create(group=self.group, name="Utilities")
+
+        resp = self.client.get(self.url)
+        self.assertContains(resp, "Utilities")
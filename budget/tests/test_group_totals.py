@@ -0,0 +1,110 @@
+from decimal import Decimal
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from budget import services
+from budget.models import Category, FamilyGroup, Profile
+from budget.tests.utils import HouseholdTestCase
+
+User = get_user_model()
+
+
+class TestGroupTotals(HouseholdTestCase):
+    def setUp(self):
+        super().setUp()
+        self.owner = User.objects.create_user(username="owner", password="pw12345")
+        self.member = User.objects.create_user(username="member", password="pw12345")
+        self.group = FamilyGroup.objects.create(name="Fam", code="T123", owner=self.owner)
+        Profile.objects.filter(user=self.owner).update(income=Decimal("3000"), expenses=Decimal("1000"))
+        Profile.objects.filter(user=self.member).update(income=Decimal("2000"), expenses=Decimal("500"))
+        for user in (self.owner, self.member):
+            services.attach_profile_to_group(Profile.objects.get(user=user), self.group)
+
+    def assertTotals(self, income, expenses, members):
+        self.group.refresh_from_db()
+        self.assertEqual(
+            (self.group.total_income, self.group.total_expenses, self.group.member_count),
+            (Decimal(income), Decimal(expenses), members),
+        )
+
+    def test_joining_adds_the_member(self):
+        self.assertTotals("5000", "1500", 2)
+        self.assertEqual(self.group.net_savings, Decimal("3500"))
+
+    def test_leaving_and_admin_removal_subtract_the_member(self):
+        self.client.force_login(self.member)
+        self.client.post(reverse("group_leave"))
+        self.assertTotals("3000", "1000", 1)
+
+        services.attach_profile_to_group(Profile.objects.get(user=self.member), self.group)
+        self.client.force_login(self.owner)
+        self.client.post(
+            reverse("group_remove_member", args=[Profile.objects.get(user=self.member).pk])
+        )
+        self.assertTotals("3000", "1000", 1)
+
+    def test_profile_edits_and_recorded_expenses_are_applied(self):
+        profile = services.get_profile(self.member)
+        food = Category.objects.create(group=self.group, name="Food")
+
+        services.apply_profile_edit(profile, {"income": Decimal("2500")}, [(food, Decimal("25"))])
+        self.assertTotals("5500", "1525", 2)
+
+        services.apply_profile_edit(profile, {"expenses": Decimal("100")}, [])
+        self.assertTotals("5500", "1100", 2)
+
+    def test_saves_only_apply_changed_totals(self):
+        profile = Profile.objects.get(user=self.member)
+
+        with CaptureQueriesContext(connection) as captured:
+            profile.nickname = "Mo"
+            profile.save()
+            profile.save(update_fields=["group", "updated_at"])
+        self.assertFalse(
+            [q for q in captured.captured_queries if "total_income" in q["sql"]]
+        )
+
+        profile.income = Decimal("2100")
+        profile.expenses = Decimal("450")
+        with CaptureQueriesContext(connection) as captured:
+            profile.save()
+        totals = [q["sql"] for q in captured.captured_queries if "total_income" in q["sql"]]
+        self.assertEqual(len(totals), 1)
+        self.assertNotIn("SELECT", totals[0])
+        self.assertTotals("5100", "1450", 2)
+
+        profile.group = None
+        profile.save()
+        self.assertTotals("3000", "1000", 1)
+
+    def test_bulk_moves_and_deleted_users_update_both_groups(self):
+        other = FamilyGroup.objects.create(name="Other", code="O123", owner=self.member)
+        services.bulk_manage_members(other, self.member, "add", usernames=["owner"])
+        other.refresh_from_db()
+        self.assertTotals("2000", "500", 1)
+        self.assertEqual((other.total_income, other.member_count), (Decimal("3000"), 1))
+
+        self.member.delete()
+        self.assertTotals("0", "0", 0)
+
+    def test_recompute_command_repairs_drift(self):
+        FamilyGroup.objects.filter(pk=self.group.pk).update(total_income=0, member_count=9)
+        out = StringIO()
+
+        call_command("recompute_group_totals", "--dry-run", stdout=out)
+        self.assertIn("1 group(s) out of date", out.getvalue())
+        self.assertTotals("0", "1500", 9)
+
+        call_command("recompute_group_totals", stdout=StringIO())
+        self.assertTotals("5000", "1500", 2)
+
+    def test_members_page_shows_the_household_totals(self):
+        self.client.force_login(self.owner)
+        response = self.client.get(reverse("group_members"))
+        self.assertContains(response, "$5000.00")
+        self.assertContains(response, "net $3500.00")
@@ -1,14 +1,17 @@
-from django.test import TestCase
+from django.core.cache import cache
 from django.urls import reverse
 from django.contrib.auth import get_user_model
 
 from budget.models import FamilyGroup, Profile
+from budget.tests.utils import HouseholdTestCase
 
 User = get_user_model()
 
 
-class TestGroups(TestCase):
+class TestGroups(HouseholdTestCase):
     def setUp(self):
+        super().setUp()
+        cache.clear()
         self.owner = User.objects.create_user(
             username="owner",
             password="testpass123",
@@ -24,7 +27,7 @@ class TestGroups(TestCase):
             username="joiner",
             password="testpass123",
         )
-        self.profile = Profile.objects.create(user=self.user)
+        self.profile = Profile.objects.get(user=self.user)
 
     def test_join_requires_login(self):
         resp = self.client.post(
@@ -49,7 +52,7 @@ class TestGroups(TestCase):
         self.profile.group = self.group
         self.profile.save()
 
-        owner_profile, _ = Profile.objects.get_or_create(user=self.owner)
+        owner_profile = Profile.objects.get(user=self.owner)
         owner_profile.group = self.group
         owner_profile.save()
 
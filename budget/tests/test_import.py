@@ -0,0 +1,145 @@
+import datetime
+import os
+import tempfile
+from decimal import Decimal
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from budget.imports import import_expenses
+from budget.models import (
+    FamilyGroup,
+    Profile,
+    Category,
+    Expense,
+    MonthlyCategoryTotal,
+    month_start,
+)
+from budget.tests.utils import HouseholdTestCase
+
+User = get_user_model()
+
+CSV = """date,category,amount,note,member
+2025-03-01,Groceries,12.50,milk,
+2025-03-02,groceries,7.50,,other
+2025-03-03,Rent,100,,
+not-a-date,Groceries,1,,
+2025-04-01,Groceries,-3,,
+"""
+
+
+class TestExpenseImport(HouseholdTestCase):
+    def setUp(self):
+        super().setUp()
+        self.owner = User.objects.create_user(username="owner", password="pw12345")
+        self.other = User.objects.create_user(username="other", password="pw12345")
+        self.group = FamilyGroup.objects.create(
+            name="Fam",
+            code="I123",
+            owner=self.owner,
+        )
+        self.profile = Profile.objects.get(user=self.owner)
+        self.profile.group = self.group
+        self.profile.save()
+        other_profile = Profile.objects.get(user=self.other)
+        other_profile.group = self.group
+        other_profile.save()
+
+        self.groceries = Category.objects.create(group=self.group, name="Groceries")
+
+    def test_import_writes_valid_rows_and_reports_errors(self):
+        report = import_expenses(
+            self.group, self.profile, StringIO(CSV), batch_size=1
+        )
+
+        self.assertEqual(report["imported"], 2)
+        self.assertEqual([e["line"] for e in report["errors"]], [4, 5, 6])
+        self.assertEqual(Expense.objects.filter(group=self.group).count(), 2)
+        self.assertTrue(
+            Expense.objects.filter(profile=self.other.profile, amount=Decimal("7.50")).exists()
+        )
+
+        total = MonthlyCategoryTotal.objects.get(
+            group=self.group,
+            category=self.groceries,
+            month=datetime.date(2025, 3, 1),
+        )
+        self.assertEqual(total.total, Decimal("20.00"))
+        self.assertEqual(total.entry_count, 2)
+
+        # Past months only show up in the monthly history.
+        self.group.refresh_from_db()
+        self.assertEqual(
+            dict(Profile.objects.values_list("user__username", "expenses")),
+            {"owner": Decimal("0"), "other": Decimal("0")},
+        )
+        self.assertEqual(self.group.total_expenses, Decimal("0"))
+
+    def test_only_this_months_rows_add_to_monthly_expenses(self):
+        today = timezone.localdate()
+        last_month = month_start(today) - datetime.timedelta(days=1)
+        lines = [
+            "date,category,amount,member",
+            f"{today},Groceries,30,",
+            f"{today},Groceries,5,other",
+            f"{last_month},Groceries,200,",
+        ]
+
+        import_expenses(self.group, self.profile, StringIO("\n".join(lines)))
+
+        self.group.refresh_from_db()
+        self.assertEqual(
+            dict(Profile.objects.values_list("user__username", "expenses")),
+            {"owner": Decimal("30.00"), "other": Decimal("5.00")},
+        )
+        self.assertEqual(self.group.total_expenses, Decimal("35.00"))
+
+    def test_dry_run_writes_nothing(self):
+        report = import_expenses(self.group, self.profile, StringIO(CSV), dry_run=True)
+
+        self.assertEqual(report["imported"], 2)
+        self.assertFalse(Expense.objects.exists())
+        self.assertFalse(MonthlyCategoryTotal.objects.exists())
+
+    def test_dry_run_opens_no_write_transaction(self):
+        with CaptureQueriesContext(connection) as captured:
+            import_expenses(self.group, self.profile, StringIO(CSV), dry_run=True)
+
+        self.assertFalse(
+            [q for q in captured.captured_queries if "SAVEPOINT" in q["sql"]]
+        )
+
+    def test_missing_columns_are_reported(self):
+        report = import_expenses(self.group, self.profile, StringIO("date,amount\n"))
+
+        self.assertEqual(report["imported"], 0)
+        self.assertIn("category", report["errors"][0]["error"])
+
+    def test_management_command(self):
+        handle, path = tempfile.mkstemp(suffix=".csv")
+        with os.fdopen(handle, "w") as csv_file:
+            csv_file.write(CSV)
+        self.addCleanup(os.remove, path)
+
+        out = StringIO()
+        call_command(
+            "import_expenses", path, group="I123", user="owner",
+            stdout=out, stderr=StringIO(),
+        )
+
+        self.assertIn("Imported 2 expense(s); 3 row(s) rejected.", out.getvalue())
+
+    def test_upload_view(self):
+        self.client.force_login(self.owner)
+        upload = SimpleUploadedFile("expenses.csv", CSV.encode(), content_type="text/csv")
+
+        resp = self.client.post(reverse("expense_import"), {"file": upload})
+
+        self.assertContains(resp, "Imported <strong>2</strong> expense(s).")
+        self.assertContains(resp, "Unknown category")
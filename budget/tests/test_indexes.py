@@ -0,0 +1,55 @@
+from django.contrib.auth import get_user_model
+from django.db import IntegrityError, connection
+from django.test import skipUnlessDBFeature
+
+from budget.models import Category, FamilyGroup, Goal, Profile
+from budget.tests.utils import HouseholdTestCase
+
+User = get_user_model()
+
+
+@skipUnlessDBFeature("supports_explaining_query_execution")
+class TestHotPathIndexes(HouseholdTestCase):
+    """
+    EXPLAIN checks for the per-group lookups every budget page runs; see
+    "Indexes" in the README. On SQLite a plan line reads like
+    "SEARCH budget_goal USING INDEX goal_group_created_idx (group_id=?)".
+    """
+
+    def setUp(self):
+        super().setUp()
+        owner = User.objects.create_user(username="owner", password="testpass123")
+        self.group = FamilyGroup.objects.create(name="Fam", code="I123", owner=owner)
+
+    def assertUsesIndex(self, queryset, table, sorted_by_index=True):
+        plan = queryset.explain()
+        if connection.vendor != "sqlite":
+            return
+        self.assertRegex(plan, rf"SEARCH {table} USING (COVERING )?INDEX \S+ \(group_id=\?")
+        if sorted_by_index:
+            self.assertNotIn("TEMP B-TREE", plan)
+
+    def test_category_list_uses_group_name_index(self):
+        self.assertUsesIndex(
+            Category.objects.filter(group=self.group).order_by("name"), "budget_category"
+        )
+
+    def test_goal_list_uses_group_created_index(self):
+        self.assertUsesIndex(
+            Goal.objects.filter(group=self.group).order_by("created_at"), "budget_goal"
+        )
+
+    def test_member_list_uses_group_index(self):
+        self.assertUsesIndex(
+            Profile.objects.filter(group=self.group)
+            .select_related("user")
+            .order_by("user__username"),
+            "budget_profile",
+            sorted_by_index=False,
+        )
+
+    def test_category_names_are_unique_per_group(self):
+        Category.objects.create(group=self.group, name="Food")
+
+        with self.assertRaises(IntegrityError):
+            Category.objects.create(group=self.group, name="Food")
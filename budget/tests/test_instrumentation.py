@@ -0,0 +1,58 @@
+import json
+
+from django.contrib.auth import get_user_model
+from django.core.exceptions import MiddlewareNotUsed
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from mysite.middleware import PerformanceMiddleware
+
+User = get_user_model()
+
+
+@override_settings(PERF_INSTRUMENTATION={"ENABLED": True, "SLOW_REQUEST_MS": 60_000})
+class TestPerformanceMiddleware(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="drake", password="testpass123")
+        self.client.force_login(self.user)
+        self.records = []
+        PerformanceMiddleware.observers.append(self._observe)
+        self.addCleanup(PerformanceMiddleware.observers.remove, self._observe)
+
+    def _observe(self, request, response, record):
+        self.records.append(record)
+
+    def test_records_view_queries_render_and_size(self):
+        resp = self.client.get(reverse("budget_dashboard"))
+
+        record = self.records[-1]
+        self.assertEqual(record["view"], "budget_dashboard")
+        self.assertEqual(record["status"], 200)
+        self.assertGreater(record["db_queries"], 0)
+        self.assertIsNotNone(record["render_ms"])
+        self.assertEqual(record["response_bytes"], len(resp.content))
+
+    async def test_records_queries_when_served_async(self):
+        await self.async_client.aforce_login(self.user)
+        resp = await self.async_client.get(reverse("budget_dashboard"))
+
+        record = self.records[-1]
+        self.assertEqual(record["view"], "budget_dashboard")
+        self.assertGreater(record["db_queries"], 0)
+        self.assertIsNotNone(record["render_ms"])
+        self.assertEqual(record["response_bytes"], len(resp.content))
+
+    @override_settings(PERF_INSTRUMENTATION={"SLOW_REQUEST_MS": 0})
+    def test_slow_requests_are_logged_with_sql(self):
+        with self.assertLogs("budget.perf", level="WARNING") as logs:
+            self.client.get(reverse("budget_dashboard"))
+
+        record = json.loads(logs.records[-1].getMessage())
+        self.assertEqual(record["view"], "budget_dashboard")
+        self.assertTrue(record["slow_queries"])
+        self.assertIn("SELECT", record["slow_queries"][0]["sql"])
+
+    @override_settings(PERF_INSTRUMENTATION={"ENABLED": False})
+    def test_disabled_middleware_is_not_installed(self):
+        with self.assertRaises(MiddlewareNotUsed):
+            PerformanceMiddleware(lambda request: None)
@@ -0,0 +1,71 @@
+import os
+import tempfile
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from budget import metrics
+
+User = get_user_model()
+
+
+class TestMetricsEndpoint(TestCase):
+    def setUp(self):
+        metrics.registry.reset()
+        self.user = User.objects.create_user(username="drake", password="testpass123")
+
+    @override_settings(
+        METRICS_TOKEN="secret",
+        PERF_INSTRUMENTATION={"ENABLED": True, "SLOW_REQUEST_MS": 60_000},
+    )
+    def test_exposes_request_and_auth_metrics(self):
+        self.client.login(username="drake", password="testpass123")
+        self.client.get(reverse("budget_dashboard"))
+
+        resp = self.client.get(reverse("metrics"), HTTP_AUTHORIZATION="Bearer secret")
+
+        self.assertEqual(resp.status_code, 200)
+        self.assertTrue(resp["Content-Type"].startswith("text/plain; version=0.0.4"))
+        body = resp.content.decode()
+        self.assertIn("# TYPE budget_request_duration_seconds histogram", body)
+        self.assertIn(
+            'budget_request_duration_seconds_count{view="budget_dashboard"} 1', body
+        )
+        self.assertIn(
+            'budget_requests_total{view="budget_dashboard",method="GET",status="200"} 1',
+            body,
+        )
+        self.assertIn("budget_logins_total 1", body)
+        self.assertIn("budget_group_cache_hit_ratio", body)
+
+    @override_settings(METRICS_TOKEN="secret")
+    def test_token_is_required_when_configured(self):
+        self.assertEqual(self.client.get(reverse("metrics")).status_code, 403)
+
+        resp = self.client.get(reverse("metrics"), HTTP_AUTHORIZATION="Bearer secret")
+        self.assertEqual(resp.status_code, 200)
+
+    @override_settings(METRICS_TOKEN=None)
+    def test_hidden_without_a_token_unless_debugging(self):
+        self.assertEqual(self.client.get(reverse("metrics")).status_code, 404)
+
+        with self.settings(DEBUG=True):
+            self.assertEqual(self.client.get(reverse("metrics")).status_code, 200)
+
+    def test_shared_file_aggregates_across_processes(self):
+        handle, path = tempfile.mkstemp(suffix=".sqlite3")
+        os.close(handle)
+        self.addCleanup(os.remove, path)
+
+        with override_settings(METRICS_DB=path, METRICS_FLUSH_INTERVAL=3600):
+            metrics.registry.reset()
+            other_worker = metrics.Registry()
+            other_worker.add(("budget_signups_total", (), ""), 2)
+            other_worker.flush()
+
+            metrics.SIGNUPS.inc()
+            body = metrics.registry.render()
+            metrics.registry.reset()
+
+        self.assertIn("budget_signups_total 3", body)
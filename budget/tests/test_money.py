@@ -0,0 +1,77 @@
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError
+from django.db import connections
+from django.db.models import Sum
+from django.test import SimpleTestCase
+
+from budget import services
+from budget.forms import ProfileForm
+from budget.models import Category, Expense, FamilyGroup, Goal, Profile
+from budget.money import Money, MoneyField
+from budget.tests.utils import HouseholdTestCase
+
+User = get_user_model()
+
+
+class TestMoney(SimpleTestCase):
+    def test_rounds_to_cents_and_converts(self):
+        self.assertEqual(str(Money("10.005")), "10.01")
+        self.assertEqual(Money(0.1).cents, 10)
+        self.assertEqual(Money.from_cents(-1999), Decimal("-19.99"))
+        self.assertEqual(Money("5") + Decimal("0.25"), Decimal("5.25"))
+
+    def test_field_cleaning(self):
+        field = MoneyField(max_digits=6)
+        self.assertEqual(field.clean("12.5", None), Money("12.50"))
+        with self.assertRaises(ValidationError):
+            field.clean("abc", None)
+        with self.assertRaises(ValidationError):
+            field.clean("12345.00", None)
+
+
+class TestMoneyStorage(HouseholdTestCase):
+    def setUp(self):
+        super().setUp()
+        self.owner = User.objects.create_user(username="owner", password="pw12345")
+        self.group = FamilyGroup.objects.create(name="Fam", code="M123", owner=self.owner)
+        self.profile = Profile.objects.get(user=self.owner)
+        self.profile.group = self.group
+        self.profile.save()
+        self.food = Category.objects.create(group=self.group, name="Food")
+
+    def test_columns_hold_integer_cents(self):
+        Goal.objects.create(group=self.group, name="Trip", target_amount=Decimal("1234.56"))
+        with connections[self.household_db].cursor() as cursor:
+            cursor.execute("SELECT target_amount FROM budget_goal")
+            self.assertEqual(cursor.fetchone(), (123456,))
+
+        goal = Goal.objects.get()
+        self.assertIsInstance(goal.target_amount, Money)
+        self.assertEqual(goal.target_amount, Decimal("1234.56"))
+        self.assertEqual(Goal.objects.filter(target_amount__gt=Decimal("1234.55")).count(), 1)
+
+    def test_sums_are_exact(self):
+        services.apply_profile_edit(self.profile, {}, [(self.food, Decimal("0.10"))] * 30)
+
+        total = Expense.objects.aggregate(total=Sum("amount"))["total"]
+        self.assertEqual(total, Decimal("3.00"))
+        self.assertIsInstance(total, Money)
+        self.profile.refresh_from_db()
+        self.assertEqual(self.profile.expenses, Decimal("3.00"))
+
+    def test_profile_form_keeps_decimal_validation(self):
+        form = ProfileForm(
+            data={"nickname": "", "income": "1000.555", "expenses": "20"},
+            instance=self.profile,
+        )
+        self.assertFalse(form.is_valid())
+        self.assertIn("income", form.errors)
+
+        form = ProfileForm(
+            data={"nickname": "", "income": "1000.55", "expenses": "20"},
+            instance=self.profile,
+        )
+        self.assertTrue(form.is_valid(), form.errors)
+        self.assertEqual(form.cleaned_data["income"], Money("1000.55"))
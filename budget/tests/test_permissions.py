@@ -2,19 +2,20 @@
 
 from decimal import Decimal
 
-from django.test import TestCase
 from django.urls import reverse
 from django.contrib.auth import get_user_model
 
 from budget.models import Profile, FamilyGroup
+from budget.tests.utils import HouseholdTestCase
 
 User = get_user_model()
 
 
-class TestPermissions(TestCase):
+class TestPermissions(HouseholdTestCase):
 
 
     def setUp(self):
+        super().setUp()
 
         self.owner = User.objects.create_user(username="owner", password="pw12345")
         self.member = User.objects.create_user(username="member", password="pw12345")
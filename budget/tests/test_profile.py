@@ -3,10 +3,15 @@ from django.urls import reverse
 from django.contrib.auth import get_user_model
 from decimal import Decimal
 
+from budget.tests.utils import ALL_DATABASES
+
 User = get_user_model()
 
 
 class TestProfile(TestCase):
+    # Deleting a profile looks for its expenses on every shard.
+    databases = ALL_DATABASES
+
     def setUp(self):
         self.user = User.objects.create_user(username="drake", password="testpass123")
 
@@ -34,3 +39,20 @@ class TestProfile(TestCase):
         profile = Profile.objects.get(user=self.user)
         self.assertEqual(profile.income, Decimal("5000.00"))
         self.assertEqual(profile.expenses, Decimal("1200.00"))
+
+    def test_profile_created_with_user(self):
+        from budget.models import Profile
+
+        self.assertTrue(Profile.objects.filter(user=self.user).exists())
+
+    def test_backfill_creates_missing_profiles(self):
+        from io import StringIO
+
+        from django.core.management import call_command
+        from budget.models import Profile
+
+        Profile.objects.filter(user=self.user).delete()
+
+        call_command("backfill_profiles", stdout=StringIO())
+
+        self.assertTrue(Profile.objects.filter(user=self.user).exists())
@@ -0,0 +1,116 @@
+import pstats
+import shutil
+import sys
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from io import StringIO
+from pathlib import Path
+from unittest import mock
+
+from asgiref.sync import async_to_sync
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from budget import profiling
+
+User = get_user_model()
+
+
+class TestRequestProfiling(TestCase):
+    def setUp(self):
+        self.profile_dir = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.profile_dir)
+        self.settings_override = override_settings(PROFILING={"DIR": self.profile_dir})
+        self.settings_override.enable()
+        self.addCleanup(self.settings_override.disable)
+        self.user = User.objects.create_user(username="rhea", password="testpass123")
+
+    def test_staff_header_captures_profile_and_collapsed_stacks(self):
+        self.user.is_staff = True
+        self.user.save()
+        self.client.login(username="rhea", password="testpass123")
+
+        resp = self.client.get(reverse("budget_dashboard"), HTTP_X_BUDGET_PROFILE="1")
+
+        self.assertEqual(resp.status_code, 200)
+        prof = self.profile_dir / resp["X-Budget-Profile-File"]
+        self.assertTrue(prof.exists())
+        self.assertIn("budget_dashboard", prof.name)
+        collapsed = prof.with_suffix(".collapsed.txt").read_text()
+        for line in collapsed.splitlines():
+            self.assertRegex(line, r"^\S+:\w+:\d+(;\S+:\S+:\d+)* \d+$")
+
+        out = StringIO()
+        call_command("profile_summary", view="budget_dashboard", limit=50, stdout=out)
+        self.assertIn("1 profile(s)", out.getvalue())
+        self.assertIn("views.py:", out.getvalue())
+
+    async def test_staff_flag_under_async_client(self):
+        self.user.is_staff = True
+        await self.user.asave()
+        await self.async_client.aforce_login(self.user)
+
+        resp = await self.async_client.get(reverse("budget_dashboard") + "?_profile=1")
+
+        self.assertEqual(resp.status_code, 200)
+        self.assertTrue((self.profile_dir / resp["X-Budget-Profile-File"]).exists())
+
+    def test_flag_is_ignored_for_non_staff(self):
+        self.client.login(username="rhea", password="testpass123")
+
+        with mock.patch("budget.profiling.ThreadProfiler") as profiler:
+            resp = self.client.get(reverse("budget_dashboard") + "?_profile=1")
+            anonymous = self.client_class().get(
+                reverse("budget_home"), HTTP_X_BUDGET_PROFILE="1"
+            )
+
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(anonymous.status_code, 200)
+        self.assertNotIn("X-Budget-Profile-File", resp)
+        # The profiler is never even started for them.
+        profiler.assert_not_called()
+        self.assertEqual(list(self.profile_dir.glob("*.prof")), [])
+
+    def test_sampling_profiles_budget_views(self):
+        with override_settings(PROFILING={"DIR": self.profile_dir, "SAMPLE_RATE": 1.0}):
+            self.client.login(username="rhea", password="testpass123")
+            self.client.get(reverse("budget_dashboard"))
+
+        self.assertEqual(len(list(self.profile_dir.glob("*budget_dashboard*.prof"))), 1)
+
+
+def _inside_the_loop():
+    return sum(range(10))
+
+
+async def _async_view():
+    return _inside_the_loop()
+
+
+class TestThreadProfiler(SimpleTestCase):
+    def dump(self, profiler):
+        path = Path(tempfile.mkdtemp()) / "run.prof"
+        self.addCleanup(shutil.rmtree, path.parent)
+        profiler.dump_stats(path)
+        return {name for _file, _line, name in pstats.Stats(str(path)).stats}
+
+    def test_follows_the_async_to_sync_loop_thread(self):
+        profiler = profiling.ThreadProfiler()
+        profiler.enable()
+        async_to_sync(_async_view)()
+        profiler.disable()
+
+        self.assertIn("_inside_the_loop", self.dump(profiler))
+
+    def test_other_threads_are_left_unprofiled(self):
+        with ThreadPoolExecutor(max_workers=1) as pool:
+            profiler = profiling.ThreadProfiler()
+            profiler.enable()
+            # Started while profiling, but not running anything of the request.
+            pool.submit(_inside_the_loop).result()
+            profiler.disable()
+            self.dump(profiler)
+
+            self.assertIsNone(pool.submit(sys.getprofile).result())
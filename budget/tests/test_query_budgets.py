@@ -0,0 +1,93 @@
+from contextlib import ExitStack
+
+from django.core.cache import cache
+from django.db import connections
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from budget.models import FamilyGroup
+from budget.query_budgets import QUERY_BUDGETS
+from budget.seeding import seed_budget
+from budget.tests.utils import ALL_DATABASES
+
+SCALES = (1, 10, 100)
+
+
+def explain(sql, alias):
+    if not sql.lstrip().upper().startswith("SELECT"):
+        return "(not a SELECT)"
+    connection = connections[alias]
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(connection.ops.explain_query_prefix() + " " + sql)
+            return "\n".join("    " + " ".join(map(str, row)) for row in cursor.fetchall())
+    except Exception as exc:  # the captured SQL has parameters inlined
+        return f"    (EXPLAIN failed: {exc})"
+
+
+def describe(queries):
+    lines = []
+    for number, (alias, query) in enumerate(queries, start=1):
+        lines.append(f"{number}. [{alias}] {query['sql']}")
+        lines.append(explain(query["sql"], alias))
+    return "\n".join(lines)
+
+
+class TestQueryBudgets(TestCase):
+    databases = ALL_DATABASES
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owners = {}
+        for scale in SCALES:
+            summary = seed_budget(
+                users=2 * scale,
+                group_size=2 * scale,
+                categories=3 * scale,
+                goals=2 * scale,
+                expenses_per_member=3,
+                months=3,
+                seed=scale,
+            )
+            group = FamilyGroup.objects.select_related("owner").get(
+                owner__username=f"{summary['username_prefix']}0"
+            )
+            cls.owners[scale] = group.owner
+
+    def _run(self, url_name, owner):
+        cache.clear()
+        self.client.force_login(owner)
+        with ExitStack() as stack:
+            captures = {
+                alias: stack.enter_context(CaptureQueriesContext(connections[alias]))
+                for alias in sorted(self.databases)
+            }
+            response = self.client.get(reverse(url_name))
+            if response.streaming:
+                b"".join(response.streaming_content)
+        self.assertLess(response.status_code, 400, url_name)
+        # Household queries run on the group's shard when sharding is on.
+        return [
+            (alias, query)
+            for alias, captured in captures.items()
+            for query in captured.captured_queries
+        ]
+
+    def test_views_stay_within_budget_at_every_scale(self):
+        for url_name, budget in QUERY_BUDGETS.items():
+            with self.subTest(view=url_name):
+                runs = {scale: self._run(url_name, self.owners[scale]) for scale in SCALES}
+                counts = {scale: len(captured) for scale, captured in runs.items()}
+
+                largest = runs[SCALES[-1]]
+                if len(set(counts.values())) != 1:
+                    self.fail(
+                        f"{url_name}: query count grows with data size {counts}\n"
+                        f"Queries at {SCALES[-1]}x:\n{describe(largest)}"
+                    )
+                if counts[SCALES[-1]] > budget:
+                    self.fail(
+                        f"{url_name}: {counts[SCALES[-1]]} queries, budget is {budget}\n"
+                        f"{describe(largest)}"
+                    )
@@ -0,0 +1,60 @@
+from asgiref.sync import sync_to_async
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.test.client import RequestFactory
+from django.urls import reverse
+
+from budget.middleware import BudgetProfileMiddleware
+from budget.models import FamilyGroup, Profile
+
+User = get_user_model()
+
+
+class TestRequestProfile(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.owner = User.objects.create_user(username="owner", password="pw12345")
+        self.member = User.objects.create_user(username="member", password="pw12345")
+
+        self.group = FamilyGroup.objects.create(
+            name="Fam",
+            code="RP123",
+            owner=self.owner,
+        )
+        for user in (self.owner, self.member):
+            profile = Profile.objects.get(user=user)
+            profile.group = self.group
+            profile.save()
+
+    def _request(self):
+        request = RequestFactory().get("/")
+        request.user = self.owner
+        request.auser = sync_to_async(lambda: self.owner)
+        BudgetProfileMiddleware(lambda request: None)(request)
+        return request
+
+    def test_profile_is_loaded_once_per_request(self):
+        request = self._request()
+
+        with self.assertNumQueries(1):
+            self.assertEqual(request.budget_profile.group.owner, self.owner)
+            self.assertEqual(request.budget_profile.nickname, "")
+
+    async def test_async_accessor_shares_the_request_cache(self):
+        request = await sync_to_async(self._request)()
+
+        profile = await request.abudget_profile()
+        self.assertIs(await request.abudget_profile(), profile)
+        # Loading it again would raise SynchronousOnlyOperation here.
+        self.assertEqual(request.budget_profile.pk, profile.pk)
+
+    def test_manage_members_page_query_count(self):
+        self.client.force_login(self.owner)
+
+        # session, user, profile + group + owner, member list
+        with self.assertNumQueries(4):
+            resp = self.client.get(reverse("group_manage_members"))
+
+        self.assertEqual(resp.status_code, 200)
+        self.assertContains(resp, "member")
@@ -0,0 +1,113 @@
+from django.contrib.auth import get_user_model
+from django.db import connections
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+
+from budget import routers
+from budget.models import Category, Profile
+
+User = get_user_model()
+
+
+def write_statement():
+    routers.pin_on_write(
+        lambda *args: None, 'UPDATE "budget_category" SET "name" = %s', ("x",), False, {}
+    )
+
+
+@override_settings(BUDGET_READ_REPLICA="replica", REPLICA_PIN_SECONDS=7)
+class TestReplicaRouter(SimpleTestCase):
+    def setUp(self):
+        tokens = (routers._pinned.set(False), routers._wrote.set(False))
+        self.addCleanup(routers._pinned.reset, tokens[0])
+        self.addCleanup(routers._wrote.reset, tokens[1])
+        self.router = routers.ReplicaRouter()
+
+    def test_budget_reads_go_to_replica_until_a_write(self):
+        self.assertEqual(self.router.db_for_read(Category), "replica")
+        self.assertIsNone(self.router.db_for_read(User))
+
+        # Routing a write (as FK assignment does) doesn't pin by itself.
+        self.assertEqual(self.router.db_for_write(Profile), "default")
+        self.assertEqual(self.router.db_for_read(Category), "replica")
+
+        write_statement()
+        self.assertEqual(self.router.db_for_read(Category), "default")
+
+    def test_only_budget_writes_pin(self):
+        routers.pin_on_write(
+            lambda *args: None, 'SELECT * FROM "budget_category"', (), False, {}
+        )
+        routers.pin_on_write(
+            lambda *args: None, 'UPDATE "django_session" SET "session_data" = %s', ("",), False, {}
+        )
+        self.assertFalse(routers.is_pinned())
+
+    def test_reads_inside_a_primary_transaction_use_the_primary(self):
+        primary = connections["default"]
+        primary.in_atomic_block = True
+        try:
+            self.assertEqual(self.router.db_for_read(Category), "default")
+        finally:
+            primary.in_atomic_block = False
+
+    @override_settings(BUDGET_READ_REPLICA=None)
+    def test_without_a_replica_everything_uses_the_primary(self):
+        self.assertEqual(self.router.db_for_read(Category), "default")
+        self.assertIsNone(self.router.allow_migrate("default", "budget"))
+
+    def test_replica_is_never_migrated(self):
+        self.assertFalse(self.router.allow_migrate("replica", "budget"))
+
+
+@override_settings(BUDGET_READ_REPLICA="replica", REPLICA_PIN_SECONDS=7)
+class TestReplicaPinningMiddleware(SimpleTestCase):
+    def setUp(self):
+        token = routers._pinned.set(False)
+        self.addCleanup(routers._pinned.reset, token)
+        self.factory = RequestFactory()
+        self.seen = []
+
+    def _run(self, request, write=False):
+        def view(request):
+            if write:
+                write_statement()
+            self.seen.append(routers.ReplicaRouter().db_for_read(Category))
+            return HttpResponse()
+
+        return routers.ReplicaPinningMiddleware(view)(request)
+
+    def test_write_pins_the_request_and_sets_the_cookie(self):
+        response = self._run(self.factory.get("/"), write=True)
+
+        self.assertEqual(self.seen, ["default"])
+        self.assertEqual(response.cookies[routers.PIN_COOKIE]["max-age"], 7)
+        self.assertFalse(routers.is_pinned())
+
+    def test_plain_read_uses_replica_without_cookie(self):
+        response = self._run(self.factory.get("/"))
+
+        self.assertEqual(self.seen, ["replica"])
+        self.assertNotIn(routers.PIN_COOKIE, response.cookies)
+
+    def test_cookie_or_unsafe_method_pins_reads(self):
+        request = self.factory.get("/")
+        request.COOKIES[routers.PIN_COOKIE] = "1"
+        self._run(request)
+        self._run(self.factory.post("/"))
+
+        self.assertEqual(self.seen, ["default", "default"])
+
+
+@override_settings(BUDGET_READ_REPLICA="replica")
+class TestPinOnWrite(TestCase):
+    def test_saving_a_budget_row_pins_but_building_one_does_not(self):
+        user = User.objects.create_user(username="pin")
+        token = routers._pinned.set(False)
+        self.addCleanup(routers._pinned.reset, token)
+
+        Category(group_id=1, name="Food")
+        self.assertFalse(routers.is_pinned())
+
+        Profile.objects.filter(user=user).update(nickname="P")
+        self.assertTrue(routers.is_pinned())
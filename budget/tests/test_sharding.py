@@ -0,0 +1,173 @@
+import threading
+import unittest
+from decimal import Decimal
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from budget import services, sharding
+from budget.models import (
+    Category,
+    Expense,
+    FamilyGroup,
+    Goal,
+    MonthlyCategoryTotal,
+    Profile,
+)
+
+User = get_user_model()
+
+SHARDS = ["shard_a", "shard_b", "shard_c", "shard_d"]
+
+
+class TestHashRing(SimpleTestCase):
+    def test_placement_is_stable_and_spread_out(self):
+        ring = sharding.HashRing(SHARDS)
+        placement = [ring.node_for(group_id) for group_id in range(1, 2001)]
+
+        self.assertEqual(placement, [ring.node_for(group_id) for group_id in range(1, 2001)])
+        for alias in SHARDS:
+            self.assertGreater(placement.count(alias), 300)
+
+    def test_adding_a_shard_moves_about_one_in_n_groups(self):
+        before = sharding.HashRing(SHARDS)
+        after = sharding.HashRing(SHARDS + ["shard_e"])
+        moved = [
+            group_id for group_id in range(1, 2001)
+            if before.node_for(group_id) != after.node_for(group_id)
+        ]
+
+        self.assertLess(len(moved), 2000 * 0.3)
+        self.assertTrue(all(after.node_for(group_id) == "shard_e" for group_id in moved))
+
+
+@override_settings(BUDGET_SHARDS=SHARDS)
+class TestShardRouter(SimpleTestCase):
+    def setUp(self):
+        token = sharding._scope.set(None)
+        self.addCleanup(sharding._scope.reset, token)
+        self.router = sharding.ShardRouter()
+
+    def test_household_models_need_a_shard(self):
+        with self.assertRaises(sharding.ShardNotSelected):
+            self.router.db_for_read(Category)
+        self.assertIsNone(self.router.db_for_read(Profile))
+        self.assertIsNone(self.router.db_for_write(FamilyGroup))
+
+    def test_group_scope_routes_to_the_hashed_or_pinned_shard(self):
+        group = FamilyGroup(pk=7)
+        with sharding.group_scope(group) as alias:
+            self.assertEqual(alias, sharding.hashed_shard(7))
+            self.assertEqual(self.router.db_for_read(Expense), alias)
+            self.assertEqual(self.router.db_for_write(MonthlyCategoryTotal), alias)
+
+        pinned = FamilyGroup(pk=7, shard="shard_d")
+        with sharding.group_scope(pinned):
+            self.assertEqual(self.router.db_for_read(Category), "shard_d")
+
+    def test_instance_hints_win_over_the_scope(self):
+        stored = Category(group_id=7)
+        stored._state.db = "shard_c"
+        cache.set(sharding._shard_cache_key(8), "shard_b")
+        self.addCleanup(sharding.forget_shard, 8)
+
+        with sharding.group_scope(FamilyGroup(pk=7, shard="shard_a")):
+            self.assertEqual(self.router.db_for_write(Category, instance=stored), "shard_c")
+            self.assertEqual(
+                self.router.db_for_read(Category, instance=Category(group_id=8)), "shard_b"
+            )
+
+    def test_request_scope_resolves_the_group_once_when_needed(self):
+        calls = []
+
+        def resolve_group():
+            calls.append(1)
+            return FamilyGroup(pk=7, shard="shard_b")
+
+        with sharding.request_scope(resolve_group):
+            self.assertEqual(calls, [])
+            self.assertEqual(self.router.db_for_read(Category), "shard_b")
+            self.assertEqual(self.router.db_for_read(Goal), "shard_b")
+        self.assertEqual(calls, [1])
+
+    def test_fan_out_queries_every_shard_in_parallel(self):
+        threads = {}
+
+        def visit(alias):
+            threads[alias] = threading.get_ident()
+            return alias.upper()
+
+        result = sharding.fan_out(visit)
+
+        self.assertEqual(result, {alias: alias.upper() for alias in SHARDS})
+        self.assertNotIn(threading.get_ident(), threads.values())
+
+
+@override_settings(BUDGET_SHARDS=["default"])
+class TestSingleShard(SimpleTestCase):
+    def test_default_configuration_leaves_routing_alone(self):
+        router = sharding.ShardRouter()
+        self.assertFalse(sharding.is_sharded())
+        self.assertIsNone(router.db_for_read(Category))
+        self.assertEqual(sharding.shard_for_group(FamilyGroup(pk=3)), "default")
+
+
+@unittest.skipUnless(
+    len(settings.BUDGET_SHARDS) > 1, "set BUDGET_SHARD_COUNT=2 to run against shard files"
+)
+class TestShardedHousehold(TestCase):
+    databases = "__all__"
+
+    def setUp(self):
+        self.owner = User.objects.create_user("owner", password="pw")
+        self.group = FamilyGroup.objects.create(name="Fam", code="FAM1", owner=self.owner)
+        self.profile = self.owner.profile
+        services.attach_profile_to_group(self.profile, self.group)
+        with sharding.group_scope(self.group):
+            self.food = Category.objects.create(group=self.group, name="Food")
+        services.record_expenses(
+            self.profile, self.group, [(self.food, Decimal("12.50")), (self.food, Decimal("7.50"))]
+        )
+
+    def test_household_rows_live_on_the_group_shard_only(self):
+        home = sharding.shard_for_group(self.group)
+        for alias in settings.BUDGET_SHARDS:
+            expected = 2 if alias == home else 0
+            self.assertEqual(Expense.objects.using(alias).count(), expected)
+        self.assertEqual(Expense.objects.using("default").count(), 0)
+
+    def test_move_group_copies_everything_and_pins_the_group(self):
+        source = sharding.shard_for_group(self.group)
+        target = next(alias for alias in settings.BUDGET_SHARDS if alias != source)
+
+        moved = sharding.move_group(self.group, target)
+
+        self.assertEqual(moved["expense"], 2)
+        self.assertEqual(Expense.objects.using(source).count(), 0)
+        self.assertEqual(FamilyGroup.objects.get(pk=self.group.pk).shard, target)
+        total = MonthlyCategoryTotal.objects.using(target).get(group=self.group)
+        self.assertEqual((total.total, total.entry_count), (Decimal("20.00"), 2))
+        self.assertEqual(
+            Expense.objects.using(target).get(amount=Decimal("12.50")).category_id,
+            total.category_id,
+        )
+
+    def test_deleting_a_member_removes_their_expenses_from_the_shard(self):
+        home = sharding.shard_for_group(self.group)
+        member = User.objects.create_user("member", password="pw")
+        services.attach_profile_to_group(member.profile, self.group)
+        services.record_expenses(member.profile, self.group, [(self.food, Decimal("5.00"))])
+
+        member.delete()
+
+        self.assertEqual(Expense.objects.using(home).count(), 2)
+        total = MonthlyCategoryTotal.objects.using(home).get(group=self.group)
+        self.assertEqual((total.total, total.entry_count), (Decimal("20.00"), 2))
+
+    def test_deleting_the_group_removes_its_shard_data(self):
+        home = sharding.shard_for_group(self.group)
+        self.group.delete()
+        self.assertFalse(Category.objects.using(home).exists())
+        self.assertFalse(Expense.objects.using(home).exists())
@@ -1,25 +1,28 @@
 from decimal import Decimal
 
 from django.contrib.auth import get_user_model
-from django.test import TestCase
 from django.urls import reverse
 
 from budget.models import Profile, FamilyGroup, Category, Goal
+from budget.tests.utils import HouseholdTestCase
 
 User = get_user_model()
 
 
-class TestBudgetLimits(TestCase):
+class TestBudgetLimits(HouseholdTestCase):
     def setUp(self):
+        super().setUp()
         self.owner = User.objects.create_user(
             username="owner", password="testpass123"
         )
-        self.owner_profile = Profile.objects.create(
+        self.owner_profile = Profile.objects.update_or_create(
             user=self.owner,
-            nickname="Boss",
-            income=Decimal("5000.00"),
-            expenses=Decimal("1000.00"),
-        )
+            defaults={
+                "nickname": "Boss",
+                "income": Decimal("5000.00"),
+                "expenses": Decimal("1000.00"),
+            },
+        )[0]
 
         self.group = FamilyGroup.objects.create(
             name="Fam",
@@ -52,27 +55,32 @@ class TestBudgetLimits(TestCase):
         self.assertEqual(self.category.budget_limit, Decimal("500.00"))
 
 
-class TestGoals(TestCase):
+class TestGoals(HouseholdTestCase):
     def setUp(self):
+        super().setUp()
         self.owner = User.objects.create_user(
             username="owner", password="testpass123"
         )
-        self.owner_profile = Profile.objects.create(
+        self.owner_profile = Profile.objects.update_or_create(
             user=self.owner,
-            nickname="Boss",
-            income=Decimal("5000.00"),
-            expenses=Decimal("1000.00"),
-        )
+            defaults={
+                "nickname": "Boss",
+                "income": Decimal("5000.00"),
+                "expenses": Decimal("1000.00"),
+            },
+        )[0]
 
         self.other = User.objects.create_user(
             username="other", password="testpass123"
         )
-        self.other_profile = Profile.objects.create(
+        self.other_profile = Profile.objects.update_or_create(
             user=self.other,
-            nickname="Member",
-            income=Decimal("3000.00"),
-            expenses=Decimal("800.00"),
-        )
+            defaults={
+                "nickname": "Member",
+                "income": Decimal("3000.00"),
+                "expenses": Decimal("800.00"),
+            },
+        )[0]
 
         self.group = FamilyGroup.objects.create(
             name="Fam",
@@ -0,0 +1,85 @@
+import os
+import shutil
+import sqlite3
+import tempfile
+
+from django.db import connection
+from django.test import TestCase, TransactionTestCase
+
+from budget import sharding
+
+# The directory database and every shard, for tests that touch household data.
+ALL_DATABASES = {sharding.DIRECTORY, *sharding.shard_aliases()}
+
+
+class HouseholdTestMixin:
+    """
+    Lets household tests run under BUDGET_SHARD_COUNT=N as well. The test may
+    use every shard database, and queries made outside a request (fixtures,
+    direct ORM checks) go to the shard of `self.group`, the way ShardMiddleware
+    routes a request to the signed-in user's group. Rows of any other group
+    are created inside `sharding.group_scope(other_group)`.
+    """
+
+    databases = ALL_DATABASES
+
+    def setUp(self):
+        super().setUp()
+        token = sharding._scope.set(lambda: sharding.shard_for_group(self.group))
+        self.addCleanup(sharding._scope.reset, token)
+
+    @property
+    def household_db(self):
+        """Alias of the database holding self.group's categories and expenses."""
+        return sharding.shard_for_group(self.group)
+
+
+class HouseholdTestCase(HouseholdTestMixin, TestCase):
+    pass
+
+
+def count_on_shards(queryset):
+    """queryset.count() summed over every shard."""
+    return sum(queryset.using(alias).count() for alias in sharding.shard_aliases())
+
+
+class FileDatabaseTestCase(TransactionTestCase):
+    """
+    TransactionTestCase that runs against a copy of the test database in a
+    temporary SQLite file. The shared in-memory test database locks whole
+    tables, so threads that write at once fail instead of waiting their turn;
+    only tests that need several real connections should pay for a file.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        cls._db_dir = tempfile.mkdtemp(prefix="budget-test-")
+        path = os.path.join(cls._db_dir, "test.sqlite3")
+        connection.ensure_connection()
+        with sqlite3.connect(path) as target:
+            connection.connection.backup(target)
+        target.close()
+
+        # Keep the in-memory connection open (closing it would drop the
+        # database) and let every thread connect to the file instead.
+        cls._memory = (connection.settings_dict["NAME"], connection.connection)
+        connection.connection = None
+        connection.settings_dict["NAME"] = path
+        try:
+            super().setUpClass()
+        except Exception:
+            cls._restore_database()
+            raise
+
+    @classmethod
+    def tearDownClass(cls):
+        try:
+            super().tearDownClass()
+        finally:
+            cls._restore_database()
+
+    @classmethod
+    def _restore_database(cls):
+        connection.close()
+        connection.settings_dict["NAME"], connection.connection = cls._memory
+        shutil.rmtree(cls._db_dir, ignore_errors=True)
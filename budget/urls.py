@@ -7,10 +7,15 @@ from .views import (
     DashboardView,
     SignupView,
     ProfileEditView,
+    ExpenseHistoryView,
+    ExpenseImportView,
+    ExpenseBatchView,
+    BudgetOverviewView,
     GroupJoinView,
     GroupCreateView,
     GroupMembersView,
     GroupLeaveView,
+    GroupExportView,
     ConfirmLogoutView,
     AdminManageMembersView,
     AdminRemoveMemberView,
@@ -27,11 +32,16 @@ urlpatterns = [
 
     # Profile editing
     path("profile/edit/", ProfileEditView.as_view(), name="profile_edit"),
+    path("expenses/history/", ExpenseHistoryView.as_view(), name="expense_history"),
+    path("expenses/import/", ExpenseImportView.as_view(), name="expense_import"),
+    path("expenses/batch/", ExpenseBatchView.as_view(), name="expense_batch"),
+    path("budget/overview/", BudgetOverviewView.as_view(), name="budget_overview"),
 
     path("group/join/", GroupJoinView.as_view(), name="group_join"),
     path("group/create/", GroupCreateView.as_view(), name="group_create"),
     path("group/members/", GroupMembersView.as_view(), name="group_members"),
     path("group/leave/", GroupLeaveView.as_view(), name="group_leave"),
+    path("group/export/", GroupExportView.as_view(), name="group_export"),
 
     path("group/manage-members/", AdminManageMembersView.as_view(), name="group_manage_members"),
     path("group/remove-member/<int:profile_id>/", AdminRemoveMemberView.as_view(), name="group_remove_member"),
@@ -1,38 +1,140 @@
 
+import datetime
+import io
+import json
+import re
 from decimal import Decimal, InvalidOperation
 
 from django.contrib.auth import get_user_model, logout
 from django.contrib.auth.forms import UserCreationForm
 from django.contrib.auth.mixins import LoginRequiredMixin
-from django.http import HttpResponseForbidden
+from django.core.handlers.asgi import ASGIRequest
+from django.http import HttpResponseForbidden, JsonResponse, StreamingHttpResponse
 from django.shortcuts import redirect, get_object_or_404, render
 from django.urls import reverse_lazy
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from django.utils.decorators import method_decorator
 from django.views import View
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import condition
 from django.views.generic import TemplateView, CreateView, UpdateView, FormView
 
-from . import services
-from .forms import ProfileForm
+from . import exports, imports, services
+from .forms import ProfileForm, ExpenseImportForm
 from .forms_group import GroupJoinForm
 from .models import Profile, FamilyGroup, Category, Goal
 
 User = get_user_model()
 
 
+def _selected_month(request):
+    raw = request.GET.get("month", "").strip()
+    try:
+        return datetime.datetime.strptime(raw, "%Y-%m").date()
+    except ValueError:
+        return timezone.localdate().replace(day=1)
+
+
+def _date_param(request, name):
+    try:
+        return parse_date(request.GET.get(name, "").strip())
+    except ValueError:
+        return None
+
+
+# ETag / Last-Modified for the group pages. Everything they show is covered by
+# the group's version and the viewer's profile, so a revalidation costs only
+# the request-profile query and a 304 skips the page queries and rendering.
+def _group_stamp(request):
+    profile = request.budget_profile
+    group = profile.group
+    if group is None:
+        return profile, "none"
+    return profile, f"{group.pk}.{group.version}"
+
+
+def _members_etag(request, *args, **kwargs):
+    _, stamp = _group_stamp(request)
+    return f'"members-{request.user.pk}-{stamp}"'
+
+
+def _dashboard_etag(request, *args, **kwargs):
+    profile, stamp = _group_stamp(request)
+    month = timezone.localdate().strftime("%Y%m")
+    return (
+        f'"dashboard-{request.user.pk}-{profile.updated_at.timestamp()}'
+        f'-{stamp}-{month}"'
+    )
+
+
+def _last_modified(request, *args, **kwargs):
+    profile = request.budget_profile
+    if profile.group is None:
+        return profile.updated_at
+    return max(profile.updated_at, profile.group.updated_at)
+
+
+class AsyncLoginRequiredMixin(LoginRequiredMixin):
+    """
+    LoginRequiredMixin for views with async handlers. The user and the request
+    profile are loaded with the async ORM up front, so the sync code that runs
+    later in the request (ETag functions, templates) never touches the
+    database from the event loop.
+    """
+
+    async def dispatch(self, request, *args, **kwargs):
+        request.user = await request.auser()
+        if not request.user.is_authenticated:
+            return self.handle_no_permission()
+        await request.abudget_profile()
+        return await super(LoginRequiredMixin, self).dispatch(request, *args, **kwargs)
+
+
+class AsyncTemplateView(TemplateView):
+    async def get(self, request, *args, **kwargs):
+        context = await self.aget_context_data(**kwargs)
+        return self.render_to_response(context)
+
+    async def aget_context_data(self, **kwargs):
+        return self.get_context_data(**kwargs)
+
+
 class HomeView(TemplateView):
     template_name = "budget/home.html"
 
 
-class DashboardView(LoginRequiredMixin, TemplateView):
+@method_decorator(cache_control(private=True, no_cache=True), name="get")
+@method_decorator(
+    condition(etag_func=_dashboard_etag, last_modified_func=_last_modified),
+    name="get",
+)
+class DashboardView(AsyncLoginRequiredMixin, AsyncTemplateView):
     template_name = "budget/dashboard.html"
 
-    def get_context_data(self, **kwargs):
-        context = super().get_context_data(**kwargs)
-        profile = services.get_profile(self.request.user)
+    async def aget_context_data(self, **kwargs):
+        context = await super().aget_context_data(**kwargs)
+        profile = await self.request.abudget_profile()
         group = profile.group
 
         context["profile"] = profile
         context["group"] = group
-        context["is_owner"] = bool(group and group.owner == self.request.user)
+        context["is_owner"] = services.is_group_owner(group, self.request.user)
+
+        month_totals = (
+            [
+                row
+                async for row in services.monthly_category_totals(
+                    group, timezone.localdate()
+                )
+            ]
+            if group
+            else []
+        )
+        context["month_totals"] = month_totals
+        context["month_spent"] = sum(
+            (row.total for row in month_totals), Decimal("0")
+        )
 
         return context
 
@@ -43,54 +145,215 @@ class SignupView(CreateView):
     success_url = reverse_lazy("login")
 
 
+CATEGORY_EXPENSE_PREFIX = "category_expense_"
+MAX_BATCH_ITEMS = 1000
+
+
 class ProfileEditView(LoginRequiredMixin, UpdateView):
     template_name = "budget/profile_form.html"
     form_class = ProfileForm
     success_url = reverse_lazy("budget_dashboard")
 
     def get_object(self, queryset=None):
-        return services.get_profile(self.request.user)
+        return self.request.budget_profile
 
     def form_valid(self, form):
-        response = super().form_valid(form)
+        profile = self.object
+        group = profile.group
+        entries = []
+
+        if group:
+            amounts = {}
+            for field_name, raw in self.request.POST.items():
+                category_id = field_name.removeprefix(CATEGORY_EXPENSE_PREFIX)
+                if category_id == field_name or not category_id.isdigit() or not raw.strip():
+                    continue
+                try:
+                    amounts[int(category_id)] = imports.parse_amount(raw)
+                except ValueError as exc:
+                    form.add_error(None, str(exc))
+            if form.errors:
+                return self.form_invalid(form)
+
+            if amounts:
+                categories = Category.objects.filter(group=group, pk__in=amounts)
+                entries = [(category, amounts[category.pk]) for category in categories]
+
+        changes = {name: form.cleaned_data[name] for name in form.changed_data}
+        services.apply_profile_edit(profile, changes, entries)
+        return redirect(self.get_success_url())
 
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
         profile = self.object
         group = profile.group
-        if not group:
-            return response
+        context["categories"] = (
+            Category.objects.filter(group=group).order_by("name") if group else []
+        )
+        return context
 
-        total_extra = Decimal("0")
 
-        for category in Category.objects.filter(group=group):
-            field_name = f"category_expense_{category.id}"
-            raw = self.request.POST.get(field_name, "").strip()
-            if not raw:
-                continue
+class ExpenseHistoryView(LoginRequiredMixin, TemplateView):
+    template_name = "budget/expense_history.html"
 
-            try:
-                amount = Decimal(raw)
-            except InvalidOperation:
-                amount = None
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        profile = self.request.budget_profile
+        group = profile.group
 
-            if amount is not None and amount > 0:
-                total_extra += amount
+        month = _selected_month(self.request)
+        if group is not None:
+            months = list(services.expense_months(group))
+            totals = list(services.monthly_category_totals(group, month))
+        else:
+            months = []
+            totals = []
+
+        context["group"] = group
+        context["month"] = month
+        context["months"] = months
+        context["totals"] = totals
+        context["month_spent"] = sum((row.total for row in totals), Decimal("0"))
+        return context
 
-        if total_extra:
-            current = profile.expenses or Decimal("0")
-            profile.expenses = current + total_extra
-            profile.save(update_fields=["expenses"])
 
-        return response
+class BudgetOverviewView(LoginRequiredMixin, TemplateView):
+    template_name = "budget/budget_overview.html"
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        profile = self.object
+        profile = self.request.budget_profile
         group = profile.group
-        context["categories"] = (
-            Category.objects.filter(group=group).order_by("name") if group else []
+
+        month = _selected_month(self.request)
+        lines = services.budget_vs_actual(group, month) if group else []
+
+        context["group"] = group
+        context["month"] = month
+        context["lines"] = lines
+        return context
+
+
+class GroupExportView(LoginRequiredMixin, View):
+    content_types = {
+        "csv": ("text/csv", exports.stream_csv),
+        "jsonl": ("application/x-ndjson", exports.stream_jsonl),
+    }
+
+    def get(self, request, *args, **kwargs):
+        group = request.budget_profile.group
+        if group is None:
+            return redirect("group_members")
+
+        fmt = request.GET.get("format", "csv")
+        if fmt not in self.content_types:
+            fmt = "csv"
+        content_type, stream = self.content_types[fmt]
+
+        category_id = request.GET.get("category", "").strip()
+        sections = exports.export_sections(
+            group,
+            start=_date_param(request, "start"),
+            end=_date_param(request, "end"),
+            category_id=int(category_id) if category_id.isdigit() else None,
         )
+        lines = stream(sections)
+        if isinstance(request, ASGIRequest):
+            lines = exports.astream(lines)
+        response = StreamingHttpResponse(lines, content_type=content_type)
+        response["Content-Disposition"] = (
+            f'attachment; filename="budget-{group.code}.{fmt}"'
+        )
+        return response
+
+
+class ExpenseImportView(LoginRequiredMixin, FormView):
+    template_name = "budget/expense_import.html"
+    form_class = ExpenseImportForm
+
+    def dispatch(self, request, *args, **kwargs):
+        if not request.user.is_authenticated:
+            return self.handle_no_permission()
+
+        profile = request.budget_profile
+        group = profile.group
+
+        if not group or (
+            not services.is_group_owner(group, request.user) and not profile.is_admin
+        ):
+            return HttpResponseForbidden(
+                "Only the group owner or an admin can import expenses."
+            )
+
+        self.group = group
+        self.profile = profile
+        return super().dispatch(request, *args, **kwargs)
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context["group"] = self.group
         return context
 
+    def form_valid(self, form):
+        upload = io.TextIOWrapper(
+            form.cleaned_data["file"].file, encoding="utf-8-sig", newline=""
+        )
+        report = imports.import_expenses(
+            self.group,
+            self.profile,
+            upload,
+            dry_run=form.cleaned_data["dry_run"],
+        )
+        return self.render_to_response(
+            self.get_context_data(form=self.form_class(), report=report)
+        )
+
+
+class ExpenseBatchView(LoginRequiredMixin, View):
+    """
+    POST a JSON list of {"category_id", "amount", "date", "note"} items (or
+    {"items": [...]}) to record several expenses at once. Either every item is
+    saved or none is, with per-item errors in the 400 response.
+    """
+
+    def post(self, request, *args, **kwargs):
+        profile = request.budget_profile
+        group = profile.group
+        if not group:
+            return JsonResponse(
+                {"errors": [{"index": None, "error": "Join a family group first."}]},
+                status=403,
+            )
+
+        try:
+            payload = json.loads(request.body)
+        except ValueError:
+            return JsonResponse(
+                {"errors": [{"index": None, "error": "Invalid JSON."}]}, status=400
+            )
+        items = payload.get("items") if isinstance(payload, dict) else payload
+        if isinstance(items, list) and len(items) > MAX_BATCH_ITEMS:
+            return JsonResponse(
+                {"errors": [{
+                    "index": None,
+                    "error": f"At most {MAX_BATCH_ITEMS} items per request.",
+                }]},
+                status=400,
+            )
+
+        expenses, errors = imports.build_expense_batch(group, profile, items)
+        if errors:
+            return JsonResponse({"errors": errors}, status=400)
+
+        services.save_expenses(group, expenses)
+        return JsonResponse(
+            {
+                "created": len(expenses),
+                "total": str(sum((e.amount for e in expenses), Decimal("0"))),
+            },
+            status=201,
+        )
+
 
 class GroupJoinView(LoginRequiredMixin, FormView):
     template_name = "budget/group_join.html"
@@ -98,7 +361,7 @@ class GroupJoinView(LoginRequiredMixin, FormView):
     success_url = reverse_lazy("group_members")
 
     def form_valid(self, form):
-        profile = services.get_profile(self.request.user)
+        profile = self.request.budget_profile
 
         if not services.can_join_or_create_group(profile):
             form.add_error(
@@ -129,7 +392,7 @@ class GroupCreateView(LoginRequiredMixin, CreateView):
     success_url = reverse_lazy("group_members")
 
     def form_valid(self, form):
-        profile = services.get_profile(self.request.user)
+        profile = self.request.budget_profile
 
         if not services.can_join_or_create_group(profile):
             form.add_error(None, "You are already in a family group.")
@@ -145,28 +408,29 @@ class GroupCreateView(LoginRequiredMixin, CreateView):
         return response
 
 
-class GroupMembersView(LoginRequiredMixin, TemplateView):
+@method_decorator(cache_control(private=True, no_cache=True), name="get")
+@method_decorator(
+    condition(etag_func=_members_etag, last_modified_func=_last_modified),
+    name="get",
+)
+class GroupMembersView(AsyncLoginRequiredMixin, AsyncTemplateView):
     template_name = "budget/group_members.html"
 
-    def get_context_data(self, **kwargs):
-        context = super().get_context_data(**kwargs)
-        profile = services.get_profile(self.request.user)
+    async def aget_context_data(self, **kwargs):
+        context = await super().aget_context_data(**kwargs)
+        profile = await self.request.abudget_profile()
         group = profile.group
 
         if group is not None:
-            members = services.build_members_list(group)
-            categories = Category.objects.filter(group=group).order_by("name")
-            goals = Goal.objects.filter(group=group).order_by("created_at")
+            overview = await services.agroup_overview(group)
         else:
-            members = []
-            categories = []
-            goals = []
+            overview = {"members": [], "categories": [], "goals": []}
 
         context["group"] = group
-        context["members"] = members
-        context["categories"] = categories
-        context["goals"] = goals
-        context["is_owner"] = bool(group and group.owner == self.request.user)
+        context["members"] = overview["members"]
+        context["categories"] = overview["categories"]
+        context["goals"] = overview["goals"]
+        context["is_owner"] = services.is_group_owner(group, self.request.user)
 
         return context
 
@@ -174,7 +438,7 @@ class GroupMembersView(LoginRequiredMixin, TemplateView):
 
 class GroupLeaveView(LoginRequiredMixin, View):
     def post(self, request, *args, **kwargs):
-        profile = services.get_profile(request.user)
+        profile = request.budget_profile
         if profile.group is not None:
             profile.group = None
             profile.is_admin = False
@@ -198,26 +462,37 @@ class ConfirmLogoutView(LoginRequiredMixin, View):
 class AdminManageMembersView(LoginRequiredMixin, TemplateView):
     template_name = "budget/admin_manage_members.html"
 
-    def _get_profile_and_group(self, user):
-        profile = services.get_profile(user)
+    @staticmethod
+    def _get_profile_and_group(request):
+        profile = request.budget_profile
         group = profile.group
 
         if group is None:
-            group = FamilyGroup.objects.filter(owner=user).first()
+            group = (
+                FamilyGroup.objects.select_related("owner")
+                .filter(owner=request.user)
+                .first()
+            )
 
         return profile, group
 
     def dispatch(self, request, *args, **kwargs):
-        profile, group = self._get_profile_and_group(request.user)
-        if not group or group.owner != request.user:
+        if not request.user.is_authenticated:
+            return self.handle_no_permission()
+
+        profile, group = self._get_profile_and_group(request)
+        if not services.is_group_owner(group, request.user):
             return redirect("group_members")
+
+        self.profile = profile
+        self.group = group
         return super().dispatch(request, *args, **kwargs)
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        profile, group = self._get_profile_and_group(self.request.user)
+        group = self.group
 
-        members = services.build_members_list(group) if group else []
+        members = services.cached_members_list(group) if group else []
         context["group"] = group
         context["members"] = members
         context["error"] = getattr(self, "_error", "")
@@ -225,13 +500,14 @@ class AdminManageMembersView(LoginRequiredMixin, TemplateView):
         return context
 
     def post(self, request, *args, **kwargs):
-        profile, group = self._get_profile_and_group(request.user)
-
-        if not group or group.owner != request.user:
-            return redirect("group_members")
-
+        group = self.group
         action = request.POST.get("action", "").strip()
 
+        usernames = request.POST.get("usernames", "")
+        profile_ids = request.POST.getlist("member_profile_ids")
+        if usernames.strip() or profile_ids:
+            return self._bulk_post(action, usernames, profile_ids)
+
         if action == "add":
             username = request.POST.get("username", "").strip()
             if not username:
@@ -244,8 +520,6 @@ class AdminManageMembersView(LoginRequiredMixin, TemplateView):
                 else:
                     profile_to_add = services.get_profile(user_to_add)
                     services.attach_profile_to_group(profile_to_add, group)
-                    profile_to_add.is_admin = False
-                    profile_to_add.save()
 
         elif action == "remove":
             member_profile_id = request.POST.get("member_profile_id")
@@ -253,10 +527,10 @@ class AdminManageMembersView(LoginRequiredMixin, TemplateView):
                 member_profile = get_object_or_404(
                     Profile, pk=member_profile_id, group=group
                 )
-                if member_profile.user != request.user:
+                if member_profile.user_id != request.user.pk:
                     member_profile.group = None
                     member_profile.is_admin = False
-                    member_profile.save()
+                    member_profile.save(update_fields=["group", "is_admin", "updated_at"])
 
         elif action in {"promote", "demote"}:
             member_profile_id = request.POST.get("member_profile_id")
@@ -265,29 +539,50 @@ class AdminManageMembersView(LoginRequiredMixin, TemplateView):
                     Profile, pk=member_profile_id, group=group
                 )
                 if (
-                    member_profile.user != request.user
-                    and member_profile.user != group.owner
+                    member_profile.user_id != request.user.pk
+                    and member_profile.user_id != group.owner_id
                 ):
                     member_profile.is_admin = action == "promote"
-                    member_profile.save()
+                    member_profile.save(update_fields=["is_admin", "updated_at"])
 
         return redirect("group_manage_members")
 
+    def _bulk_post(self, action, usernames, profile_ids):
+        if action not in services.MEMBER_ACTIONS:
+            self._error = "Please choose an action."
+            return self.render_to_response(self.get_context_data())
+        try:
+            profile_ids = [int(pk) for pk in profile_ids]
+        except ValueError:
+            self._error = "Invalid member selection."
+            return self.render_to_response(self.get_context_data())
+
+        results = services.bulk_manage_members(
+            self.group,
+            self.request.user,
+            action,
+            usernames=[name.strip() for name in re.split(r"[\s,]+", usernames)],
+            profile_ids=profile_ids,
+        )
+        # The write bumped the group version; render the members under the new one.
+        self.group.refresh_from_db()
+        return self.render_to_response(self.get_context_data(results=results))
+
 
 class AdminRemoveMemberView(LoginRequiredMixin, View):
     def post(self, request, profile_id, *args, **kwargs):
-        current_profile, group = AdminManageMembersView()._get_profile_and_group(
-            request.user
+        current_profile, group = AdminManageMembersView._get_profile_and_group(
+            request
         )
 
-        if not group or group.owner != request.user:
+        if not services.is_group_owner(group, request.user):
             return redirect("group_members")
 
         member_profile = get_object_or_404(Profile, pk=profile_id, group=group)
 
-        if member_profile.user != request.user:
+        if member_profile.user_id != request.user.pk:
             member_profile.group = None
-            member_profile.save()
+            member_profile.save(update_fields=["group", "updated_at"])
 
         return redirect("group_manage_members")
 
@@ -296,10 +591,15 @@ class CategoryManageView(LoginRequiredMixin, TemplateView):
     template_name = "budget/category_manage.html"
 
     def dispatch(self, request, *args, **kwargs):
-        profile = services.get_profile(request.user)
+        if not request.user.is_authenticated:
+            return self.handle_no_permission()
+
+        profile = request.budget_profile
         group = profile.group
 
-        if not group or (group.owner != request.user and not profile.is_admin):
+        if not group or (
+            not services.is_group_owner(group, request.user) and not profile.is_admin
+        ):
             return HttpResponseForbidden(
                 "Only the group owner or an admin can manage categories."
             )
@@ -310,13 +610,25 @@ class CategoryManageView(LoginRequiredMixin, TemplateView):
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
+        categories = list(Category.objects.filter(group=self.group).order_by("name"))
         context["group"] = self.group
-        context["categories"] = Category.objects.filter(
-            group=self.group
-        ).order_by("name")
+        context["categories"] = categories
+        context.setdefault(
+            "bulk_text",
+            "\n".join(
+                f"{category.name}, {category.budget_limit}"
+                if category.budget_limit
+                # A trailing comma keeps names that contain commas unambiguous.
+                else category.name + ("," if "," in category.name else "")
+                for category in categories
+            ),
+        )
         return context
 
     def post(self, request, *args, **kwargs):
+        if "bulk_categories" in request.POST:
+            return self._bulk_post(request)
+
         name = request.POST.get("name", "").strip()
         if name:
             Category.objects.get_or_create(group=self.group, name=name)
@@ -341,15 +653,35 @@ class CategoryManageView(LoginRequiredMixin, TemplateView):
 
         return redirect("category_manage")
 
+    def _bulk_post(self, request):
+        text = request.POST.get("bulk_categories", "")
+        limits, errors = imports.parse_category_lines(text)
+        if errors:
+            return self.render_to_response(
+                self.get_context_data(bulk_errors=errors, bulk_text=text)
+            )
+
+        summary = services.sync_categories(
+            self.group,
+            limits,
+            remove_missing=request.POST.get("remove_missing") == "on",
+        )
+        return self.render_to_response(self.get_context_data(bulk_summary=summary))
+
 
 class GoalManageView(LoginRequiredMixin, TemplateView):
     template_name = "budget/goals_manage.html"
 
     def dispatch(self, request, *args, **kwargs):
-        profile = services.get_profile(request.user)
+        if not request.user.is_authenticated:
+            return self.handle_no_permission()
+
+        profile = request.budget_profile
         group = profile.group
 
-        if not group or (group.owner != request.user and not profile.is_admin):
+        if not group or (
+            not services.is_group_owner(group, request.user) and not profile.is_admin
+        ):
             return HttpResponseForbidden(
                 "Only the group owner or an admin can manage goals."
             )
@@ -12,5 +12,8 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'mysite.settings')
+# Under ASGI the ORM runs in short-lived per-request threads, so connections
+# kept open for reuse would never be reused; close them after each request.
+os.environ.setdefault('BUDGET_CONN_MAX_AGE', '0')
 
 application = get_asgi_application()
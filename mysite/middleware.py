@@ -0,0 +1,282 @@
+import json
+import logging
+import random
+import sys
+import threading
+import time
+from contextlib import ExitStack
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+from budget import metrics, profiling
+
+logger = logging.getLogger("budget.perf")
+
+DEFAULTS = {
+    "ENABLED": True,
+    "SAMPLE_RATE": 1.0,
+    "SLOW_REQUEST_MS": 500,
+    "SLOW_QUERY_COUNT": 30,
+    "MAX_LOGGED_QUERIES": 10,
+}
+
+
+def perf_settings():
+    return {**DEFAULTS, **getattr(settings, "PERF_INSTRUMENTATION", {})}
+
+
+class QueryTimer:
+    """execute_wrapper that counts queries, sums DB time and keeps the slowest."""
+
+    def __init__(self, keep):
+        self.keep = keep
+        self.count = 0
+        self.total = 0.0
+        self.slowest = []
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - start
+            self.count += 1
+            self.total += elapsed
+            self._remember(sql, elapsed)
+
+    def _remember(self, sql, elapsed):
+        if len(self.slowest) < self.keep:
+            self.slowest.append((elapsed, sql))
+        elif elapsed > self.slowest[-1][0]:
+            self.slowest[-1] = (elapsed, sql)
+        else:
+            return
+        self.slowest.sort(key=lambda item: item[0], reverse=True)
+
+
+class PerformanceMiddleware:
+    """
+    Per-request wall time, DB query count and time, template render time and
+    response size, keyed by URL name. Requests over the thresholds are logged
+    to the "budget.perf" logger as one JSON record including their slowest SQL.
+
+    Set PERF_INSTRUMENTATION["ENABLED"] = False to remove the middleware from
+    the stack entirely; SAMPLE_RATE measures only a fraction of requests.
+
+    Under ASGI the ORM runs in the request's sync_to_async thread, which has
+    its own connections, so the query timer is hooked in there.
+    """
+
+    sync_capable = True
+    async_capable = True
+    observers = []
+
+    def __init__(self, get_response):
+        config = perf_settings()
+        if not config["ENABLED"]:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.sample_rate = config["SAMPLE_RATE"]
+        self.slow_ms = config["SLOW_REQUEST_MS"]
+        self.slow_queries = config["SLOW_QUERY_COUNT"]
+        self.keep_queries = config["MAX_LOGGED_QUERIES"]
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if self.sample_rate < 1 and random.random() >= self.sample_rate:
+            return self.get_response(request)
+
+        timer = QueryTimer(self.keep_queries)
+        request._perf_render = [None, None]
+        start = time.perf_counter()
+        with self._hook_queries(timer):
+            response = self.get_response(request)
+        wall = time.perf_counter() - start
+
+        self._finish(request, response, timer, wall)
+        return response
+
+    async def __acall__(self, request):
+        if self.sample_rate < 1 and random.random() >= self.sample_rate:
+            return await self.get_response(request)
+
+        timer = QueryTimer(self.keep_queries)
+        request._perf_render = [None, None]
+        start = time.perf_counter()
+        hooks = await sync_to_async(self._hook_queries)(timer)
+        try:
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(hooks.close)()
+        wall = time.perf_counter() - start
+
+        self._finish(request, response, timer, wall)
+        return response
+
+    @staticmethod
+    def _hook_queries(timer):
+        stack = ExitStack()
+        for alias in connections:
+            stack.enter_context(connections[alias].execute_wrapper(timer))
+        return stack
+
+    def process_template_response(self, request, response):
+        render = getattr(request, "_perf_render", None)
+        if render is not None:
+            render[0] = time.perf_counter()
+
+            def rendered(response):
+                render[1] = time.perf_counter()
+
+            response.add_post_render_callback(rendered)
+        return response
+
+    def _finish(self, request, response, timer, wall):
+        match = getattr(request, "resolver_match", None)
+        render_start, render_end = request._perf_render
+        record = {
+            "view": match.view_name if match else None,
+            "method": request.method,
+            "path": request.path,
+            "status": response.status_code,
+            "wall_ms": round(wall * 1000, 2),
+            "db_queries": timer.count,
+            "db_ms": round(timer.total * 1000, 2),
+            "render_ms": (
+                round((render_end - render_start) * 1000, 2)
+                if render_start is not None and render_end is not None
+                else None
+            ),
+            "response_bytes": (
+                None if response.streaming else len(response.content)
+            ),
+        }
+
+        metrics.observe_request(record)
+        for observer in self.observers:
+            observer(request, response, record)
+
+        if record["wall_ms"] >= self.slow_ms or timer.count >= self.slow_queries:
+            record["slow_queries"] = [
+                {"ms": round(elapsed * 1000, 2), "sql": sql}
+                for elapsed, sql in timer.slowest
+            ]
+            logger.warning(json.dumps(record))
+        elif logger.isEnabledFor(logging.DEBUG):
+            logger.debug(json.dumps(record))
+
+
+class ProfilingMiddleware:
+    """
+    Runs selected requests under cProfile plus a stack sampler and stores the
+    result with budget.profiling.save_profile (see the profile_summary command).
+
+    A request is profiled when a staff user sends PROFILING["HEADER"] or the
+    PROFILING["QUERY_PARAM"] query flag, or when it falls within
+    PROFILING["SAMPLE_RATE"] and resolves to a budget view. The choice is made
+    in process_view, once authentication has run, so nobody else can switch
+    the profiler on; profiles cover the view and the response on its way out.
+    Only one request per process is profiled at a time.
+
+    Under ASGI the profile is taken on the event loop thread, so it also holds
+    whatever other requests ran on the loop meanwhile, and ORM calls made
+    through sync_to_async show up as awaits.
+    """
+
+    sync_capable = True
+    async_capable = True
+    _lock = threading.Lock()
+
+    def __init__(self, get_response):
+        config = profiling.profiling_settings()
+        if not config["ENABLED"]:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.sample_rate = config["SAMPLE_RATE"]
+        self.header = config["HEADER"]
+        self.query_param = config["QUERY_PARAM"]
+        self.stack_interval = config["STACK_INTERVAL"]
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+            # Django would run a sync process_view in a worker thread; the
+            # profiler has to start on the loop's thread.
+            self.process_view = self._aprocess_view
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        # Stacks are sampled from here down; process_view starts the run.
+        request._profile_run = {"base": sys._getframe()}
+        try:
+            response = self.get_response(request)
+        finally:
+            self._stop(request._profile_run)
+        return self._save(request, response)
+
+    async def __acall__(self, request):
+        request._profile_run = {"base": sys._getframe()}
+        try:
+            response = await self.get_response(request)
+        finally:
+            self._stop(request._profile_run)
+        if "profiler" not in request._profile_run:
+            return response
+        return await sync_to_async(self._save)(request, response)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        return self._start(request, view_func, request.user)
+
+    async def _aprocess_view(self, request, view_func, view_args, view_kwargs):
+        user = await request.auser() if self._flagged(request) else None
+        return self._start(request, view_func, user)
+
+    def _flagged(self, request):
+        return bool(request.headers.get(self.header) or request.GET.get(self.query_param))
+
+    def _start(self, request, view_func, user):
+        run = getattr(request, "_profile_run", None)
+        if run is None or "profiler" in run:
+            return None
+        flagged = self._flagged(request) and user.is_staff
+        sampled = (
+            not flagged
+            and self.sample_rate > 0
+            and view_func.__module__.startswith("budget.")
+            and random.random() < self.sample_rate
+        )
+        if not (flagged or sampled) or not self._lock.acquire(blocking=False):
+            return None
+
+        sampler = profiling.StackSampler(self.stack_interval)
+        profiler = profiling.ThreadProfiler()
+        sampler.start(base=run["base"])
+        profiler.enable()
+        run.update(profiler=profiler, sampler=sampler, flagged=flagged)
+        return None
+
+    def _stop(self, run):
+        if "profiler" not in run:
+            return
+        try:
+            run["profiler"].disable()
+            run["sampler"].stop()
+        finally:
+            self._lock.release()
+
+    def _save(self, request, response):
+        run = request._profile_run
+        if "profiler" not in run:
+            return response
+        match = getattr(request, "resolver_match", None)
+        path = profiling.save_profile(
+            run["profiler"], run["sampler"], match.view_name if match else None
+        )
+        if run["flagged"]:
+            response["X-Budget-Profile-File"] = path.name
+        return response
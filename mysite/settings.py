@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -44,11 +45,16 @@ LOGIN_URL = "/accounts/login/"
 LOGIN_REDIRECT_URL = "/dashboard/"
 LOGOUT_REDIRECT_URL = "/"
 MIDDLEWARE = [
+    "mysite.middleware.ProfilingMiddleware",
+    "mysite.middleware.PerformanceMiddleware",
     "django.middleware.security.SecurityMiddleware",
+    "budget.routers.ReplicaPinningMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
+    "budget.middleware.BudgetProfileMiddleware",
+    "budget.sharding.ShardMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
@@ -79,10 +85,141 @@ WSGI_APPLICATION = "mysite.wsgi.application"
 DATABASES = {
     "default": {
         "ENGINE": "django.db.backends.sqlite3",
-        "NAME": BASE_DIR / "db.sqlite3",
+        "NAME": os.environ.get("BUDGET_DB_NAME", BASE_DIR / "db.sqlite3"),
     }
 }
 
+# BUDGET_DB_PROFILE=tuned (the default) runs SQLite in WAL mode so readers never
+# block on a writer, waits up to SQLITE_BUSY_TIMEOUT seconds for a lock instead
+# of failing with "database is locked", starts every transaction.atomic() block
+# with BEGIN IMMEDIATE so writers queue for the lock up front rather than
+# deadlocking on a read-to-write upgrade, and keeps connections open between
+# requests. BUDGET_DB_PROFILE=default keeps Django's stock SQLite settings
+# (compare the two with `manage.py bench_db --compare`).
+
+DATABASE_PROFILE = os.environ.get("BUDGET_DB_PROFILE", "tuned")
+SQLITE_BUSY_TIMEOUT = 20
+SQLITE_PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "mmap_size": 128 * 1024 * 1024,
+    "cache_size": -32000,  # KiB
+    "temp_store": "MEMORY",
+}
+
+if DATABASE_PROFILE == "tuned":
+    DATABASES["default"].update({
+        "CONN_MAX_AGE": int(os.environ.get("BUDGET_CONN_MAX_AGE", 600)),
+        "CONN_HEALTH_CHECKS": True,
+        "OPTIONS": {
+            "timeout": SQLITE_BUSY_TIMEOUT,
+            "transaction_mode": "IMMEDIATE",
+            "init_command": "; ".join(
+                f"PRAGMA {name}={value}" for name, value in SQLITE_PRAGMAS.items()
+            ),
+        },
+    })
+
+
+# Read replica for the budget app (budget.routers). Set BUDGET_REPLICA_DB to a
+# second SQLite file to try it locally; `manage.py sync_replica` copies the
+# primary into it. After a write, reads stay on the primary for the rest of
+# the request and, through a cookie, for REPLICA_PIN_SECONDS afterwards.
+
+DATABASE_ROUTERS = ["budget.sharding.ShardRouter", "budget.routers.ReplicaRouter"]
+BUDGET_READ_REPLICA = None
+REPLICA_PIN_SECONDS = 5
+
+if os.environ.get("BUDGET_REPLICA_DB"):
+    DATABASES["replica"] = {
+        **DATABASES["default"],
+        "NAME": os.environ["BUDGET_REPLICA_DB"],
+        "TEST": {"MIRROR": "default"},
+    }
+    BUDGET_READ_REPLICA = "replica"
+
+
+# Horizontal sharding of household data (budget.sharding). Categories, goals,
+# expenses and monthly totals of each family group live on one of
+# BUDGET_SHARDS, picked by consistent hashing of the group id; users, profiles
+# and groups stay on "default". BUDGET_SHARD_COUNT=N adds SQLite files
+# shard_0.sqlite3 ... shard_{N-1}.sqlite3 next to the main database.
+
+BUDGET_SHARDS = ["default"]
+
+if int(os.environ.get("BUDGET_SHARD_COUNT", 0)) > 1:
+    BUDGET_SHARDS = []
+    for index in range(int(os.environ["BUDGET_SHARD_COUNT"])):
+        alias = f"shard_{index}"
+        DATABASES[alias] = {
+            **DATABASES["default"],
+            "NAME": BASE_DIR / f"{alias}.sqlite3",
+            "TEST": {"NAME": BASE_DIR / f"test_{alias}.sqlite3"},
+        }
+        BUDGET_SHARDS.append(alias)
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    }
+}
+
+# Seconds a versioned group cache entry (members list, categories, goals) is kept.
+BUDGET_GROUP_CACHE_TIMEOUT = 600
+
+
+# Request instrumentation (mysite.middleware.PerformanceMiddleware), off unless
+# BUDGET_PERF_INSTRUMENTATION=1. It also feeds the request metrics at /metrics.
+# BUDGET_PERF_SAMPLE_RATE measures only that fraction of requests. Requests
+# slower than SLOW_REQUEST_MS or running SLOW_QUERY_COUNT queries are logged as
+# JSON to the "budget.perf" logger together with their slowest SQL.
+
+PERF_INSTRUMENTATION = {
+    "ENABLED": os.environ.get("BUDGET_PERF_INSTRUMENTATION") == "1",
+    "SAMPLE_RATE": float(os.environ.get("BUDGET_PERF_SAMPLE_RATE", 1.0)),
+    "SLOW_REQUEST_MS": 500,
+    "SLOW_QUERY_COUNT": 30,
+    "MAX_LOGGED_QUERIES": 10,
+}
+
+# Metrics exposed at /metrics in Prometheus text format (budget.metrics).
+# With several worker processes, point METRICS_DB at a SQLite file shared by
+# all of them; workers add their counts into it every METRICS_FLUSH_INTERVAL
+# seconds. METRICS_TOKEN is required as a Bearer token; without one /metrics
+# is only served when DEBUG is on.
+
+METRICS_DB = os.environ.get("BUDGET_METRICS_DB")
+METRICS_FLUSH_INTERVAL = 5
+METRICS_TOKEN = os.environ.get("BUDGET_METRICS_TOKEN")
+
+# On-demand request profiling (mysite.middleware.ProfilingMiddleware). Staff
+# users profile a request by sending the X-Budget-Profile header or ?_profile=1;
+# SAMPLE_RATE additionally profiles that fraction of budget view requests.
+# Profiles land in DIR; summarize them with `manage.py profile_summary`.
+
+PROFILING = {
+    "ENABLED": True,
+    "SAMPLE_RATE": float(os.environ.get("BUDGET_PROFILE_SAMPLE_RATE", 0)),
+    "HEADER": "X-Budget-Profile",
+    "QUERY_PARAM": "_profile",
+    "DIR": os.environ.get("BUDGET_PROFILE_DIR", BASE_DIR / "profiles"),
+}
+
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "handlers": {
+        "console": {"class": "logging.StreamHandler"},
+    },
+    "loggers": {
+        "budget.perf": {"handlers": ["console"], "level": "WARNING", "propagate": False},
+    },
+}
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
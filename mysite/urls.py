@@ -1,6 +1,7 @@
 from django.contrib import admin
 from django.urls import path, include
 
+from budget.metrics import metrics_view
 from budget.views import (
     HomeView,
     DashboardView,
@@ -11,6 +12,7 @@ from budget.views import (
 
 urlpatterns = [
     path("admin/", admin.site.urls),
+    path("metrics", metrics_view, name="metrics"),
     path("accounts/", include("django.contrib.auth.urls")),
     path("", include("budget.urls")),
     path("signup/", SignupView.as_view(), name="signup"),